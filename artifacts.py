@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import schema
+
+logger = logging.getLogger(__name__)
+
+# --- COLUMNAR SHEET ARTIFACTS (ARROW IPC, MEMORY-MAPPABLE) ---
+# Every workbook sheet is also written as an uncompressed Arrow IPC file so the
+# dashboards can memory-map typed columns instead of parsing the xlsx.
+# Layout: market_data/artifacts/<workbook stem>/<sheet name>.arrow + manifest.json
+
+ARTIFACT_DIR = Path(__file__).resolve().parent / "market_data" / "artifacts"
+MANIFEST_NAME = "manifest.json"
+
+# Dashboard load cache: entries are keyed by data_version(), so a new file is
+# picked up on the next rerun. TTL (seconds) is optional; old versions are evicted.
+DATA_CACHE_TTL = float(os.environ["DASHBOARD_DATA_TTL"]) if os.environ.get("DASHBOARD_DATA_TTL") else None
+DATA_CACHE_VERSIONS = 3
+
+
+def artifact_dir(workbook_path):
+    """📁 Artifact folder belonging to a workbook"""
+    return ARTIFACT_DIR / Path(workbook_path).stem
+
+
+def data_version(workbook_path):
+    """🏷️ Cheap version key for a workbook + its artifacts (mtime and size, no parsing)"""
+    parts = []
+    for path in (Path(workbook_path), artifact_dir(workbook_path) / MANIFEST_NAME):
+        try:
+            stat = path.stat()
+            parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+        except FileNotFoundError:
+            parts.append("-")
+    return "|".join(parts)
+
+
+def write_sheet_artifacts(sheets, workbook_path):
+    """💾 Write {sheet name: DataFrame} as Arrow IPC files beside the workbook"""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    folder = artifact_dir(workbook_path)
+    folder.mkdir(parents=True, exist_ok=True)
+    # The manifest marks a complete set: it goes first and comes back last, so a
+    # failed write leaves no manifest and readers fall back to the workbook
+    (folder / MANIFEST_NAME).unlink(missing_ok=True)
+    for sheet_name, df in sheets.items():
+        table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        feather.write_feather(table, folder / f"{sheet_name}.arrow", compression='uncompressed')
+
+    manifest = {
+        "workbook": Path(workbook_path).name,
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "sheets": {name: len(df) for name, df in sheets.items()},
+    }
+    with open(folder / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    logger.info(f"✅ Columnar artifacts saved: {len(sheets)} sheets → {folder}")
+    return folder
+
+
+def read_sheets(workbook_path, sheet_names, optional=(), locale=None):
+    """📤 Load sheets from Arrow artifacts when available, otherwise from the workbook
+
+    Optional sheets that do not exist come back as empty DataFrames. Artifacts
+    older than the workbook (a later run wrote only the xlsx) are ignored. Artifacts
+    already carry schema dtypes and the headers the market was written in; with
+    a locale, headers of any locale (e.g. an older workbook) are relabelled in
+    place - the frames are not copied.
+    """
+    folder = artifact_dir(workbook_path)
+    manifest_path = folder / MANIFEST_NAME
+    if _artifacts_current(manifest_path, workbook_path):
+        try:
+            import pyarrow.feather as feather
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                written = json.load(f)["sheets"]
+            missing = [name for name in sheet_names if name not in written and name not in optional]
+            if not missing:
+                return {
+                    name: _relabel(feather.read_table(folder / f"{name}.arrow", memory_map=True).to_pandas(), locale)
+                    if name in written else pd.DataFrame()
+                    for name in sheet_names
+                }
+            logger.warning(f"⚠️ Columnar artifacts lack sheets {missing}, falling back to Excel")
+        except ImportError:
+            logger.info("pyarrow not installed - reading Excel workbook")
+        except Exception as e:
+            logger.warning(f"⚠️ Columnar artifacts unreadable, falling back to Excel: {str(e)}")
+
+    sheets = {}
+    for name in sheet_names:
+        try:
+            df = pd.read_excel(workbook_path, sheet_name=name)
+            sheets[name] = _relabel(df.astype(schema.dtypes(df.columns)), locale)
+        except ValueError:
+            if name not in optional:
+                raise
+            sheets[name] = pd.DataFrame()
+    return sheets
+
+
+def _artifacts_current(manifest_path, workbook_path):
+    """🕒 True if the artifact manifest exists and is not older than the workbook"""
+    try:
+        manifest_mtime = manifest_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+    try:
+        workbook_mtime = Path(workbook_path).stat().st_mtime_ns
+    except FileNotFoundError:
+        return True  # artifacts only
+    if manifest_mtime < workbook_mtime:
+        logger.warning(f"⚠️ Columnar artifacts are older than {Path(workbook_path).name}, reading the workbook")
+        return False
+    return True
+
+
+def _relabel(df, locale):
+    if locale is not None:
+        df.columns = schema.relabel(df.columns, locale)
+    return df
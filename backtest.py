@@ -0,0 +1,264 @@
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from downloader import FixtureProvider
+from history_store import HistoryStore
+from indicators import PRICE_FIELDS, RESULT_DECIMALS, indicator_frames
+from signal_params import DEFAULT_PARAMS
+from security_master import SecurityMaster
+from signal_rules import (DAILY_SIGNAL_DEFAULT, DAILY_SIGNAL_RULES, QUICK_ACTION_DEFAULT,
+                          evaluate_rules, quick_action_rules)
+
+logger = logging.getLogger(__name__)
+
+# --- SIGNAL BACKTESTER (VECTORIZED OVER THE DATE × TICKER PANEL) ---
+# Replays the same indicator formulas and rule tables as the daily run on every
+# date of the stored history at once: features are wide frames, rules are
+# evaluated on the flattened panel, and forward returns are shifted frames.
+# Like build_panel, indicators run on each ticker's own bars (pushed together,
+# no date holes) and are then scattered back onto the dates, so a missing bar
+# does not blank the rolling windows that follow it.
+# Rule-set grids can fan out over a process pool; the features are shipped to
+# each worker once (initializer), not once per rule set.
+
+BACKTEST_DIR = Path(__file__).resolve().parent / "market_data" / "backtests"
+DEFAULT_HORIZONS = (1, 5, 21)
+MIN_BARS = 22  # same history requirement as the daily run
+
+
+def rule_sets_for(params):
+    """📏 Rule sets replayed by default: name → (rules, default label)"""
+    return {
+        "QUICK_ACTION": (quick_action_rules(params), QUICK_ACTION_DEFAULT),
+        "Signal": (DAILY_SIGNAL_RULES, DAILY_SIGNAL_DEFAULT),
+    }
+
+
+RULE_SETS = rule_sets_for(DEFAULT_PARAMS)
+
+
+# --- PANEL ---
+def price_frames(bars, tickers=None):
+    """🧱 Long bar rows → {field: date × ticker frame} (dates not traded stay NaN)"""
+    if tickers is not None:
+        bars = bars[bars['Ticker'].isin(tickers)]
+    bars = bars.drop_duplicates(subset=['Date', 'Ticker'], keep='last')
+    wide = bars.set_index(['Date', 'Ticker'])[['Open', 'High', 'Low', 'Close', 'Volume']].unstack('Ticker')
+    wide = wide.sort_index().astype(float)
+    return {field: wide[field] for field in wide.columns.get_level_values(0).unique()}
+
+
+def align_bars(frames):
+    """🧱 {field: date × ticker frame} → each ticker's complete bars pushed to the bottom rows, in bar order
+
+    Returns (aligned frames, row order per ticker, usable-bar mask); the order scatters results back.
+    """
+    valid = np.logical_and.reduce([frames[field].notna().to_numpy() for field in PRICE_FIELDS])
+    order = np.argsort(valid, axis=0, kind='stable')  # unusable rows first, bar order kept
+    aligned_valid = np.take_along_axis(valid, order, axis=0)
+    aligned = {}
+    for field in PRICE_FIELDS:
+        values = np.take_along_axis(frames[field].to_numpy(dtype='float64'), order, axis=0)
+        values[~aligned_valid] = np.nan
+        aligned[field] = pd.DataFrame(values, columns=frames[field].columns)
+    return aligned, order, valid
+
+
+def on_dates(frame, order, valid, dates):
+    """📅 Bar-aligned frame → back onto the dates (cells without a usable bar stay NaN)"""
+    values = np.empty(frame.shape)
+    np.put_along_axis(values, order, frame.to_numpy(dtype='float64'), axis=0)
+    values[~valid] = np.nan
+    return pd.DataFrame(values, index=dates, columns=frame.columns)
+
+
+def forward_returns(close, horizons):
+    """📅 {h: % return from today's close to the close h bars later}"""
+    return {h: (close.shift(-h) / close - 1) * 100 for h in horizons}
+
+
+def prepare(bars, sectors, horizons=DEFAULT_HORIZONS, params=DEFAULT_PARAMS):
+    """🧮 Features, eligibility mask, forward returns and sectors for one universe"""
+    return prepare_frames(price_frames(bars), sectors, horizons, params)
+
+
+def prepare_frames(frames, sectors, horizons=DEFAULT_HORIZONS, params=DEFAULT_PARAMS):
+    """🧮 Same as prepare, from {field: date × ticker frame}"""
+    dates = frames['Close'].index
+    bars, order, valid = align_bars(frames)
+    features = indicator_frames(bars['Close'], bars['High'], bars['Low'], bars['Volume'], params)
+    features = {name: on_dates(frame, order, valid, dates) for name, frame in features.items()}
+
+    eligible = valid & (valid.cumsum(axis=0) >= MIN_BARS)
+    horizons = sorted(set(horizons) | {1})  # 1-day returns drive turnover/drawdown
+    forward = {h: on_dates(fwd, order, valid, dates) for h, fwd in forward_returns(bars['Close'], horizons).items()}
+    return {
+        "features": features,
+        "eligible": eligible,
+        "forward": forward,
+        "dates": dates,
+        "tickers": frames['Close'].columns,
+        "sectors": sectors.reindex(frames['Close'].columns).fillna("N/A").to_numpy(),
+    }
+
+
+# --- SIGNALS ---
+def label_panel(features, rules, default):
+    """🏷️ Rule labels for every (date, ticker) cell of the feature frames
+
+    Rules on results columns only (QUICK_ACTION) see them rounded as in the daily
+    results frame; rules on raw inputs (SMA_20, Volume) see raw indicators, as the
+    daily Signal does.
+    """
+    shape = features['Price'].shape
+    columns = {operand for _, conditions in rules for column, _, value in conditions
+               for operand in (column, value) if isinstance(operand, str)}
+    decimals = RESULT_DECIMALS if columns <= set(RESULT_DECIMALS) else {}
+    # Only the referenced frames are flattened (Price gives the row count)
+    flat = pd.DataFrame({name: (frame.round(decimals[name]) if name in decimals else frame).to_numpy().ravel()
+                         for name, frame in features.items() if name in columns or name == 'Price'})
+    return evaluate_rules(flat, rules, default).to_numpy().reshape(shape)
+
+
+def signal_table(prepared, labels):
+    """📋 One row per eligible (date, ticker): signal, sector, entry flag, forward returns"""
+    eligible = prepared['eligible']
+
+    # Entered = first day of a run of the same label (turnover numerator)
+    prev_labels = np.vstack([np.full((1, labels.shape[1]), None, dtype=object), labels[:-1]])
+    prev_eligible = np.vstack([np.zeros((1, eligible.shape[1]), dtype=bool), eligible[:-1]])
+    entered = ~prev_eligible | (prev_labels != labels)
+
+    rows, cols = np.nonzero(eligible)
+    table = pd.DataFrame({
+        "Date": prepared['dates'][rows],
+        "Ticker": prepared['tickers'][cols],
+        "Sector": prepared['sectors'][cols],
+        "Signal": labels[rows, cols],
+        "Entered": entered[rows, cols],
+    })
+    for h, fwd in prepared['forward'].items():
+        table[f"Fwd_{h}D"] = fwd.to_numpy()[rows, cols]
+    return table
+
+
+def max_drawdown(daily_pct):
+    """📉 Max drawdown (%) of compounding daily % returns"""
+    equity = (1 + daily_pct.fillna(0) / 100).cumprod()
+    return float(((equity / equity.cummax() - 1) * 100).min())
+
+
+def summarize(table, by):
+    """📊 Forward returns, hit rates, turnover and drawdown per group"""
+    horizons = [c for c in table.columns if c.startswith("Fwd_")]
+    grouped = table.groupby(by, sort=True)
+
+    summary = grouped.agg(Observations=('Ticker', 'size'), Days=('Date', 'nunique'))
+    returns = grouped[horizons].mean()
+    hit_rates = table[horizons].gt(0).astype(float).where(table[horizons].notna()).groupby([table[b] for b in by]).mean() * 100
+    for col in horizons:
+        h = col[len("Fwd_"):]
+        summary[f"Avg_Ret_{h}"] = returns[col]
+        summary[f"Hit_Rate_{h}"] = hit_rates[col]
+    summary['Turnover'] = grouped['Entered'].mean() * 100
+
+    # Equal-weight basket of the group's members, rebalanced daily, held 1 day
+    daily = table.groupby(by + ['Date'], sort=True)['Fwd_1D'].mean()
+    basket = daily.groupby(level=by, sort=True)
+    summary['Total_Ret_1D_Basket'] = basket.apply(lambda r: float(((1 + r.fillna(0) / 100).prod() - 1) * 100))
+    summary['Max_Drawdown'] = basket.apply(max_drawdown)
+    return summary.round(2).reset_index()
+
+
+def run_rule_set(prepared, rules, default):
+    """🔁 Backtest one rule set: per-signal and per-sector summaries"""
+    table = signal_table(prepared, label_panel(prepared['features'], rules, default))
+    return {
+        "by_signal": summarize(table, ['Signal']),
+        "by_sector": summarize(table, ['Signal', 'Sector']),
+    }
+
+
+# --- PARAMETER GRIDS (OPTIONAL PROCESS POOL) ---
+_WORKER_PANEL = None
+
+
+def _init_worker(prepared):
+    global _WORKER_PANEL
+    _WORKER_PANEL = prepared
+
+
+def _run_in_worker(job):
+    name, rules, default = job
+    return name, run_rule_set(_WORKER_PANEL, rules, default)
+
+
+def threshold_grid(rules, default, label, column, values):
+    """🧪 Variants of a rule set with the numeric thresholds on label/column set to each value"""
+    grid = {}
+    for value in values:
+        variant = [
+            (rule_label, [(c, op, value if rule_label == label and c == column and not isinstance(v, str) else v)
+                          for c, op, v in conditions])
+            for rule_label, conditions in rules
+        ]
+        grid[f"{label} {column}={value}"] = (variant, default)
+    return grid
+
+
+def backtest(bars, sectors, rule_sets=None, horizons=DEFAULT_HORIZONS, processes=None):
+    """🧪 Replay rule sets over the history: {name: {"by_signal": df, "by_sector": df}}"""
+    rule_sets = RULE_SETS if rule_sets is None else rule_sets
+    prepared = prepare(bars, sectors, horizons)
+    logger.info(f"🧪 Backtest panel: {len(prepared['dates'])} dates × {len(prepared['tickers'])} tickers, "
+                f"{int(prepared['eligible'].sum())} signal days, {len(rule_sets)} rule sets")
+
+    jobs = [(name, rules, default) for name, (rules, default) in rule_sets.items()]
+    if processes and processes > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(prepared,)) as pool:
+            return dict(pool.map(_run_in_worker, jobs))
+    return {name: run_rule_set(prepared, rules, default) for name, rules, default in jobs}
+
+
+def export_report(results, path):
+    """💾 One sheet per rule set and grouping"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for name, summaries in results.items():
+            for grouping, frame in summaries.items():
+                frame.to_excel(writer, sheet_name=f"{name}_{grouping}"[:31], index=False)
+    logger.info(f"💾 Backtest report saved: {path}")
+    return path
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the daily signal rules over stored history")
+    parser.add_argument("--market", default="TW")
+    parser.add_argument("--source", help="Fixture file/directory of long bars (default: the market's history store)")
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS))
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    bars = FixtureProvider(args.source).bars if args.source else HistoryStore(args.market).bars
+    if bars.empty:
+        logger.error(f"❌ No bars to backtest for {args.market}")
+        return 1
+
+    master = SecurityMaster.for_market(args.market)
+    sectors = master.lookup(bars['Ticker'].unique())['Sector']
+    results = backtest(bars, sectors, horizons=args.horizons, processes=args.processes)
+    export_report(results, args.output or BACKTEST_DIR / f"{args.market.lower()}_backtest.xlsx")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,200 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from synthetic_market import DEFAULT_DAYS, DEFAULT_SEED, write_market
+
+logger = logging.getLogger(__name__)
+
+# --- BENCHMARK SUITE (SYNTHETIC MARKET, NO NETWORK) ---
+# For every universe size the whole tree is copied to a scratch directory (the
+# history store, indicator state and artifacts live next to the modules), a
+# synthetic market is generated there, and stock_tw.py runs against it twice:
+# a cold run that fills the history store and a warm rerun like the daily job.
+# Stage timings come from the run report; the indicator engine and the
+# dashboard's load_data + figure building are timed in a fresh process
+# (--inner). One JSON line per size is appended to benchmarks/results.jsonl,
+# tagged with the git revision, so commits can be compared offline.
+
+ROOT = Path(__file__).resolve().parent
+RESULTS_PATH = ROOT / "benchmarks" / "results.jsonl"
+BENCHMARK_SIZES = (50, 500, 5_000, 20_000)
+WORKBOOK = "Taiwan_Market_Data_Latest.xlsx"
+
+
+def git_revision():
+    """🏷️ Short HEAD hash (+ '-dirty' when tracked files changed), 'unknown' outside git"""
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def best_of(fn, repeat):
+    """⏱️ Fastest of repeat calls (seconds) and the last result"""
+    timings, result = [], None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return round(min(timings), 4), result
+
+
+# --- IN-PROCESS MEASUREMENTS (RUN INSIDE THE SCRATCH TREE) ---
+def bench_indicators(bars_path, repeat):
+    from history_store import bars_to_wide
+    from indicators import build_panel, calculate_panel_indicators
+
+    bars = pd.read_parquet(bars_path)
+    tickers = sorted(bars['Ticker'].unique())
+    t_wide, wide = best_of(lambda: bars_to_wide(bars), repeat)
+    t_panel, panel = best_of(lambda: build_panel(wide, tickers), repeat)
+    t_ind, _ = best_of(lambda: calculate_panel_indicators(panel), repeat)
+    return {"wide_pivot": t_wide, "build_panel": t_panel, "panel_indicators": t_ind}
+
+
+def bench_dashboard(workbook, repeat):
+    import dashboard_tw
+    from artifacts import data_version
+
+    load_data = getattr(dashboard_tw.load_data, "__wrapped__", dashboard_tw.load_data)  # bypass st.cache_data
+    t_load, (_, df_trend, _, df_favorite) = best_of(lambda: load_data(workbook, data_version(workbook)), repeat)
+    jobs = dashboard_tw.figure_jobs(df_trend, df_favorite, ("benchmark",))
+    t_figures, _ = best_of(lambda: [builder().to_dict() for builder in jobs.values()], repeat)
+    return {"dashboard_load_data": t_load, "dashboard_figures": t_figures, "figure_count": len(jobs)}
+
+
+def inner(bars_path, workbook, repeat):
+    timings = {**bench_indicators(bars_path, repeat), **bench_dashboard(workbook, repeat)}
+    print(json.dumps(timings))
+
+
+# --- ORCHESTRATION ---
+def _run(args, cwd, env=None):
+    started = time.perf_counter()
+    done = subprocess.run(args, cwd=cwd, env=env, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    if done.returncode != 0:
+        raise RuntimeError(f"{' '.join(map(str, args))} failed:\n{done.stderr[-2000:]}")
+    return round(time.perf_counter() - started, 4), done.stdout
+
+
+def run_size(n_tickers, days=DEFAULT_DAYS, seed=DEFAULT_SEED, repeat=1):
+    """🏁 One benchmark record for a universe of n_tickers"""
+    with tempfile.TemporaryDirectory(prefix="bench_") as scratch:
+        scratch = Path(scratch)
+        for module in ROOT.glob("*.py"):
+            shutil.copy2(module, scratch / module.name)
+
+        t_generate, (bars_path, master_path) = best_of(
+            lambda: write_market(scratch / "synthetic", n_tickers, days, seed), 1)
+        env = {**os.environ, "STOCK_DATA_SOURCE": str(bars_path), "SECURITY_MASTER": str(master_path)}
+        env.pop("STOCK_PROFILE", None)
+
+        t_cold, _ = _run([sys.executable, "stock_tw.py"], scratch, env)
+        report = json.loads((scratch / WORKBOOK).with_suffix(".run.json").read_text(encoding='utf-8'))
+        t_warm, _ = _run([sys.executable, "stock_tw.py"], scratch, env)
+        warm_report = json.loads((scratch / WORKBOOK).with_suffix(".run.json").read_text(encoding='utf-8'))
+
+        _, out = _run([sys.executable, "benchmark.py", "--inner", str(bars_path), str(scratch / WORKBOOK),
+                       "--repeat", str(repeat)], scratch)
+        timings = json.loads(out.strip().splitlines()[-1])
+
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "tickers": n_tickers,
+        "days": days,
+        "seed": seed,
+        "machine": {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                    "platform": platform.platform(), "cpus": os.cpu_count()},
+        "timings": {
+            "generate": t_generate,
+            "pipeline_cold": t_cold,
+            "pipeline_warm": t_warm,
+            **timings,
+        },
+        "pipeline_stages": {s["stage"]: s["seconds"] for s in report["stages"]},
+        "pipeline_warm_stages": {s["stage"]: s["seconds"] for s in warm_report["stages"]},
+        "peak_rss_mb": report.get("peak_rss_mb"),
+        "stocks": report.get("counters", {}).get("stocks"),
+    }
+
+
+def save_record(record, path=RESULTS_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_records(path=RESULTS_PATH):
+    if not Path(path).exists():
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(records, baseline, current):
+    """📊 Timings of two revisions side by side (latest record per revision × size)"""
+    rows = {}
+    for record in records:
+        if record["revision"] in (baseline, current):
+            for metric, seconds in record["timings"].items():
+                if metric != "figure_count":
+                    rows[(record["tickers"], metric, record["revision"])] = seconds
+    table = pd.Series(rows, dtype=float).unstack(-1).reindex(columns=[baseline, current])
+    table["ratio"] = (table[current] / table[baseline]).round(2)
+    table.index.names = ["tickers", "metric"]
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the TW pipeline and dashboard on synthetic markets")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCHMARK_SIZES))
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=3, help="best-of repeats for in-process timings")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="print stored timings of two revisions instead of running")
+    parser.add_argument("--inner", nargs=2, metavar=("BARS", "WORKBOOK"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.inner:
+        inner(*args.inner, args.repeat)
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.compare:
+        print(compare(load_records(), *args.compare).to_string())
+        return 0
+
+    for n_tickers in args.sizes:
+        logger.info(f"🏁 Benchmark: {n_tickers} tickers × {args.days} days")
+        record = run_size(n_tickers, args.days, args.seed, args.repeat)
+        t = record["timings"]
+        logger.info(f"⏱️ {n_tickers} tickers: pipeline cold {t['pipeline_cold']:.2f}s / warm {t['pipeline_warm']:.2f}s, "
+                    f"indicators {t['panel_indicators']:.3f}s, dashboard load {t['dashboard_load_data']:.3f}s + "
+                    f"{t['figure_count']} figures {t['dashboard_figures']:.2f}s, peak RSS {record['peak_rss_mb']} MB")
+        if not args.no_save:
+            save_record(record)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+import pandas as pd
+
+# --- MARKET BREADTH (CROSS-SECTIONAL STATISTICS AT INGESTION) ---
+# One row for the whole market and one per sector, computed once per run from
+# the results frame (vectorized groupby, no per-ticker loop). The dashboards
+# render the market overview from these few rows instead of rescanning every
+# ticker on each session. Written beside the sheets as the "market_breadth"
+# Arrow artifact.
+
+BREADTH_SHEET = "market_breadth"
+MARKET_SCOPE = "Market"  # Sector value of the whole-market row
+VOLUME_SURGE_PCT = 150   # Vol_vs_Avg (%) from which a day counts as a volume surge
+STRONG_1M_PCT = 10       # Pct_1Month (%) of a strong gainer
+MONEY_FLOW_QUANTILES = {'MF_P10': 0.10, 'MF_P25': 0.25, 'MF_Median': 0.50, 'MF_P75': 0.75, 'MF_P90': 0.90}
+
+# Count columns: column → boolean row flag
+BREADTH_COUNTS = {
+    'Advancers': lambda df: df['Pct_Day'] > 0,
+    'Decliners': lambda df: df['Pct_Day'] < 0,
+    'Unchanged': lambda df: df['Pct_Day'] == 0,
+    'New_Highs': lambda df: df['New_High'],
+    'New_Lows': lambda df: df['New_Low'],
+    'Above_SMA20_Count': lambda df: df['Above_SMA20'],
+    'Volume_Surges': lambda df: df['Vol_vs_Avg'] >= VOLUME_SURGE_PCT,
+    'Quadrant_1': lambda df: (df['Money_Flow_Strength'] > 1.0) & (df['Pct_1Month'] > 0),
+    'Strong_1M': lambda df: df['Pct_1Month'] > STRONG_1M_PCT,
+}
+
+
+def _scope_stats(grouped):
+    """🧮 Counts, means and money-flow quantiles of one grouping (a DataFrameGroupBy)"""
+    stats = grouped[list(BREADTH_COUNTS)].sum().astype('int32')
+    stats.insert(0, 'Stock_Count', grouped.size().astype('int32'))
+    stats['Avg_Pct_Day'] = grouped['Pct_Day'].mean()
+    stats['Avg_Pct_1M'] = grouped['Pct_1Month'].mean()
+    quantiles = grouped['Money_Flow_Strength'].quantile(list(MONEY_FLOW_QUANTILES.values())).unstack()
+    quantiles.columns = list(MONEY_FLOW_QUANTILES)
+    return stats.join(quantiles)
+
+
+def breadth_table(df_results, by='Sector'):
+    """📊 Breadth of the whole market (first row, Sector = MARKET_SCOPE) and of every sector"""
+    flags = pd.DataFrame({column: flag(df_results).to_numpy(dtype=bool) for column, flag in BREADTH_COUNTS.items()})
+    flags['Scope'] = MARKET_SCOPE
+    flags[by] = df_results[by].astype(str).to_numpy()
+    for column in ('Pct_Day', 'Pct_1Month', 'Money_Flow_Strength'):
+        flags[column] = df_results[column].to_numpy(dtype='float64')
+
+    market = _scope_stats(flags.groupby('Scope'))
+    sectors = _scope_stats(flags.groupby(by)).sort_values('Stock_Count', ascending=False, kind='stable')
+    table = pd.concat([market, sectors])
+    table.index.name = by
+
+    table['AD_Ratio'] = (table['Advancers'] / table['Decliners']).where(table['Decliners'] > 0)
+    table['Pct_Above_SMA20'] = table['Above_SMA20_Count'] / table['Stock_Count'] * 100
+    return table.reset_index()
+
+
+def market_row(df_breadth, by='Sector'):
+    """🌐 The whole-market row of a breadth table as a Series (None if the table is empty)"""
+    if df_breadth is None or df_breadth.empty:
+        return None
+    rows = df_breadth[df_breadth[by] == MARKET_SCOPE]
+    return rows.iloc[0] if len(rows) else None
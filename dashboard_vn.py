@@ -4,235 +4,205 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+from functools import partial
+
+from artifacts import DATA_CACHE_TTL, DATA_CACHE_VERSIONS, data_version, read_sheets
+from breadth import BREADTH_SHEET, market_row
+from display_columns import add_buckets, convert, currency_modes, currency_unit
+from figure_cache import FIGURES
+from ranking import RankIndex
+from screener import SCREENER_SHEET, ScreenerIndex
+import schema
+from markets import VN_LABELS
+from sector_rotation import SectorRotation
+from snapshot_store import SnapshotStore
 
 # ============================================================================
 # 1. CẤU HÌNH TRANG
 # ============================================================================
-st.set_page_config(layout="wide", page_title="Vietnam Market Dashboard 🇻🇳", page_icon="💰")
-st.title("💰 DASHBOARD DÒNG TIỀN VIỆT NAM - SMART MONEY FLOW")
-st.markdown("### Phân Tích Ngành Chuyên Nghiệp | Chỉ Báo Kỹ Thuật | Bao Phủ Toàn Diện")
+current_folder = os.path.dirname(os.path.abspath(__file__))
+
+MARKET_CONFIG = {
+    "market": "VN",
+    "page_title": "Vietnam Market Dashboard 🇻🇳",
+    "page_icon": "💰",
+    "data_file": os.path.join(current_folder, "Vietnam_Market_Data_Latest.xlsx"),
+}
 
 # ============================================================================
 # 2. TẢI DỮ LIỆU
 # ============================================================================
-current_folder = os.path.dirname(os.path.abspath(__file__))
-target_file = os.path.join(current_folder, "Vietnam_Market_Data_Latest.xlsx")
-
-if not os.path.exists(target_file):
-    st.error(f"❌ Không tìm thấy file dữ liệu: {target_file}")
-    st.info("⚠️ Vui lòng chạy **stock_vn_final.py** trước để tạo file dữ liệu.")
-    st.stop()
-
-@st.cache_data
-def load_data():
-    """Tải tất cả các sheet từ file Excel"""
-    df_daily = pd.read_excel(target_file, sheet_name='1_Tin_Hieu_Hom_Nay')
-    df_trend = pd.read_excel(target_file, sheet_name='2_Xu_Huong_21_Ngay')
-    df_sector = pd.read_excel(target_file, sheet_name='3_Song_Nganh')
-    try:
-        df_favorite = pd.read_excel(target_file, sheet_name='4_My_Favorite')
-    except:
-        df_favorite = pd.DataFrame()
+# Nhãn trạng thái: cột mới → (cột nguồn, ngưỡng giảm dần, nhãn)
+FAVORITE_BUCKETS = {
+    'Trạng_Thái': ('%_Ngày', (2, 0, -2),
+                   ('Tăng Mạnh (>2%)', 'Tăng Nhẹ (0-2%)', 'Giảm Nhẹ (0 to -2%)', 'Giảm Mạnh (<-2%)')),
+    'Xu_Hướng': ('%_Tăng_1_Tháng', (10, 5, 0, -5, -10),
+                 ('Tăng Mạnh (>10%)', 'Tăng Vừa (5-10%)', 'Tăng Nhẹ (0-5%)',
+                  'Giảm Nhẹ (0 to -5%)', 'Giảm Vừa (-5 to -10%)', 'Giảm Mạnh (<-10%)')),
+    'Biểu_Tượng': ('%_Ngày', (3, 0, -3), ('🚀', '📈', '📉', '⚠️')),
+}
+TREND_BUCKETS = {
+    'Trạng_Thái_Dòng_Tiền': ('Sức_Mạnh_Dòng_Tiền', (1.5, 1.2), ('🔥 RẤT MẠNH', '💪 MẠNH', '✅ TỐT')),
+    'Trạng_Thái_Động_Lượng': ('%_Tăng_1_Tháng', (15, 5), ('🚀 XUẤT SẮC (>15%)', '📈 MẠNH (5-15%)', '✔️ DƯƠNG (0-5%)')),
+}
+
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_VERSIONS)
+def load_data(target_file, version):
+    """Tải tất cả các sheet (ưu tiên file cột Arrow, dự phòng file Excel)"""
+    sheets = read_sheets(target_file, ['1_Tin_Hieu_Hom_Nay', '2_Xu_Huong_21_Ngay', '3_Song_Nganh', '4_My_Favorite'],
+                         optional=['4_My_Favorite'], locale="vi")
+    df_daily = sheets['1_Tin_Hieu_Hom_Nay']
+    df_trend = sheets['2_Xu_Huong_21_Ngay']
+    df_sector = sheets['3_Song_Nganh']
+    df_favorite = sheets['4_My_Favorite']
+
+    # Nhãn trạng thái tính một lần cho mỗi phiên bản dữ liệu, không phải mỗi lần rerun
+    df_trend = add_buckets(df_trend, TREND_BUCKETS)
+    df_favorite = add_buckets(df_favorite, FAVORITE_BUCKETS)
 
     return df_daily, df_trend, df_sector, df_favorite
 
-try:
-    df_daily, df_trend, df_sector, df_favorite = load_data()
-except Exception as e:
-    st.error(f"❌ Lỗi đọc file Excel: {str(e)}")
-    st.stop()
-
-# ============================================================================
-# 3. DEBUG INFO & DOWNLOAD
-# ============================================================================
-with st.expander("🔍 DEBUG: Kiểm Tra Dữ Liệu", expanded=False):
-    st.write(f"✅ Sheet 1 (Tín Hiệu Hôm Nay): {len(df_daily)} cổ phiếu, {len(df_daily.columns)} cột")
-    st.write(f"✅ Sheet 2 (Xu Hướng 21 Ngày): {len(df_trend)} cổ phiếu, {len(df_trend.columns)} cột")
-    st.write(f"✅ Sheet 3 (Dòng Ngành): {len(df_sector)} ngành, {len(df_sector.columns)} cột")
-    if not df_favorite.empty:
-        st.write(f"✅ Sheet 4 (Danh Mục Yêu Thích): {len(df_favorite)} cổ phiếu, {len(df_favorite.columns)} cột")
 
-    st.write("\n📋 **Sheet 1 Columns:**", list(df_daily.columns))
-    st.write("📋 **Sheet 2 Columns:**", list(df_trend.columns))
-    st.write("📋 **Sheet 3 Columns:**", list(df_sector.columns))
-    if not df_favorite.empty:
-        st.write("📋 **Sheet 4 Columns:**", list(df_favorite.columns))
-
-with st.expander("📥 TRÍCH XUẤT DỮ LIỆU", expanded=False):
-    col_dl1, col_dl2 = st.columns([1, 4])
-    with col_dl1:
-        with open(target_file, "rb") as f:
-            st.download_button(
-                label="📥 Tải Excel về máy",
-                data=f,
-                file_name="Vietnam_Market_Analysis.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-    with col_dl2:
-        st.info("📊 File Excel bao gồm 4 Sheet: Tín hiệu hôm nay, Xu hướng 21 ngày, Dòng tiền ngành và Danh mục yêu thích (với 6 chỉ báo kỹ thuật).")
+def trend_rank_index(df_trend):
+    """🏅 Chỉ mục xếp hạng của sheet xu hướng: theo ngành, kèm bộ lọc Phần Tư 1"""
+    q1 = (df_trend['Sức_Mạnh_Dòng_Tiền'] > 1.0) & (df_trend['%_Tăng_1_Tháng'] > 0)
+    return RankIndex(df_trend, by='Ngành', filters={'q1': q1})
 
-# ============================================================================
-# 4. DANH MỤC YÊU THÍCH - VISUALIZATION TOÀN DIỆN
-# ============================================================================
-if not df_favorite.empty:
-    st.divider()
-    st.header("⭐ DANH MỤC CỔ PHIẾU YÊU THÍCH")
-
-    col_fav1, col_fav2 = st.columns([1, 1])
-
-    # --- BIỂU ĐỒ TRÒN: Hiệu Suất Ngày ---
-    with col_fav1:
-        st.subheader("📊 Phân Bố Tăng/Giảm (Hôm Nay)")
-        df_fav_perf = df_favorite.copy()
-        df_fav_perf['Trạng_Thái'] = df_fav_perf['%_Ngày'].apply(
-            lambda x: 'Tăng Mạnh (>2%)' if x > 2 else
-                     ('Tăng Nhẹ (0-2%)' if x > 0 else
-                     ('Giảm Nhẹ (0 to -2%)' if x > -2 else 'Giảm Mạnh (<-2%)'))
-        )
 
-        status_counts = df_fav_perf['Trạng_Thái'].value_counts()
-        colors_daily = {
-            'Tăng Mạnh (>2%)': '#00CC66',
-            'Tăng Nhẹ (0-2%)': '#90EE90',
-            'Giảm Nhẹ (0 to -2%)': '#FFB366',
-            'Giảm Mạnh (<-2%)': '#FF4444'
-        }
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_VERSIONS)
+def load_rankings(target_file, version):
+    """Chỉ mục top-K của sheet tín hiệu và xu hướng (sắp xếp một lần mỗi phiên bản dữ liệu, dùng chung mọi phiên)"""
+    df_daily, df_trend, _, _ = load_data(target_file, version)
+    return RankIndex(df_daily), trend_rank_index(df_trend)
 
-        fig_pie_daily = go.Figure(data=[go.Pie(
-            labels=status_counts.index,
-            values=status_counts.values,
-            hole=0.4,
-            marker=dict(colors=[colors_daily.get(x, '#CCCCCC') for x in status_counts.index]),
-            textinfo='label+percent+value',
-            textposition='outside',
-            hovertemplate='%{label}<br>Số lượng: %{value}<br>Tỷ lệ: %{percent}'
-        )])
-
-        fig_pie_daily.update_layout(
-            title=f"Biến Động Hôm Nay ({len(df_favorite)} cổ phiếu)",
-            height=400,
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
-        )
-        st.plotly_chart(fig_pie_daily, use_container_width=True)
-
-    # --- BIỂU ĐỒ TRÒN: Xu Hướng Tháng ---
-    with col_fav2:
-        st.subheader("📈 Xu Hướng 1 Tháng")
-        df_fav_trend = df_favorite.copy()
-        df_fav_trend['Xu_Hướng'] = df_fav_trend['%_Tăng_1_Tháng'].apply(
-            lambda x: 'Tăng Mạnh (>10%)' if x > 10 else
-                     ('Tăng Vừa (5-10%)' if x > 5 else
-                     ('Tăng Nhẹ (0-5%)' if x > 0 else
-                     ('Giảm Nhẹ (0 to -5%)' if x > -5 else
-                     ('Giảm Vừa (-5 to -10%)' if x > -10 else 'Giảm Mạnh (<-10%)'))))
-        )
 
-        trend_counts = df_fav_trend['Xu_Hướng'].value_counts()
-        colors_trend = {
-            'Tăng Mạnh (>10%)': '#006600',
-            'Tăng Vừa (5-10%)': '#00AA00',
-            'Tăng Nhẹ (0-5%)': '#90EE90',
-            'Giảm Nhẹ (0 to -5%)': '#FFD700',
-            'Giảm Vừa (-5 to -10%)': '#FF8C00',
-            'Giảm Mạnh (<-10%)': '#CC0000'
-        }
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_VERSIONS)
+def load_breadth(target_file, version):
+    """Độ rộng thị trường + từng ngành do pipeline tính sẵn (rỗng với dữ liệu cũ)"""
+    return read_sheets(target_file, [BREADTH_SHEET], optional=[BREADTH_SHEET], locale="vi")[BREADTH_SHEET]
 
-        fig_pie_trend = go.Figure(data=[go.Pie(
-            labels=trend_counts.index,
-            values=trend_counts.values,
-            hole=0.4,
-            marker=dict(colors=[colors_trend.get(x, '#CCCCCC') for x in trend_counts.index]),
-            textinfo='label+percent+value',
-            textposition='outside',
-            hovertemplate='%{label}<br>Số lượng: %{value}<br>Tỷ lệ: %{percent}'
-        )])
-
-        fig_pie_trend.update_layout(
-            title=f"Hiệu Suất 1 Tháng ({len(df_favorite)} cổ phiếu)",
-            height=400,
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
-        )
-        st.plotly_chart(fig_pie_trend, use_container_width=True)
 
-    # --- BẢNG CHI TIẾT VỚI CHỈ BÁO KỸ THUẬT ---
-    st.subheader("📋 Chi Tiết Danh Mục Với Chỉ Báo Kỹ Thuật")
-    df_display = df_favorite.copy()
-    df_display['Biểu_Tượng'] = df_display['%_Ngày'].apply(
-        lambda x: '🚀' if x > 3 else ('📈' if x > 0 else ('📉' if x > -3 else '⚠️'))
-    )
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_VERSIONS)
+def load_history(market, version, days, codes):
+    """Lịch sử dòng tiền của `days` snapshot gần nhất (ngành × ngày, mã × ngày, tín hiệu từng mã)"""
+    store = SnapshotStore(market)
+    df_groups = store.sector_history(days=days)
+    df_codes = store.ticker_history(list(codes), days=days) if codes else pd.DataFrame()
+    df_signals = store.ticker_history(list(codes), days=days, column='Signal') if codes else pd.DataFrame()
+    df_signals = df_signals.astype(object).replace(VN_LABELS)  # snapshot lưu nhãn gốc (tiếng Anh)
+    for df in (df_groups, df_codes, df_signals):
+        df.columns = df.columns.astype(str)  # header categorical → nhãn thường cho plotly
+    return df_groups, df_codes, df_signals
 
-    display_cols = ['Biểu_Tượng', 'Mã', 'Ngành', 'Giá', '%_Ngày', '%_Tăng_1_Tháng',
-                    'RSI', 'MACD', 'BB_Position', 'Stochastic', 'ATR%', 'Vol_Trend',
-                    'Sức_Mạnh_Dòng_Tiền', 'QUICK_ACTION']
-    available_cols = [col for col in display_cols if col in df_display.columns]
 
-    st.dataframe(
-        df_display[available_cols].sort_values('%_Ngày', ascending=False),
-        hide_index=True,
-        use_container_width=True,
-        height=350
-    )
+@st.cache_data(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_VERSIONS)
+def load_rotation(market, version, lookback, days):
+    """Chỉ số luân chuyển ngành của phiên cuối so với `lookback` phiên trước, và lịch sử hạng trong `days` phiên"""
+    rotation = SectorRotation(market)
+    if rotation.daily.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    return rotation.metrics(lookback), rotation.series('Rank', days=days)
 
-    # --- THỐNG KÊ TỔNG HỢP ---
-    col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
 
-    with col_stat1:
-        avg_daily = df_favorite['%_Ngày'].mean()
-        st.metric("📊 Trung Bình Ngày", f"{avg_daily:.2f}%",
-                 delta=f"{avg_daily:.2f}%", delta_color="normal")
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_VERSIONS)
+def load_screener(target_file, version):
+    """Bộ lọc trên mọi dòng kết quả (chỉ mục cột và cache kết quả dùng chung mọi phiên, theo phiên bản dữ liệu)"""
+    # Cột tên chuẩn (canonical) để truy vấn; hiển thị đổi sang nhãn tiếng Việt
+    df_results = read_sheets(target_file, [SCREENER_SHEET], optional=[SCREENER_SHEET], locale="en")[SCREENER_SHEET]
+    return ScreenerIndex(df_results)
 
-    with col_stat2:
-        avg_monthly = df_favorite['%_Tăng_1_Tháng'].mean()
-        st.metric("📈 Trung Bình Tháng", f"{avg_monthly:.2f}%",
-                 delta=f"{avg_monthly:.2f}%", delta_color="normal")
 
-    with col_stat3:
-        positive_count = len(df_favorite[df_favorite['%_Ngày'] > 0])
-        st.metric("✅ Tăng Giá Hôm Nay", f"{positive_count}/{len(df_favorite)}",
-                 delta=f"{positive_count/len(df_favorite)*100:.0f}%")
+# Bộ lọc mẫu (nhãn tiếng Việt, bộ lọc nhận nhãn của mọi locale)
+SCREENER_PRESETS = {
+    "Phần Tư 1 (tiền vào + động lượng)": "Sức_Mạnh_Dòng_Tiền > 1.0 and %_Tăng_1_Tháng > 0",
+    "Quá bán, tiền vào": "RSI < 35 and Sức_Mạnh_Dòng_Tiền > 1.0",
+    "Bùng nổ khối lượng": "%_Vol_vs_TB >= 150 and %_Ngày > 0",
+    "Quá mua, dải Bollinger trên": "RSI > 70 and BB_Position > 90",
+    "Tích lũy yên lặng": "ATR% < 3 and Vol_Trend > 20 and Trên SMA20 == true",
+    "Đỉnh 20 phiên mới": "Đỉnh 20 Phiên == true",
+}
+SCREENER_COLUMNS = ['Code', 'Sector', 'Exchange', 'Price', 'Pct_Day', 'Pct_1Month', 'Vol_vs_Avg', 'Money_Flow_Strength',
+                    'RSI', 'BB_Position', 'Stochastic', 'ATR_Pct', 'Vol_Trend', 'Signal', 'QUICK_ACTION']
 
-    with col_stat4:
-        strong_stocks = len(df_favorite[df_favorite['%_Tăng_1_Tháng'] > 10])
-        st.metric("🔥 Tăng Mạnh 1 Tháng", f"{strong_stocks}/{len(df_favorite)}",
-                 delta=f"{strong_stocks/len(df_favorite)*100:.0f}%")
 
 # ============================================================================
-# 5. CÀI ĐẶT ĐƠN VỊ TIỀN TỆ
+# 2b. BIỂU ĐỒ (spec được cache theo phiên bản dữ liệu trong figure_cache.FIGURES)
 # ============================================================================
-st.divider()
-col_opt, _ = st.columns([2, 3])
-with col_opt:
-    currency_mode = st.radio(
-        "💱 Chế Độ Hiển Thị Thanh Khoản:",
-        ("Gốc (Tỷ VND)", "Triệu USD ($)", "Tỷ TWD (台幣)"),
-        horizontal=True
-    )
+CURRENCY_MODES = currency_modes(MARKET_CONFIG["market"])
 
-def convert_val(val):
-    if currency_mode == "Triệu USD ($)":
-        return val * 1000 / 25.0  # 1 USD ≈ 25,000 VND
-    elif currency_mode == "Tỷ TWD (台幣)":
-        return val * 1000 / 770  # 1 TWD ≈ 770 VND
-    return val
 
-unit_label = "Tỷ VND"
-if "USD" in currency_mode:
-    unit_label = "Triệu USD"
-if "TWD" in currency_mode:
-    unit_label = "Tỷ TWD"
+def to_display_currency(values, currency_mode):
+    return convert(values, MARKET_CONFIG["market"], currency_mode)
+
+
+def unit_label_for(currency_mode):
+    return currency_unit(MARKET_CONFIG["market"], currency_mode)
+
+
+def build_daily_pie(df_favorite):
+    status_counts = df_favorite['Trạng_Thái'].value_counts()
+    colors_daily = {
+        'Tăng Mạnh (>2%)': '#00CC66',
+        'Tăng Nhẹ (0-2%)': '#90EE90',
+        'Giảm Nhẹ (0 to -2%)': '#FFB366',
+        'Giảm Mạnh (<-2%)': '#FF4444'
+    }
+
+    fig_pie_daily = go.Figure(data=[go.Pie(
+        labels=status_counts.index,
+        values=status_counts.values,
+        hole=0.4,
+        marker=dict(colors=[colors_daily.get(x, '#CCCCCC') for x in status_counts.index]),
+        textinfo='label+percent+value',
+        textposition='outside',
+        hovertemplate='%{label}<br>Số lượng: %{value}<br>Tỷ lệ: %{percent}'
+    )])
+
+    fig_pie_daily.update_layout(
+        title=f"Biến Động Hôm Nay ({len(df_favorite)} cổ phiếu)",
+        height=400,
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+    )
+    return fig_pie_daily
+
+
+def build_trend_pie(df_favorite):
+    trend_counts = df_favorite['Xu_Hướng'].value_counts()
+    colors_trend = {
+        'Tăng Mạnh (>10%)': '#006600',
+        'Tăng Vừa (5-10%)': '#00AA00',
+        'Tăng Nhẹ (0-5%)': '#90EE90',
+        'Giảm Nhẹ (0 to -5%)': '#FFD700',
+        'Giảm Vừa (-5 to -10%)': '#FF8C00',
+        'Giảm Mạnh (<-10%)': '#CC0000'
+    }
+
+    fig_pie_trend = go.Figure(data=[go.Pie(
+        labels=trend_counts.index,
+        values=trend_counts.values,
+        hole=0.4,
+        marker=dict(colors=[colors_trend.get(x, '#CCCCCC') for x in trend_counts.index]),
+        textinfo='label+percent+value',
+        textposition='outside',
+        hovertemplate='%{label}<br>Số lượng: %{value}<br>Tỷ lệ: %{percent}'
+    )])
+
+    fig_pie_trend.update_layout(
+        title=f"Hiệu Suất 1 Tháng ({len(df_favorite)} cổ phiếu)",
+        height=400,
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+    )
+    return fig_pie_trend
 
-# ============================================================================
-# 6. BẢN ĐỒ PHÂN CẤP - NGÀNH → CỔ PHIẾU
-# ============================================================================
-st.subheader(f"1. BẢN ĐỒ DÒNG TIỀN CHI TIẾT (Ngành → Cổ Phiếu)")
 
-df_treemap = df_trend.copy()
-df_treemap['Thanh_Khoan'] = df_treemap['GTGD_TB_Tỷ'].apply(convert_val)
-df_treemap['Ngành_Bold'] = df_treemap['Ngành'].apply(lambda x: f"<b>{x}</b>")
+def build_treemap(df_trend, currency_mode):
+    unit_label = unit_label_for(currency_mode)
+    df_treemap = df_trend.copy()
+    df_treemap['Thanh_Khoan'] = to_display_currency(df_treemap['GTGD_TB_Tỷ'], currency_mode)
+    df_treemap['Ngành_Bold'] = df_treemap['Ngành'].apply(lambda x: f"<b>{x}</b>")
 
-try:
     fig_hier = px.treemap(
         df_treemap,
         path=['Ngành_Bold', 'Mã'],
@@ -271,283 +241,623 @@ try:
         font=dict(size=11),
         margin=dict(l=10, r=10, t=80, b=10)
     )
+    return fig_hier
 
-    st.plotly_chart(fig_hier, use_container_width=True)
-    st.info("💡 **Cách sử dụng:** Click vào ô ngành (**chữ đậm**) để xem chi tiết các cổ phiếu. Click 'All' ở trên để quay lại tổng quan.")
-
-except Exception as e:
-    st.error(f"❌ Lỗi tạo biểu đồ phân cấp: {str(e)}")
-    st.write("Chuyển sang treemap cơ bản...")
-
-    # FALLBACK: Treemap ngành đơn giản
-    if 'Tổng GTGD (Tỷ)' in df_sector.columns:
-        df_sector_plot = df_sector.copy()
-        df_sector_plot['Thanh_Khoan_Hien_Thi'] = df_sector_plot['Tổng GTGD (Tỷ)'].apply(convert_val)
-        df_sector_plot['Value_Display'] = pd.to_numeric(df_sector_plot['Thanh_Khoan_Hien_Thi'], errors='coerce').fillna(1)
-        df_sector_plot['Color_Value'] = pd.to_numeric(df_sector_plot['TB % Tăng (1M)'], errors='coerce').fillna(0)
-
-        fig_map = px.treemap(
-            df_sector_plot,
-            path=['Ngành'],
-            values='Value_Display',
-            color='Color_Value',
-            color_continuous_scale='RdYlGn',
-            color_continuous_midpoint=0,
-            labels={'Value_Display': f'Thanh khoản ({unit_label})', 'Color_Value': '% Tăng (1T)'}
-        )
 
-        fig_map.update_layout(height=700, title=f"Tổng Quan Ngành (Kích thước = Thanh khoản, Màu = Hiệu suất)")
-        st.plotly_chart(fig_map, use_container_width=True)
+def sector_frame(df_trend, sector, currency_mode):
+    df_sub = df_trend[df_trend['Ngành'] == sector].copy()
+    df_sub['Thanh_Khoan_Hien_Thi'] = to_display_currency(df_sub['GTGD_TB_Tỷ'], currency_mode)
+    return df_sub
 
-# ============================================================================
-# 7. PHÂN TÍCH CHI TIẾT NGÀNH & TOP VOLUME
-# ============================================================================
-col1, col2 = st.columns([3, 2])
 
-with col1:
-    st.subheader("2. SOI CHI TIẾT THEO NGÀNH (MÔ HÌNH 4 PHẦN TƯ)")
+def build_sector_scatter(df_sub):
+    fig_scatter = px.scatter(
+        df_sub,
+        x="Sức_Mạnh_Dòng_Tiền",
+        y="%_Tăng_1_Tháng",
+        size="Thanh_Khoan_Hien_Thi",
+        color="Sức_Mạnh_Dòng_Tiền",
+        text="Mã",
+        labels={"Sức_Mạnh_Dòng_Tiền": "Lực Mua (Dòng Tiền)", "%_Tăng_1_Tháng": "Đà Tăng Giá (%)"},
+        color_continuous_scale='Portland'
+    )
 
-    selected_sector = st.selectbox("🔍 Chọn ngành để phân tích:",
-                                   sorted(df_trend['Ngành'].unique()))
+    fig_scatter.add_vline(x=1.0, line_dash="dash", line_color="gray")
+    fig_scatter.add_hline(y=0, line_dash="dash", line_color="gray")
+    fig_scatter.update_layout(height=500)
+    return fig_scatter
 
-    df_sub = df_trend[df_trend['Ngành'] == selected_sector].copy()
-    df_sub['Thanh_Khoan_Hien_Thi'] = df_sub['GTGD_TB_Tỷ'].apply(convert_val)
 
-    if not df_sub.empty:
-        try:
-            fig_scatter = px.scatter(
-                df_sub,
-                x="Sức_Mạnh_Dòng_Tiền",
-                y="%_Tăng_1_Tháng",
-                size="Thanh_Khoan_Hien_Thi",
-                color="Sức_Mạnh_Dòng_Tiền",
-                text="Mã",
-                labels={"Sức_Mạnh_Dòng_Tiền": "Lực Mua (Dòng Tiền)", "%_Tăng_1_Tháng": "Đà Tăng Giá (%)"},
-                color_continuous_scale='Portland'
-            )
+def quadrant1_top10(df_trend, ranks=None):
+    """Số cổ phiếu Phần Tư 1 (Sức_Mạnh_Dòng_Tiền > 1.0 VÀ %_Tăng_1_Tháng > 0) và top 10 theo dòng tiền"""
+    if ranks is None:
+        ranks = trend_rank_index(df_trend)
 
-            fig_scatter.add_vline(x=1.0, line_dash="dash", line_color="gray")
-            fig_scatter.add_hline(y=0, line_dash="dash", line_color="gray")
-            fig_scatter.update_layout(height=500)
-            st.plotly_chart(fig_scatter, use_container_width=True)
+    # Top 10 theo Sức_Mạnh_Dòng_Tiền: 10 dòng Phần Tư 1 đầu tiên của thứ tự đã xếp hạng
+    df_top10 = ranks.top('Sức_Mạnh_Dòng_Tiền', 10, filter='q1').copy()
 
-            # --- TOP 5 DÒNG TIỀN YẾU ---
-            try:
-                df_outflow = df_sub.sort_values(by='Sức_Mạnh_Dòng_Tiền', ascending=True).head(5).copy()
-                outflow_cols = [c for c in ['Mã', 'Giá', 'Sức_Mạnh_Dòng_Tiền', '%_Tăng_1_Tháng', 'Thanh_Khoan_Hien_Thi'] if c in df_outflow.columns]
-                st.markdown("**Top 5 Dòng Tiền Yếu Nhất (Lực bán mạnh)**")
-                st.dataframe(df_outflow[outflow_cols].reset_index(drop=True), use_container_width=True, height=220)
-            except Exception:
-                pass
-
-        except Exception as e:
-            st.error(f"❌ Lỗi vẽ biểu đồ scatter: {e}")
-    else:
-        st.warning(f"⚠️ Không có dữ liệu cho ngành: {selected_sector}")
+    return ranks.count('q1'), df_top10
 
-with col2:
-    st.subheader("3. TOP ĐỘT BIẾN KHỐI LƯỢNG")
-    df_vol = df_daily.sort_values(by='%_Vol_vs_TB', ascending=False).head(15)
 
-    st.dataframe(
-        df_vol[['Mã', 'Giá', '%_Vol_vs_TB', 'Tín_Hiệu_Ngày']],
-        hide_index=True,
-        use_container_width=True,
-        height=500
-    )
+def build_sector_pie(df_top10):
+    sector_counts = df_top10['Ngành'].value_counts()
+    sector_counts = sector_counts[sector_counts > 0]  # categorical: bỏ các ngành không có mã
 
-# ============================================================================
-# 8. TOP 10 DÒNG TIỀN MẠNH NHẤT (PHẦN TƯ 1) - TỔNG QUAN THỊ TRƯỜNG
-# ============================================================================
-st.divider()
-st.header("🔥 TOP 10 DÒNG TIỀN MẠNH NHẤT (PHẦN TƯ 1) - TỔNG QUAN THỊ TRƯỜNG")
-st.markdown("**Phần Tư 1 = Lực Mua Mạnh + Động Lượng Dương** | Bức Tranh Kinh Tế Liên Ngành")
+    fig_pie_sector = go.Figure(data=[go.Pie(
+        labels=sector_counts.index,
+        values=sector_counts.values,
+        hole=0.4,
+        textinfo='label+value',
+        textposition='outside',
+        hovertemplate='%{label}<br>Số lượng: %{value}<br>Tỷ lệ: %{percent}'
+    )])
 
-# Lọc Phần Tư 1: Sức_Mạnh_Dòng_Tiền > 1.0 VÀ %_Tăng_1_Tháng > 0
-df_q1 = df_trend[(df_trend['Sức_Mạnh_Dòng_Tiền'] > 1.0) & (df_trend['%_Tăng_1_Tháng'] > 0)].copy()
+    fig_pie_sector.update_layout(
+        title="Top 10 Cổ Phiếu Theo Ngành",
+        height=400,
+        showlegend=True,
+        legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.1)
+    )
+    return fig_pie_sector
+
+
+def build_flow_bar(df_top10):
+    # PHIÊN BẢN TỐI ƯU: Trục X rộng rãi và dễ đọc hơn
+    fig_bar = make_subplots(specs=[[{"secondary_y": True}]])
+
+    fig_bar.add_trace(
+        go.Bar(
+            name='Sức Mạnh Dòng Tiền',
+            x=df_top10['Mã'],
+            y=df_top10['Sức_Mạnh_Dòng_Tiền'],
+            marker_color='#2E86AB',
+            offsetgroup=0
+        ),
+        secondary_y=False
+    )
 
-if len(df_q1) > 0:
-    # Sắp xếp theo Sức_Mạnh_Dòng_Tiền và lấy top 10
-    df_top10 = df_q1.sort_values(by='Sức_Mạnh_Dòng_Tiền', ascending=False).head(10).copy()
+    fig_bar.add_trace(
+        go.Bar(
+            name='Tăng 1T (%)',
+            x=df_top10['Mã'],
+            y=df_top10['%_Tăng_1_Tháng'],
+            marker_color='#06D6A0',
+            offsetgroup=1
+        ),
+        secondary_y=True
+    )
 
-    # Thêm chỉ báo trạng thái
-    df_top10['Trạng_Thái_Dòng_Tiền'] = df_top10['Sức_Mạnh_Dòng_Tiền'].apply(
-        lambda x: '🔥 RẤT MẠNH' if x > 1.5 else ('💪 MẠNH' if x > 1.2 else '✅ TỐT')
+    # TRỤC X CẢI TIẾN: Nhiều không gian và dễ đọc hơn
+    fig_bar.update_xaxes(
+        title_text="Mã Cổ Phiếu",
+        tickangle=-65,
+        tickfont=dict(size=10),
+        automargin=True
     )
 
-    df_top10['Trạng_Thái_Động_Lượng'] = df_top10['%_Tăng_1_Tháng'].apply(
-        lambda x: '🚀 XUẤT SẮC (>15%)' if x > 15 else ('📈 MẠNH (5-15%)' if x > 5 else '✔️ DƯƠNG (0-5%)')
+    fig_bar.update_yaxes(title_text="Sức Mạnh Dòng Tiền", secondary_y=False)
+    fig_bar.update_yaxes(title_text="Tăng 1T (%)", secondary_y=True)
+
+    fig_bar.update_layout(
+        title_text="So Sánh Sức Mạnh vs Hiệu Suất",
+        barmode='group',
+        height=500,
+        margin=dict(b=120),
+        legend=dict(orientation="h", yanchor="top", y=-0.25, xanchor="center", x=0.5)
     )
+    return fig_bar
+
+
+def figure_jobs(df_trend, df_favorite, key_prefix, ranks=None):
+    """🔥 Mọi biểu đồ cache được của một phiên bản dữ liệu, dạng {cache key: builder}"""
+    jobs = {}
+    if not df_favorite.empty:
+        jobs[key_prefix + ("daily_pie",)] = partial(build_daily_pie, df_favorite)
+        jobs[key_prefix + ("trend_pie",)] = partial(build_trend_pie, df_favorite)
 
-    df_top10['Thanh_Khoan_Hien_Thi'] = df_top10['GTGD_TB_Tỷ'].apply(convert_val)
+    for currency_mode in CURRENCY_MODES:
+        jobs[key_prefix + ("treemap", currency_mode)] = partial(build_treemap, df_trend, currency_mode)
+        for sector in df_trend['Ngành'].dropna().unique():
+            df_sub = sector_frame(df_trend, sector, currency_mode)
+            jobs[key_prefix + ("scatter", currency_mode, sector)] = partial(build_sector_scatter, df_sub)
 
-    # === BẢNG CHỈ SỐ CHÍNH ===
-    col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+    q1_count, df_top10 = quadrant1_top10(df_trend, ranks)
+    if q1_count > 0:
+        jobs[key_prefix + ("sector_pie",)] = partial(build_sector_pie, df_top10)
+        jobs[key_prefix + ("flow_bar",)] = partial(build_flow_bar, df_top10)
+    return jobs
 
-    with col_m1:
-        st.metric("📊 Tổng Số CP Phần Tư 1", f"{len(df_q1)}", 
-                 help="Cổ phiếu có Dòng Tiền > 1.0 và động lượng dương")
 
-    with col_m2:
-        top_flow = df_top10['Sức_Mạnh_Dòng_Tiền'].iloc[0]
-        top_code = df_top10['Mã'].iloc[0]
-        st.metric("🥇 Dòng Tiền Cao Nhất", f"{top_flow:.2f}", 
-                 delta=f"{top_code}", delta_color="off")
+def render(market_config=MARKET_CONFIG):
+    """Vẽ dashboard Việt Nam (st.set_page_config do nơi gọi thiết lập)"""
+    st.title("💰 DASHBOARD DÒNG TIỀN VIỆT NAM - SMART MONEY FLOW")
+    st.markdown("### Phân Tích Ngành Chuyên Nghiệp | Chỉ Báo Kỹ Thuật | Bao Phủ Toàn Diện")
 
-    with col_m3:
-        avg_flow = df_top10['Sức_Mạnh_Dòng_Tiền'].mean()
-        st.metric("💪 TB Dòng Tiền (Top 10)", f"{avg_flow:.2f}",
-                 help="Lực mua trung bình của top 10")
+    target_file = market_config["data_file"]
 
-    with col_m4:
-        avg_perf = df_top10['%_Tăng_1_Tháng'].mean()
-        st.metric("📈 TB Hiệu Suất (1T)", f"{avg_perf:.2f}%",
-                 delta=f"{avg_perf:.2f}%", delta_color="normal")
+    if not os.path.exists(target_file):
+        st.error(f"❌ Không tìm thấy file dữ liệu: {target_file}")
+        st.info("⚠️ Vui lòng chạy **stock_vn.py** trước để tạo file dữ liệu.")
+        st.stop()
 
-    # === BẢNG CHÍNH ===
-    st.subheader("📋 Top 10 Cổ Phiếu Theo Sức Mạnh Dòng Tiền")
+    try:
+        # Cache key includes the file version: new data is picked up without a restart
+        version = data_version(target_file)
+        df_daily, df_trend, df_sector, df_favorite = load_data(target_file, version)
+        daily_ranks, trend_ranks = load_rankings(target_file, version)
+    except Exception as e:
+        st.error(f"❌ Lỗi đọc dữ liệu thị trường: {str(e)}")
+        st.stop()
+
+    # Figures are cached per (data version, market, ...); a new version pre-warms in the background
+    fig_key = (version, market_config["market"])
+    FIGURES.warm(fig_key, lambda: figure_jobs(df_trend, df_favorite, fig_key, trend_ranks))
+
+    # ============================================================================
+    # 3. DEBUG INFO & DOWNLOAD
+    # ============================================================================
+    with st.expander("🔍 DEBUG: Kiểm Tra Dữ Liệu", expanded=False):
+        st.write(f"✅ Sheet 1 (Tín Hiệu Hôm Nay): {len(df_daily)} cổ phiếu, {len(df_daily.columns)} cột")
+        st.write(f"✅ Sheet 2 (Xu Hướng 21 Ngày): {len(df_trend)} cổ phiếu, {len(df_trend.columns)} cột")
+        st.write(f"✅ Sheet 3 (Dòng Ngành): {len(df_sector)} ngành, {len(df_sector.columns)} cột")
+        if not df_favorite.empty:
+            st.write(f"✅ Sheet 4 (Danh Mục Yêu Thích): {len(df_favorite)} cổ phiếu, {len(df_favorite.columns)} cột")
+
+        st.write("\n📋 **Sheet 1 Columns:**", list(df_daily.columns))
+        st.write("📋 **Sheet 2 Columns:**", list(df_trend.columns))
+        st.write("📋 **Sheet 3 Columns:**", list(df_sector.columns))
+        if not df_favorite.empty:
+            st.write("📋 **Sheet 4 Columns:**", list(df_favorite.columns))
+
+        st.caption(f"🏷️ Data version: {version}")
+        if st.button("🔄 Tải lại dữ liệu", help="Xóa cache và đọc lại file dữ liệu"):
+            load_data.clear()
+            load_screener.clear()
+            load_rankings.clear()
+            load_breadth.clear()
+            load_history.clear()
+            load_rotation.clear()
+            FIGURES.clear()
+            st.rerun()
+
+    with st.expander("📥 TRÍCH XUẤT DỮ LIỆU", expanded=False):
+        col_dl1, col_dl2 = st.columns([1, 4])
+        with col_dl1:
+            with open(target_file, "rb") as f:
+                st.download_button(
+                    label="📥 Tải Excel về máy",
+                    data=f,
+                    file_name="Vietnam_Market_Analysis.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+        with col_dl2:
+            st.info("📊 File Excel bao gồm 4 Sheet: Tín hiệu hôm nay, Xu hướng 21 ngày, Dòng tiền ngành và Danh mục yêu thích (với 6 chỉ báo kỹ thuật).")
+
+    # ============================================================================
+    # 3b. ĐỘ RỘNG THỊ TRƯỜNG (tính sẵn khi thu thập, không quét lại từng mã)
+    # ============================================================================
+    df_breadth = load_breadth(target_file, version)
+    market = market_row(df_breadth, by='Ngành')
+    if market is not None:
+        st.divider()
+        st.header(f"🌐 ĐỘ RỘNG THỊ TRƯỜNG ({int(market['Số Mã'])} Mã)")
+        col_b1, col_b2, col_b3, col_b4, col_b5 = st.columns(5)
+        with col_b1:
+            ad_ratio = f"A/D {market['Tỷ Lệ Tăng/Giảm']:.2f}" if pd.notna(market['Tỷ Lệ Tăng/Giảm']) else "không có mã giảm"
+            st.metric("📈 Mã Tăng / Mã Giảm", f"{int(market['Số Mã Tăng'])} / {int(market['Số Mã Giảm'])}",
+                      delta=ad_ratio, delta_color="off")
+        with col_b2:
+            st.metric("🏔️ Đỉnh / Đáy 20 Phiên", f"{int(market['Số Đỉnh Mới'])} / {int(market['Số Đáy Mới'])}")
+        with col_b3:
+            st.metric("📏 Trên SMA20", f"{market['% Trên SMA20']:.0f}%",
+                      help="Tỷ lệ mã đóng cửa trên đường trung bình 20 phiên")
+        with col_b4:
+            st.metric("🔊 Đột Biến Khối Lượng", f"{int(market['Số Mã Đột Biến KL'])}", help="Khối lượng ≥ 150% trung bình 20 phiên")
+        with col_b5:
+            st.metric("🔥 Phần Tư 1", f"{int(market['Số Mã Phần Tư 1'])}",
+                      help="Dòng Tiền > 1.0 và động lượng 1 tháng dương")
+        st.caption(f"💧 Phân phối dòng tiền: P10 {market['Dòng Tiền P10']:.2f} | P25 {market['Dòng Tiền P25']:.2f} | "
+                   f"Trung vị {market['Dòng Tiền Trung Vị']:.2f} | P75 {market['Dòng Tiền P75']:.2f} | P90 {market['Dòng Tiền P90']:.2f}")
+
+        with st.expander("🏭 Độ Rộng Theo Ngành", expanded=False):
+            breadth_columns = schema.labels(['Sector', 'Stock_Count', 'Advancers', 'Decliners', 'AD_Ratio', 'New_Highs',
+                                             'New_Lows', 'Pct_Above_SMA20', 'Volume_Surges', 'Quadrant_1', 'Avg_Pct_Day',
+                                             'Avg_Pct_1M', 'MF_Median'], "vi")
+            st.dataframe(df_breadth.iloc[1:][breadth_columns].round(2), hide_index=True, use_container_width=True, height=400)
+
+    # ============================================================================
+    # 4. DANH MỤC YÊU THÍCH - VISUALIZATION TOÀN DIỆN
+    # ============================================================================
+    if not df_favorite.empty:
+        st.divider()
+        st.header("⭐ DANH MỤC CỔ PHIẾU YÊU THÍCH")
+
+        col_fav1, col_fav2 = st.columns([1, 1])
+
+        # --- BIỂU ĐỒ TRÒN: Hiệu Suất Ngày ---
+        with col_fav1:
+            st.subheader("📊 Phân Bố Tăng/Giảm (Hôm Nay)")
+            fig_pie_daily = FIGURES.get(fig_key + ("daily_pie",), lambda: build_daily_pie(df_favorite))
+            st.plotly_chart(fig_pie_daily, use_container_width=True)
+
+        # --- BIỂU ĐỒ TRÒN: Xu Hướng Tháng ---
+        with col_fav2:
+            st.subheader("📈 Xu Hướng 1 Tháng")
+            fig_pie_trend = FIGURES.get(fig_key + ("trend_pie",), lambda: build_trend_pie(df_favorite))
+            st.plotly_chart(fig_pie_trend, use_container_width=True)
+
+        # --- BẢNG CHI TIẾT VỚI CHỈ BÁO KỸ THUẬT ---
+        st.subheader("📋 Chi Tiết Danh Mục Với Chỉ Báo Kỹ Thuật")
+        df_display = df_favorite.copy()
+
+        display_cols = ['Biểu_Tượng', 'Mã', 'Ngành', 'Giá', '%_Ngày', '%_Tăng_1_Tháng',
+                        'RSI', 'MACD', 'BB_Position', 'Stochastic', 'ATR%', 'Vol_Trend',
+                        'Sức_Mạnh_Dòng_Tiền', 'QUICK_ACTION']
+        available_cols = [col for col in display_cols if col in df_display.columns]
+
+        st.dataframe(
+            df_display[available_cols].sort_values('%_Ngày', ascending=False),
+            hide_index=True,
+            use_container_width=True,
+            height=350
+        )
 
-    display_columns = ['Mã', 'Ngành', 'Sàn', 'Giá', '%_Tăng_1_Tháng', 
-                      'Sức_Mạnh_Dòng_Tiền', 'Trạng_Thái_Dòng_Tiền', 'Trạng_Thái_Động_Lượng', 
-                      'Thanh_Khoan_Hien_Thi']
+        # --- THỐNG KÊ TỔNG HỢP ---
+        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
 
-    available_display_cols = [col for col in display_columns if col in df_top10.columns]
+        with col_stat1:
+            avg_daily = df_favorite['%_Ngày'].mean()
+            st.metric("📊 Trung Bình Ngày", f"{avg_daily:.2f}%",
+                     delta=f"{avg_daily:.2f}%", delta_color="normal")
 
-    df_top10_display = df_top10[available_display_cols].copy()
-    df_top10_display = df_top10_display.rename(columns={
-        'Thanh_Khoan_Hien_Thi': f'Thanh Khoản ({unit_label})',
-        '%_Tăng_1_Tháng': 'Tăng 1T (%)'
-    })
+        with col_stat2:
+            avg_monthly = df_favorite['%_Tăng_1_Tháng'].mean()
+            st.metric("📈 Trung Bình Tháng", f"{avg_monthly:.2f}%",
+                     delta=f"{avg_monthly:.2f}%", delta_color="normal")
 
-    st.dataframe(
-        df_top10_display.reset_index(drop=True),
-        hide_index=True,
-        use_container_width=True,
-        height=400
-    )
+        with col_stat3:
+            positive_count = len(df_favorite[df_favorite['%_Ngày'] > 0])
+            st.metric("✅ Tăng Giá Hôm Nay", f"{positive_count}/{len(df_favorite)}",
+                     delta=f"{positive_count/len(df_favorite)*100:.0f}%")
+
+        with col_stat4:
+            strong_stocks = len(df_favorite[df_favorite['%_Tăng_1_Tháng'] > 10])
+            st.metric("🔥 Tăng Mạnh 1 Tháng", f"{strong_stocks}/{len(df_favorite)}",
+                     delta=f"{strong_stocks/len(df_favorite)*100:.0f}%")
 
-    # === BIỂU ĐỒ TRỰC QUAN ===
-    col_v1, col_v2 = st.columns([1, 1])
-
-    with col_v1:
-        st.subheader("🏭 Phân Bố Ngành (Tổng Quan Kinh Tế)")
-        sector_counts = df_top10['Ngành'].value_counts()
-
-        fig_pie_sector = go.Figure(data=[go.Pie(
-            labels=sector_counts.index,
-            values=sector_counts.values,
-            hole=0.4,
-            textinfo='label+value',
-            textposition='outside',
-            hovertemplate='%{label}<br>Số lượng: %{value}<br>Tỷ lệ: %{percent}'
-        )])
-
-        fig_pie_sector.update_layout(
-            title="Top 10 Cổ Phiếu Theo Ngành",
-            height=400,
-            showlegend=True,
-            legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.1)
+    # ============================================================================
+    # 5. CÀI ĐẶT ĐƠN VỊ TIỀN TỆ
+    # ============================================================================
+    st.divider()
+    col_opt, _ = st.columns([2, 3])
+    with col_opt:
+        currency_mode = st.radio(
+            "💱 Chế Độ Hiển Thị Thanh Khoản:",
+            CURRENCY_MODES,
+            horizontal=True
         )
-        st.plotly_chart(fig_pie_sector, use_container_width=True)
 
-        st.info("💡 **Sự đa dạng ngành cho thấy độ rộng kinh tế.** Tập trung = Rally theo ngành cụ thể.")
+    unit_label = unit_label_for(currency_mode)
 
-    with col_v2:
-        st.subheader("⚖️ Dòng Tiền vs Hiệu Suất")
+    # ============================================================================
+    # 6. BẢN ĐỒ PHÂN CẤP - NGÀNH → CỔ PHIẾU
+    # ============================================================================
+    st.subheader(f"1. BẢN ĐỒ DÒNG TIỀN CHI TIẾT (Ngành → Cổ Phiếu)")
 
-        # PHIÊN BẢN TỐI ƯU: Trục X rộng rãi và dễ đọc hơn
-        try:
-            fig_bar = make_subplots(specs=[[{"secondary_y": True}]])
-
-            fig_bar.add_trace(
-                go.Bar(
-                    name='Sức Mạnh Dòng Tiền',
-                    x=df_top10['Mã'],
-                    y=df_top10['Sức_Mạnh_Dòng_Tiền'],
-                    marker_color='#2E86AB',
-                    offsetgroup=0
-                ),
-                secondary_y=False
+    try:
+        fig_hier = FIGURES.get(fig_key + ("treemap", currency_mode), lambda: build_treemap(df_trend, currency_mode))
+        st.plotly_chart(fig_hier, use_container_width=True)
+        st.info("💡 **Cách sử dụng:** Click vào ô ngành (**chữ đậm**) để xem chi tiết các cổ phiếu. Click 'All' ở trên để quay lại tổng quan.")
+
+    except Exception as e:
+        st.error(f"❌ Lỗi tạo biểu đồ phân cấp: {str(e)}")
+        st.write("Chuyển sang treemap cơ bản...")
+
+        # FALLBACK: Treemap ngành đơn giản
+        if 'Tổng GTGD (Tỷ)' in df_sector.columns:
+            df_sector_plot = df_sector.copy()
+            df_sector_plot['Thanh_Khoan_Hien_Thi'] = to_display_currency(df_sector_plot['Tổng GTGD (Tỷ)'], currency_mode)
+            df_sector_plot['Value_Display'] = pd.to_numeric(df_sector_plot['Thanh_Khoan_Hien_Thi'], errors='coerce').fillna(1)
+            df_sector_plot['Color_Value'] = pd.to_numeric(df_sector_plot['TB % Tăng (1M)'], errors='coerce').fillna(0)
+
+            fig_map = px.treemap(
+                df_sector_plot,
+                path=['Ngành'],
+                values='Value_Display',
+                color='Color_Value',
+                color_continuous_scale='RdYlGn',
+                color_continuous_midpoint=0,
+                labels={'Value_Display': f'Thanh khoản ({unit_label})', 'Color_Value': '% Tăng (1T)'}
             )
 
-            fig_bar.add_trace(
-                go.Bar(
-                    name='Tăng 1T (%)',
-                    x=df_top10['Mã'],
-                    y=df_top10['%_Tăng_1_Tháng'],
-                    marker_color='#06D6A0',
-                    offsetgroup=1
-                ),
-                secondary_y=True
-            )
+            fig_map.update_layout(height=700, title=f"Tổng Quan Ngành (Kích thước = Thanh khoản, Màu = Hiệu suất)")
+            st.plotly_chart(fig_map, use_container_width=True)
 
-            # TRỤC X CẢI TIẾN: Nhiều không gian và dễ đọc hơn
-            fig_bar.update_xaxes(
-                title_text="Mã Cổ Phiếu",
-                tickangle=-65,
-                tickfont=dict(size=10),
-                automargin=True
-            )
+    # ============================================================================
+    # 7. PHÂN TÍCH CHI TIẾT NGÀNH & TOP VOLUME
+    # ============================================================================
+    col1, col2 = st.columns([3, 2])
 
-            fig_bar.update_yaxes(title_text="Sức Mạnh Dòng Tiền", secondary_y=False)
-            fig_bar.update_yaxes(title_text="Tăng 1T (%)", secondary_y=True)
+    with col1:
+        st.subheader("2. SOI CHI TIẾT THEO NGÀNH (MÔ HÌNH 4 PHẦN TƯ)")
 
-            fig_bar.update_layout(
-                title_text="So Sánh Sức Mạnh vs Hiệu Suất",
-                barmode='group',
-                height=500,
-                margin=dict(b=120),
-                legend=dict(orientation="h", yanchor="top", y=-0.25, xanchor="center", x=0.5)
-            )
+        selected_sector = st.selectbox("🔍 Chọn ngành để phân tích:",
+                                       sorted(df_trend['Ngành'].unique()))
 
-            st.plotly_chart(fig_bar, use_container_width=True)
-
-        except Exception as e:
-            # FALLBACK: Biểu đồ cột nhóm đơn giản với trục đơn
-            st.warning(f"⚠️ Sử dụng biểu đồ đơn giản (trục kép không khả dụng): {e}")
-
-            # Chuẩn hóa giá trị về thang 0-100 để so sánh
-            df_plot = df_top10.copy()
-            df_plot['MF_Chuẩn_Hóa'] = (df_plot['Sức_Mạnh_Dòng_Tiền'] - df_plot['Sức_Mạnh_Dòng_Tiền'].min()) / (df_plot['Sức_Mạnh_Dòng_Tiền'].max() - df_plot['Sức_Mạnh_Dòng_Tiền'].min()) * 100
-            df_plot['Perf_Chuẩn_Hóa'] = (df_plot['%_Tăng_1_Tháng'] - df_plot['%_Tăng_1_Tháng'].min()) / (df_plot['%_Tăng_1_Tháng'].max() - df_plot['%_Tăng_1_Tháng'].min()) * 100
-
-            fig_simple = go.Figure()
-
-            fig_simple.add_trace(go.Bar(
-                name='Dòng Tiền (Chuẩn hóa)',
-                x=df_plot['Mã'],
-                y=df_plot['MF_Chuẩn_Hóa'],
-                marker_color='#2E86AB'
-            ))
-
-            fig_simple.add_trace(go.Bar(
-                name='Tăng 1T (Chuẩn hóa)',
-                x=df_plot['Mã'],
-                y=df_plot['Perf_Chuẩn_Hóa'],
-                marker_color='#06D6A0'
-            ))
-
-            fig_simple.update_layout(
-                title="So Sánh Chuẩn Hóa (thang 0-100)",
-                xaxis=dict(title='Mã Cổ Phiếu', tickangle=-65, tickfont=dict(size=10), automargin=True),
-                yaxis=dict(title='Giá Trị Chuẩn Hóa (0-100)'),
-                barmode='group',
-                height=500,
-                margin=dict(b=120)
-            )
+        df_sub = sector_frame(df_trend, selected_sector, currency_mode)
+
+        if not df_sub.empty:
+            try:
+                fig_scatter = FIGURES.get(fig_key + ("scatter", currency_mode, selected_sector),
+                                          lambda: build_sector_scatter(df_sub))
+                st.plotly_chart(fig_scatter, use_container_width=True)
+
+                # --- TOP 5 DÒNG TIỀN YẾU ---
+                try:
+                    df_outflow = trend_ranks.top('Sức_Mạnh_Dòng_Tiền', 5, ascending=True, group=selected_sector).copy()
+                    df_outflow['Thanh_Khoan_Hien_Thi'] = to_display_currency(df_outflow['GTGD_TB_Tỷ'], currency_mode)
+                    outflow_cols = [c for c in ['Mã', 'Giá', 'Sức_Mạnh_Dòng_Tiền', '%_Tăng_1_Tháng', 'Thanh_Khoan_Hien_Thi'] if c in df_outflow.columns]
+                    st.markdown("**Top 5 Dòng Tiền Yếu Nhất (Lực bán mạnh)**")
+                    st.dataframe(df_outflow[outflow_cols].reset_index(drop=True), use_container_width=True, height=220)
+                except Exception:
+                    pass
+
+            except Exception as e:
+                st.error(f"❌ Lỗi vẽ biểu đồ scatter: {e}")
+        else:
+            st.warning(f"⚠️ Không có dữ liệu cho ngành: {selected_sector}")
+
+    with col2:
+        st.subheader("3. TOP ĐỘT BIẾN KHỐI LƯỢNG")
+        df_vol = daily_ranks.top('%_Vol_vs_TB', 15)
+
+        st.dataframe(
+            df_vol[['Mã', 'Giá', '%_Vol_vs_TB', 'Tín_Hiệu_Ngày']],
+            hide_index=True,
+            use_container_width=True,
+            height=500
+        )
 
-            st.plotly_chart(fig_simple, use_container_width=True)
+    # ============================================================================
+    # 8. TOP 10 DÒNG TIỀN MẠNH NHẤT (PHẦN TƯ 1) - TỔNG QUAN THỊ TRƯỜNG
+    # ============================================================================
+    st.divider()
+    st.header("🔥 TOP 10 DÒNG TIỀN MẠNH NHẤT (PHẦN TƯ 1) - TỔNG QUAN THỊ TRƯỜNG")
+    st.markdown("**Phần Tư 1 = Lực Mua Mạnh + Động Lượng Dương** | Bức Tranh Kinh Tế Liên Ngành")
+
+    # Lọc Phần Tư 1: Sức_Mạnh_Dòng_Tiền > 1.0 VÀ %_Tăng_1_Tháng > 0
+    q1_count, df_top10 = quadrant1_top10(df_trend, trend_ranks)
+
+    if q1_count > 0:
+        df_top10['Thanh_Khoan_Hien_Thi'] = to_display_currency(df_top10['GTGD_TB_Tỷ'], currency_mode)
+
+        # === BẢNG CHỈ SỐ CHÍNH ===
+        col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+
+        with col_m1:
+            st.metric("📊 Tổng Số CP Phần Tư 1", f"{q1_count}", 
+                     help="Cổ phiếu có Dòng Tiền > 1.0 và động lượng dương")
+
+        with col_m2:
+            top_flow = df_top10['Sức_Mạnh_Dòng_Tiền'].iloc[0]
+            top_code = df_top10['Mã'].iloc[0]
+            st.metric("🥇 Dòng Tiền Cao Nhất", f"{top_flow:.2f}", 
+                     delta=f"{top_code}", delta_color="off")
+
+        with col_m3:
+            avg_flow = df_top10['Sức_Mạnh_Dòng_Tiền'].mean()
+            st.metric("💪 TB Dòng Tiền (Top 10)", f"{avg_flow:.2f}",
+                     help="Lực mua trung bình của top 10")
+
+        with col_m4:
+            avg_perf = df_top10['%_Tăng_1_Tháng'].mean()
+            st.metric("📈 TB Hiệu Suất (1T)", f"{avg_perf:.2f}%",
+                     delta=f"{avg_perf:.2f}%", delta_color="normal")
+
+        # === BẢNG CHÍNH ===
+        st.subheader("📋 Top 10 Cổ Phiếu Theo Sức Mạnh Dòng Tiền")
+
+        display_columns = ['Mã', 'Ngành', 'Sàn', 'Giá', '%_Tăng_1_Tháng', 
+                          'Sức_Mạnh_Dòng_Tiền', 'Trạng_Thái_Dòng_Tiền', 'Trạng_Thái_Động_Lượng', 
+                          'Thanh_Khoan_Hien_Thi']
+
+        available_display_cols = [col for col in display_columns if col in df_top10.columns]
+
+        df_top10_display = df_top10[available_display_cols].copy()
+        df_top10_display = df_top10_display.rename(columns={
+            'Thanh_Khoan_Hien_Thi': f'Thanh Khoản ({unit_label})',
+            '%_Tăng_1_Tháng': 'Tăng 1T (%)'
+        })
+
+        st.dataframe(
+            df_top10_display.reset_index(drop=True),
+            hide_index=True,
+            use_container_width=True,
+            height=400
+        )
 
-        st.info("💡 **So sánh lực mua vs động lượng giá.** Dòng tiền cao + tăng cao = Conviction mạnh.")
+        # === BIỂU ĐỒ TRỰC QUAN ===
+        col_v1, col_v2 = st.columns([1, 1])
 
-else:
-    st.warning("⚠️ Không tìm thấy cổ phiếu nào ở Phần Tư 1 (Dòng Tiền > 1.0 và Động Lượng Dương)")
-    st.info("💡 Điều này cho thấy điều kiện thị trường yếu. Xem xét chiến lược phòng thủ hoặc chờ setup tốt hơn.")
+        with col_v1:
+            st.subheader("🏭 Phân Bố Ngành (Tổng Quan Kinh Tế)")
+            fig_pie_sector = FIGURES.get(fig_key + ("sector_pie",), lambda: build_sector_pie(df_top10))
+            st.plotly_chart(fig_pie_sector, use_container_width=True)
 
-# ============================================================================
-# 9. FOOTER
-# ============================================================================
-st.divider()
-st.caption("📊 **Phân Tích Toàn Diện Thị Trường Việt Nam** | 3 Sàn HOSE-HNX-UPCOM | Đa Ngành | 6 Chỉ Báo Kỹ Thuật")
-st.caption("🔄 Dữ liệu cập nhật hàng ngày qua vnstock | Powered by Streamlit + Python")
-st.caption("✨ Nâng cấp với phân tích Phần Tư 1 cho insight kinh tế toàn thị trường | Tối ưu độ rõ biểu đồ")
+            st.info("💡 **Sự đa dạng ngành cho thấy độ rộng kinh tế.** Tập trung = Rally theo ngành cụ thể.")
+
+        with col_v2:
+            st.subheader("⚖️ Dòng Tiền vs Hiệu Suất")
+
+            try:
+                fig_bar = FIGURES.get(fig_key + ("flow_bar",), lambda: build_flow_bar(df_top10))
+                st.plotly_chart(fig_bar, use_container_width=True)
+
+            except Exception as e:
+                # FALLBACK: Biểu đồ cột nhóm đơn giản với trục đơn
+                st.warning(f"⚠️ Sử dụng biểu đồ đơn giản (trục kép không khả dụng): {e}")
+
+                # Chuẩn hóa giá trị về thang 0-100 để so sánh
+                df_plot = df_top10.copy()
+                df_plot['MF_Chuẩn_Hóa'] = (df_plot['Sức_Mạnh_Dòng_Tiền'] - df_plot['Sức_Mạnh_Dòng_Tiền'].min()) / (df_plot['Sức_Mạnh_Dòng_Tiền'].max() - df_plot['Sức_Mạnh_Dòng_Tiền'].min()) * 100
+                df_plot['Perf_Chuẩn_Hóa'] = (df_plot['%_Tăng_1_Tháng'] - df_plot['%_Tăng_1_Tháng'].min()) / (df_plot['%_Tăng_1_Tháng'].max() - df_plot['%_Tăng_1_Tháng'].min()) * 100
+
+                fig_simple = go.Figure()
+
+                fig_simple.add_trace(go.Bar(
+                    name='Dòng Tiền (Chuẩn hóa)',
+                    x=df_plot['Mã'],
+                    y=df_plot['MF_Chuẩn_Hóa'],
+                    marker_color='#2E86AB'
+                ))
+
+                fig_simple.add_trace(go.Bar(
+                    name='Tăng 1T (Chuẩn hóa)',
+                    x=df_plot['Mã'],
+                    y=df_plot['Perf_Chuẩn_Hóa'],
+                    marker_color='#06D6A0'
+                ))
+
+                fig_simple.update_layout(
+                    title="So Sánh Chuẩn Hóa (thang 0-100)",
+                    xaxis=dict(title='Mã Cổ Phiếu', tickangle=-65, tickfont=dict(size=10), automargin=True),
+                    yaxis=dict(title='Giá Trị Chuẩn Hóa (0-100)'),
+                    barmode='group',
+                    height=500,
+                    margin=dict(b=120)
+                )
+
+                st.plotly_chart(fig_simple, use_container_width=True)
+
+            st.info("💡 **So sánh lực mua vs động lượng giá.** Dòng tiền cao + tăng cao = Conviction mạnh.")
+
+    else:
+        st.warning("⚠️ Không tìm thấy cổ phiếu nào ở Phần Tư 1 (Dòng Tiền > 1.0 và Động Lượng Dương)")
+        st.info("💡 Điều này cho thấy điều kiện thị trường yếu. Xem xét chiến lược phòng thủ hoặc chờ setup tốt hơn.")
+
+    # ============================================================================
+    # 8b. LỊCH SỬ DÒNG TIỀN (SNAPSHOT HÀNG NGÀY)
+    # ============================================================================
+    snapshot_dates = SnapshotStore(market_config["market"]).dates
+    if len(snapshot_dates) > 1:
+        st.divider()
+        st.header("📅 LỊCH SỬ DÒNG TIỀN (SNAPSHOT HÀNG NGÀY)")
+        st.markdown(f"**Đã lưu {len(snapshot_dates)} phiên** | {snapshot_dates[0]:%Y-%m-%d} → {snapshot_dates[-1]:%Y-%m-%d}")
+
+        # A slider needs min < max: with only 2 stored days both are shown
+        history_days = len(snapshot_dates)
+        if len(snapshot_dates) > 2:
+            history_days = st.slider("📆 Số phiên hiển thị:", min_value=2, max_value=len(snapshot_dates),
+                                     value=min(21, len(snapshot_dates)))
+        default_codes = list((df_top10 if q1_count > 0 else df_daily)['Mã'].astype(str).head(5))
+        selected_codes = st.multiselect("🔍 Chọn mã để so sánh:", sorted(df_daily['Mã'].astype(str)), default=default_codes)
+
+        # Cache key: phiên cuối + số phiên, snapshot mới được nhận ở lần rerun kế tiếp
+        snapshot_version = f"{snapshot_dates[-1]:%Y-%m-%d}:{len(snapshot_dates)}"
+        df_groups, df_codes, df_signals = load_history(market_config["market"], snapshot_version,
+                                                       history_days, tuple(selected_codes))
+
+        col_h1, col_h2 = st.columns(2)
+        with col_h1:
+            st.subheader("🏭 Sức Mạnh Dòng Tiền TB Theo Ngành")
+            if not df_groups.empty:
+                fig_groups = px.line(df_groups, markers=True, labels={'value': 'Sức Mạnh Dòng Tiền', 'variable': 'Ngành'})
+                fig_groups.add_hline(y=1.0, line_dash="dash", line_color="gray")
+                fig_groups.update_layout(height=450, hovermode='x unified')
+                st.plotly_chart(fig_groups, use_container_width=True)
+
+        with col_h2:
+            st.subheader("📈 Dòng Tiền Các Mã Đã Chọn")
+            if not df_codes.empty:
+                fig_codes = px.line(df_codes, markers=True, labels={'value': 'Sức Mạnh Dòng Tiền', 'variable': 'Mã'})
+                fig_codes.add_hline(y=1.0, line_dash="dash", line_color="gray")
+                fig_codes.update_layout(height=450, hovermode='x unified')
+                st.plotly_chart(fig_codes, use_container_width=True)
+            else:
+                st.info("💡 Chọn mã để xem lịch sử dòng tiền.")
+
+        if not df_signals.empty:
+            st.markdown("**Lịch sử tín hiệu ngày (mới nhất trước)**")
+            df_signals.index = df_signals.index.strftime('%Y-%m-%d')
+            st.dataframe(df_signals.sort_index(ascending=False), use_container_width=True, height=300)
+
+        # --- LUÂN CHUYỂN NGÀNH: xếp hạng ngành hôm nay so với N phiên trước ---
+        st.subheader("🔄 Luân Chuyển Ngành (Hạng theo TB % Tăng 1M)")
+        lookback = 1
+        if len(snapshot_dates) > 2:
+            lookback = st.slider("↔️ So sánh với N phiên trước:", min_value=1, max_value=min(20, len(snapshot_dates) - 1),
+                                 value=min(5, len(snapshot_dates) - 1))
+        df_rotation, df_ranks = load_rotation(market_config["market"], snapshot_version, lookback, history_days)
+
+        if not df_rotation.empty:
+            col_r1, col_r2 = st.columns([3, 2])
+            with col_r1:
+                rotation_columns = ['Rank', 'Sector', 'Rank_Change', 'Avg_Pct_1M', 'Momentum_Accel', 'Relative_Strength',
+                                    'Avg_Money_Flow', 'Flow_Trend', 'Breadth', 'Stock_Count']
+                df_rotation_display = df_rotation[rotation_columns].round(2)
+                df_rotation_display.columns = schema.labels(rotation_columns, "vi")
+                st.dataframe(df_rotation_display, hide_index=True, use_container_width=True, height=450)
+            with col_r2:
+                # Đường đi của hạng các ngành dẫn đầu hôm nay (hạng 1 ở trên cùng)
+                leaders = [sector for sector in df_rotation['Sector'].head(8) if sector in df_ranks.columns]
+                fig_ranks = px.line(df_ranks[leaders], markers=True, labels={'value': 'Hạng', 'variable': 'Ngành'})
+                fig_ranks.update_yaxes(autorange="reversed")
+                fig_ranks.update_layout(height=450, hovermode='x unified', title="Lịch sử hạng của top 8 ngành hôm nay")
+                st.plotly_chart(fig_ranks, use_container_width=True)
+            st.info("💡 **Thay đổi hạng > 0 = ngành đang đi lên.** Gia tốc dương + sức mạnh tương đối dương = dòng tiền luân chuyển vào.")
+
+    # ============================================================================
+    # 8c. BỘ LỌC CỔ PHIẾU (TRUY VẤN CÓ CHỈ MỤC TRÊN MỌI CHỈ BÁO)
+    # ============================================================================
+    screener = load_screener(target_file, version)
+    if len(screener):
+        st.divider()
+        st.header("🔎 BỘ LỌC CỔ PHIẾU")
+        st.markdown("Kết hợp điều kiện trên mọi chỉ báo bằng **and**, ví dụ "
+                    "`RSI < 35 and Sức_Mạnh_Dòng_Tiền > 1.0 and Ngành in Ngân hàng, Chứng khoán`. "
+                    "Toán tử: `> >= < <= ==` cho số (hoặc cột khác), `== != in` cho nhãn.")
+
+        col_s1, col_s2 = st.columns([1, 3])
+        with col_s1:
+            preset = st.selectbox("📋 Bộ lọc mẫu:", list(SCREENER_PRESETS))
+        with col_s2:
+            # Mỗi bộ lọc mẫu một ô nhập: chọn mẫu là bắt đầu từ điều kiện của mẫu đó
+            query = st.text_input("✍️ Điều kiện:", value=SCREENER_PRESETS[preset], key=f"screener_query_{preset}")
+
+        numeric_columns = screener.numeric_columns()
+        col_s3, col_s4, col_s5 = st.columns(3)
+        with col_s3:
+            sort_column = st.selectbox("↕️ Xếp hạng theo:", numeric_columns, format_func=lambda c: schema.label(c, "vi"),
+                                       index=numeric_columns.index('Money_Flow_Strength') if 'Money_Flow_Strength' in numeric_columns else 0)
+        with col_s4:
+            ascending = st.checkbox("Thấp nhất trước", value=False)
+        with col_s5:
+            limit = st.slider("📏 Số dòng tối đa:", min_value=10, max_value=200, value=50, step=10)
+
+        try:
+            df_screen, info = screener.screen(query, sort=sort_column, ascending=ascending, limit=limit)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+        else:
+            st.caption(f"**{info['matches']}** / {len(screener)} cổ phiếu thỏa điều kiện | {info['ms']:.1f} ms"
+                       f"{' (cache)' if info['cached'] else ''}")
+            shown = [c for c in SCREENER_COLUMNS if c in df_screen.columns]
+            df_screen = df_screen[shown].round(2)
+            df_screen.columns = schema.labels(shown, "vi")
+            st.dataframe(df_screen, hide_index=True, use_container_width=True, height=420)
+        with st.expander("📖 Các cột có thể lọc", expanded=False):
+            st.write("**Số:**", ", ".join(schema.labels(numeric_columns, "vi")))
+            st.write("**Nhãn:**", ", ".join(schema.labels(screener.label_columns(), "vi")))
+
+    # ============================================================================
+    # 9. FOOTER
+    # ============================================================================
+    st.divider()
+    st.caption("📊 **Phân Tích Toàn Diện Thị Trường Việt Nam** | 3 Sàn HOSE-HNX-UPCOM | Đa Ngành | 6 Chỉ Báo Kỹ Thuật")
+    st.caption("🔄 Dữ liệu cập nhật hàng ngày qua vnstock | Powered by Streamlit + Python")
+    st.caption("✨ Nâng cấp với phân tích Phần Tư 1 cho insight kinh tế toàn thị trường | Tối ưu độ rõ biểu đồ")
+
+
+if __name__ == "__main__":
+    st.set_page_config(layout="wide", page_title=MARKET_CONFIG["page_title"], page_icon=MARKET_CONFIG["page_icon"])
+    render()
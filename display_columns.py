@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+# --- DASHBOARD DISPLAY COLUMNS (FX CONVERSION + STATUS BUCKETS) ---
+# Both dashboards convert liquidity with one multiply per column and derive the
+# status labels with np.select over whole columns, instead of per-row .apply.
+# Buckets are added once in load_data, i.e. once per data version.
+
+# Liquidity display modes per market: mode → (unit label, multiplier on the base unit)
+FX_TABLE = {
+    "TW": {
+        "Original (Billion TWD)": ("Billion TWD", 1.0),
+        "Million USD ($)": ("Million USD", 1000 * 0.031),
+        "Thousand Billion VND (₫)": ("Thousand Billion VND", 770 / 1000),
+    },
+    "VN": {
+        "Gốc (Tỷ VND)": ("Tỷ VND", 1.0),
+        "Triệu USD ($)": ("Triệu USD", 1000 / 25.0),  # 1 USD ≈ 25,000 VND
+        "Tỷ TWD (台幣)": ("Tỷ TWD", 1000 / 770),  # 1 TWD ≈ 770 VND
+    },
+}
+
+
+def currency_modes(market):
+    """💱 Liquidity display modes offered for a market (first one = base unit)"""
+    return tuple(FX_TABLE[market])
+
+
+def currency_unit(market, mode):
+    return FX_TABLE[market][mode][0]
+
+
+def convert(values, market, mode):
+    """💱 Convert base-unit liquidity (scalar or Series) to the display mode"""
+    return values * FX_TABLE[market][mode][1]
+
+
+def classify(values, thresholds, labels):
+    """🏷️ Bucket values by descending thresholds: labels[i] where value > thresholds[i], else labels[-1]
+
+    Same as the nested `'A' if x > t0 else ('B' if x > t1 else ...)` lambdas,
+    including NaN falling through to the last label.
+    """
+    values = pd.Series(values)
+    conditions = [values > t for t in thresholds]
+    return pd.Series(np.select(conditions, labels[:-1], default=labels[-1]), index=values.index)
+
+
+def add_buckets(df, buckets):
+    """🏷️ Add {new column: (source column, thresholds, labels)} bucket columns to a sheet (in place)"""
+    if df is None or df.empty:
+        return df
+    for column, (source, thresholds, labels) in buckets.items():
+        if source in df.columns:
+            df[column] = classify(df[source], thresholds, labels)
+    return df
@@ -0,0 +1,149 @@
+import pandas as pd
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from history_store import bars_to_wide
+
+logger = logging.getLogger(__name__)
+
+# --- DOWNLOADER: CHUNKED, CONCURRENT, RETRYING ---
+# Providers return yfinance-style wide frames (ticker × field columns). A failed
+# chunk or a ticker that comes back empty is retried with exponential backoff;
+# whatever still fails is reported instead of aborting the whole run.
+
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 2.0  # seconds, doubled on every retry round
+
+
+class DataProvider:
+    """🔌 Source of daily OHLCV bars"""
+    name = "base"
+
+    def fetch(self, tickers, start, end):
+        """Return a wide (ticker × field) frame for tickers between start and end"""
+        raise NotImplementedError
+
+
+class YFinanceProvider(DataProvider):
+    """🌐 Yahoo Finance via yfinance (one bulk call per chunk)"""
+    name = "yfinance"
+
+    def fetch(self, tickers, start, end):
+        import yfinance as yf
+        # threads=False: parallelism is handled by the chunk pool
+        return yf.download(tickers, start=start, end=end, progress=False, group_by='ticker', auto_adjust=True, threads=False)
+
+
+class FixtureProvider(DataProvider):
+    """📁 Local CSV/Parquet fixture in long format (Date, Ticker, Open, High, Low, Close, Volume)"""
+    name = "fixture"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._bars = None
+
+    @property
+    def bars(self):
+        if self._bars is None:
+            files = (sorted(self.path.glob("*.parquet")) + sorted(self.path.glob("*.csv"))) if self.path.is_dir() else [self.path]
+            frames = [pd.read_parquet(f) if f.suffix == ".parquet" else pd.read_csv(f, parse_dates=['Date']) for f in files]
+            self._bars = pd.concat(frames, ignore_index=True)
+            self._bars['Date'] = pd.to_datetime(self._bars['Date'])
+            logger.info(f"📁 Fixture loaded: {len(self._bars)} bars from {self.path}")
+        return self._bars
+
+    def fetch(self, tickers, start, end):
+        bars = self.bars
+        mask = bars['Ticker'].isin(tickers) & (bars['Date'] >= pd.Timestamp(start).normalize())
+        if end is not None:
+            mask &= bars['Date'] < pd.Timestamp(end)
+        return bars_to_wide(bars[mask])
+
+
+def get_provider(source=None):
+    """🔌 'yfinance' (default) or a path to a local fixture file/directory"""
+    if not source or source == YFinanceProvider.name:
+        return YFinanceProvider()
+    return FixtureProvider(source)
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), max(1, size))]
+
+
+def _returned_tickers(frame):
+    """Tickers with at least one bar in a wide frame"""
+    if frame is None or frame.empty:
+        return set()
+    if not isinstance(frame.columns, pd.MultiIndex):
+        return None  # single-ticker flat frame, caller knows the ticker
+    has_bars = frame.notna().T.groupby(level=0).any().any(axis=1)
+    return set(has_bars.index[has_bars])
+
+
+def _fetch_chunk(provider, chunk, start, end):
+    try:
+        frame = provider.fetch(chunk, start, end)
+    except Exception as e:
+        logger.warning(f"⚠️ Chunk of {len(chunk)} failed ({provider.name}): {str(e)}")
+        return None, list(chunk)
+
+    returned = _returned_tickers(frame)
+    if returned is None:
+        frame = frame.copy()
+        frame.columns = pd.MultiIndex.from_product([chunk[:1], frame.columns])
+        returned = set(chunk[:1]) if not frame.dropna(how='all').empty else set()
+    failed = [t for t in chunk if t not in returned]
+    if returned:
+        frame = frame.loc[:, frame.columns.get_level_values(0).isin(returned)]
+    return (frame if returned else None), failed
+
+
+def fetch_ohlcv(provider, tickers, start, end, chunk_size=DEFAULT_CHUNK_SIZE,
+                max_workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, on_chunk=None,
+                executor=None):
+    """📥 Download tickers in chunks over a thread pool; returns (wide frame, failed tickers)
+
+    on_chunk(chunk, seconds) is called after every chunk request (from the worker threads).
+    executor: a shared ThreadPoolExecutor (e.g. one pool for several markets) instead of a private one.
+    """
+    pending = list(tickers)
+    frames = []
+
+    def fetch_chunk(chunk):
+        started = time.perf_counter()
+        outcome = _fetch_chunk(provider, chunk, start, end)
+        if on_chunk is not None:
+            on_chunk(chunk, time.perf_counter() - started)
+        return outcome
+
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            delay = backoff * 2 ** (attempt - 1)
+            logger.info(f"🔁 Retry {attempt}/{retries} for {len(pending)} tickers in {delay:.1f}s...")
+            time.sleep(delay)
+
+        chunks = chunked(pending, chunk_size)
+        if executor is not None:
+            outcomes = list(executor.map(fetch_chunk, chunks))
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+                outcomes = list(pool.map(fetch_chunk, chunks))
+
+        pending = []
+        for frame, failed in outcomes:
+            if frame is not None:
+                frames.append(frame)
+            pending.extend(failed)
+
+    if pending:
+        logger.warning(f"⚠️ {len(pending)} tickers failed after {retries} retries: {pending}")
+
+    data = pd.concat(frames, axis=1).sort_index() if frames else pd.DataFrame()
+    return data, pending
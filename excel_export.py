@@ -0,0 +1,105 @@
+import logging
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+logger = logging.getLogger(__name__)
+
+# --- STREAMING EXCEL EXPORT (openpyxl write-only mode) ---
+# pd.ExcelWriter + to_excel builds every cell object of every sheet in memory
+# until the workbook is saved. Here each sheet is a SheetView - a source frame,
+# a column list and a row order - and rows are streamed straight to the xlsx
+# with Workbook(write_only=True). Cell values are converted once per source
+# column and shared by every sheet that shows that column, so the sorted sheets
+# are not materialized as DataFrame copies. Memory stays flat in the row count.
+
+# Same header look as pandas' to_excel
+_THIN = Side(style='thin')
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+
+class SheetView:
+    """📄 One sheet as (source frame, columns, row labels) - nothing is copied until frame()"""
+
+    def __init__(self, source, columns=None, rows=None, headers=None):
+        self.source = source
+        self.columns = list(source.columns if columns is None else columns)
+        self.rows = rows  # index labels in sheet order (None = source order)
+        self.headers = list(headers) if headers is not None else self.columns  # written header labels
+
+    def __len__(self):
+        return len(self.source) if self.rows is None else len(self.rows)
+
+    def positions(self):
+        """🔢 Row positions in the source, in sheet order"""
+        if self.rows is None:
+            return np.arange(len(self.source))
+        return self.source.index.get_indexer(self.rows)
+
+    def frame(self):
+        """🧱 The sheet as a DataFrame (for consumers that need one, e.g. the Arrow artifacts)"""
+        if self.rows is None:
+            return self.source[self.columns]
+        return self.source.loc[self.rows, self.columns]
+
+
+def cell_values(series):
+    """🔄 Column → object array of Excel-ready Python values (NaN → empty, ±inf → 'inf' like pandas)"""
+    values = series.to_numpy(dtype=object, na_value=None) if series.hasnans else series.to_numpy(dtype=object)
+    if pd.api.types.is_float_dtype(series.dtype):
+        for i in np.flatnonzero(np.isinf(series.to_numpy(dtype=float, na_value=np.nan))):
+            values[i] = "inf" if values[i] > 0 else "-inf"
+    return values
+
+
+class ColumnBuffers:
+    """🧮 Excel-ready values per (source frame, column), converted once and shared across sheets"""
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, source, column):
+        key = (id(source), column)
+        if key not in self._buffers:
+            self._buffers[key] = cell_values(source[column])
+        return self._buffers[key]
+
+
+def _header(ws, columns):
+    cells = []
+    for name in columns:
+        cell = WriteOnlyCell(ws, value=str(name))
+        cell.font, cell.border, cell.alignment = HEADER_FONT, HEADER_BORDER, HEADER_ALIGNMENT
+        cells.append(cell)
+    return cells
+
+
+def write_workbook(path, views, stage=None):
+    """💾 Stream {sheet name: SheetView or DataFrame} to an xlsx; stage(name) wraps each sheet (e.g. a timer)"""
+    stage = stage or (lambda name: nullcontext())
+    buffers = ColumnBuffers()
+    wb = Workbook(write_only=True)
+
+    for sheet_name, view in views.items():
+        if isinstance(view, pd.DataFrame):
+            view = SheetView(view)
+        with stage(f"sheet_{sheet_name}"):
+            ws = wb.create_sheet(title=sheet_name)
+            ws.append(_header(ws, view.headers))
+            positions = view.positions()
+            columns = [buffers.get(view.source, c)[positions] for c in view.columns]
+            for row in zip(*columns):
+                ws.append(row)
+        logger.debug(f"✅ Sheet streamed: {sheet_name} ({len(view)} rows)")
+
+    path = Path(path)
+    with stage("save_workbook"):
+        wb.save(path)
+    return path
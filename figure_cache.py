@@ -0,0 +1,74 @@
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# --- FIGURE CACHE (SERIALIZED PLOTLY SPECS, SHARED BY ALL SESSIONS) ---
+# Keys start with the data version, e.g. (version, market, "scatter", currency, sector),
+# so widget reruns become dict lookups and a new artifact simply misses the cache.
+# Specs are plain dicts from fig.to_dict(); st.plotly_chart accepts them directly.
+# A warm key (the key prefix of one data version) is forgotten as soon as one of
+# its specs leaves the LRU, so old versions do not accumulate.
+
+FIGURE_CACHE_SIZE = 512
+
+
+class FigureCache:
+    """🖼️ LRU cache of Plotly figure specs with background pre-warming"""
+
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._specs = OrderedDict()
+        self._warmed = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, builder):
+        """📦 Cached spec for key, built (and stored) with builder() on a miss"""
+        with self._lock:
+            if key in self._specs:
+                self._specs.move_to_end(key)
+                return self._specs[key]
+        spec = builder().to_dict()
+        self._store(key, spec)
+        return spec
+
+    def _store(self, key, spec):
+        with self._lock:
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.max_entries:
+                evicted, _ = self._specs.popitem(last=False)
+                self._warmed = {warm_key for warm_key in self._warmed if evicted[:len(warm_key)] != warm_key}
+
+    def warm(self, warm_key, make_jobs):
+        """🔥 Build every {key: builder} from make_jobs() once per warm_key, off the request thread"""
+        with self._lock:
+            if warm_key in self._warmed:
+                return None
+            self._warmed.add(warm_key)
+
+        def _run():
+            built = 0
+            for key, builder in make_jobs().items():
+                with self._lock:
+                    if key in self._specs:
+                        continue
+                try:
+                    self._store(key, builder().to_dict())
+                    built += 1
+                except Exception as e:
+                    logger.warning(f"⚠️ Pre-warm failed for {key[2:]}: {str(e)}")
+            logger.info(f"🔥 Figure cache pre-warmed: {built} figures for {warm_key}")
+
+        thread = threading.Thread(target=_run, name="figure-cache-warm", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self):
+        with self._lock:
+            self._specs.clear()
+            self._warmed.clear()
+
+
+FIGURES = FigureCache()
@@ -0,0 +1,105 @@
+import pandas as pd
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# --- LOCAL OHLCV HISTORY STORE (ONE PARQUET FILE PER MARKET) ---
+# Bars are kept in long format (Date, Ticker, Open, High, Low, Close, Volume) so
+# each run only has to download the tail since the last stored date.
+
+HISTORY_DIR = Path(__file__).resolve().parent / "market_data" / "history"
+STORE_COLUMNS = ['Date', 'Ticker', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+# auto_adjust=True rewrites past prices after splits/dividends; if the re-fetched
+# overlap bar moved more than this, the ticker's stored window is re-downloaded
+ADJUSTMENT_TOLERANCE = 0.005
+
+
+class HistoryStore:
+    """💾 Append-only daily bar store for one market"""
+
+    def __init__(self, market, root=HISTORY_DIR):
+        self.market = market.lower()
+        self.path = Path(root) / f"{self.market}_ohlcv.parquet"
+        self._bars = None
+
+    @property
+    def bars(self):
+        if self._bars is None:
+            if self.path.exists():
+                self._bars = pd.read_parquet(self.path)
+                logger.info(f"💾 History loaded: {len(self._bars)} bars from {self.path.name}")
+            else:
+                self._bars = pd.DataFrame(columns=STORE_COLUMNS).astype({'Date': 'datetime64[ns]'})
+        return self._bars
+
+    def last_dates(self):
+        """📅 Last stored bar date per ticker"""
+        return self.bars.groupby('Ticker')['Date'].max()
+
+    def plan_fetch(self, tickers, start_date):
+        """🧭 Group tickers by the date their download must start from"""
+        last = self.last_dates().reindex(tickers)
+        start = pd.Timestamp(start_date).normalize()
+        plan = {}
+        # Unknown tickers (or history older than the window) need the full window
+        full = last.index[last.isna() | (last < start)]
+        if len(full):
+            plan[start] = list(full)
+        # Known tickers re-fetch their last stored day as an overlap check
+        for day, group in last.drop(full).groupby(last.drop(full)):
+            plan.setdefault(pd.Timestamp(day), []).extend(group.index)
+        return plan
+
+    def merge(self, data, tickers):
+        """➕ Merge a yfinance-style (ticker × field) download into the store"""
+        if data is None or data.empty:
+            return []
+        new_bars = _to_long(data, tickers)
+        old_bars = self.bars
+
+        # Detect split/dividend re-adjustment on the overlapping bars
+        overlap = new_bars.merge(old_bars[['Date', 'Ticker', 'Close']], on=['Date', 'Ticker'], suffixes=('', '_old'))
+        drift = (overlap['Close'] / overlap['Close_old'] - 1).abs()
+        adjusted = sorted(overlap.loc[drift > ADJUSTMENT_TOLERANCE, 'Ticker'].unique())
+        if adjusted:
+            logger.warning(f"⚠️ Price history re-adjusted for {adjusted} - dropping stored bars")
+            old_bars = old_bars[~old_bars['Ticker'].isin(adjusted)]
+
+        merged = pd.concat([old_bars, new_bars], ignore_index=True) if len(old_bars) else new_bars
+        merged = merged.drop_duplicates(subset=['Date', 'Ticker'], keep='last')
+        self._bars = merged.sort_values(['Ticker', 'Date']).reset_index(drop=True)
+        self.save()
+        return adjusted
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._bars.to_parquet(self.path, index=False)
+        logger.info(f"💾 History saved: {len(self._bars)} bars → {self.path.name}")
+
+    def load(self, tickers, start_date=None):
+        """📤 Return stored bars as a yfinance-style wide frame (ticker × field columns)"""
+        bars = self.bars[self.bars['Ticker'].isin(tickers)]
+        if start_date is not None:
+            bars = bars[bars['Date'] >= pd.Timestamp(start_date).normalize()]
+        return bars_to_wide(bars)
+
+
+def bars_to_wide(bars):
+    """🔄 Long bar rows → yfinance-style wide frame (ticker × field columns)"""
+    wide = bars.set_index(['Date', 'Ticker'])[STORE_COLUMNS[2:]].unstack('Ticker')
+    return wide.swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+
+def _to_long(data, tickers):
+    """🔄 Wide (ticker × field) download → long bar rows"""
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Single ticker download comes back with flat OHLCV columns
+        data = data.copy()
+        data.columns = pd.MultiIndex.from_product([list(tickers)[:1], data.columns])
+    long = data.stack(level=0, future_stack=True)
+    long.index = long.index.set_names(['Date', 'Ticker'])
+    long = long.reindex(columns=STORE_COLUMNS[2:]).dropna(how='all').reset_index()
+    long['Date'] = pd.to_datetime(long['Date']).dt.tz_localize(None).dt.normalize()
+    return long[STORE_COLUMNS]
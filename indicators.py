@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+import logging
+
+from signal_params import DEFAULT_PARAMS
+from signal_rules import DAILY_SIGNAL_DEFAULT, DAILY_SIGNAL_RULES, evaluate_rules
+
+logger = logging.getLogger(__name__)
+
+# --- PANEL INDICATOR ENGINE (WHOLE UNIVERSE AT ONCE) ---
+# Works on wide (date × ticker) frames instead of slicing one ticker at a time.
+# Each ticker's valid bars are right-aligned so trailing windows line up on the
+# last row, which reproduces the per-ticker `data[ticker].dropna()` numbers.
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Decimals of the indicator values in the daily results frame. QUICK_ACTION rules
+# see these rounded values, so the backtester rounds the same way
+RESULT_DECIMALS = {
+    "Price": 2, "Pct_Day": 2, "Vol_vs_Avg": 0, "Pct_1Month": 2, "Money_Flow_Strength": 2,
+    "Avg_Trading_Value_B": 3, "RSI": 2, "MACD": 4, "BB_Position": 1, "Stochastic": 1,
+    "ATR_Percent": 2, "Vol_Trend": 1,
+}
+
+
+def build_panel(data, tickers):
+    """🧱 Reshape a bulk yfinance download into right-aligned wide frames (one per field)"""
+    if isinstance(data.columns, pd.MultiIndex):
+        available = data.columns.get_level_values(0).unique()
+        fields = data.columns.get_level_values(1).unique()
+        frames = {f: data.xs(f, axis=1, level=1).reindex(columns=tickers) for f in fields}
+    else:
+        # Single ticker download comes back with flat OHLCV columns
+        available = pd.Index(tickers) if not data.empty else pd.Index([])
+        frames = {f: data[[f]].set_axis(tickers, axis=1) for f in data.columns}
+
+    missing = [t for t in tickers if t not in available]
+    for ticker in missing:
+        logger.warning(f"⚠️ {ticker}: Not found in data")
+
+    # Fields absent from the download (e.g. nothing came back) are all-NaN
+    for field in PRICE_FIELDS:
+        if field not in frames:
+            frames[field] = pd.DataFrame(np.nan, index=data.index, columns=tickers)
+
+    # A bar is usable only if every field is present (same rule as .dropna())
+    valid = np.logical_and.reduce([frame.notna().to_numpy() for frame in frames.values()])
+
+    # Stable argsort pushes invalid rows to the top, keeping bar order intact
+    order = np.argsort(valid, axis=0, kind='stable')
+    aligned_valid = np.take_along_axis(valid, order, axis=0)
+
+    panel = {}
+    for field in PRICE_FIELDS:
+        values = np.take_along_axis(frames[field].to_numpy(dtype='float64'), order, axis=0)
+        values[~aligned_valid] = np.nan
+        if not len(values):
+            values = np.full((1, len(tickers)), np.nan)  # nothing downloaded
+        panel[field] = pd.DataFrame(values, columns=tickers)
+
+    panel['Rows'] = pd.Series(valid.sum(axis=0), index=tickers)
+    return panel
+
+
+def indicator_frames(close, high, low, volume, params=DEFAULT_PARAMS):
+    """📈 Indicator history on wide frames (rows = bars, columns = tickers); the last row is today"""
+    p = params
+    valid = close.notna()
+
+    # 1. RSI (Relative Strength Index) - Momentum (0-100 scale)
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).where(valid).rolling(window=p["rsi_window"]).mean()
+    loss = (-delta.where(delta < 0, 0)).where(valid).rolling(window=p["rsi_window"]).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+
+    # 2. MACD - Trend (leading NaN padding does not affect adjust=False EWMs)
+    macd_line = close.ewm(span=p["ema_fast"], adjust=False).mean() - close.ewm(span=p["ema_slow"], adjust=False).mean()
+    macd_signal = macd_line.ewm(span=p["ema_signal"], adjust=False).mean()
+
+    # 3. Bollinger Bands - Volatility (0-100 position)
+    sma_20 = close.rolling(window=p["bb_window"]).mean()
+    std_20 = close.rolling(window=p["bb_window"]).std()
+    bb_lower = sma_20 - p["bb_std"] * std_20
+    bb_range = (sma_20 + p["bb_std"] * std_20) - bb_lower
+    bb_position = ((close - bb_lower) / bb_range * 100).where(bb_range > 0, 50)
+
+    # 4. Stochastic Oscillator - Overbought/Oversold (0-100)
+    low_14 = close.rolling(window=p["stoch_window"]).min()
+    high_14 = close.rolling(window=p["stoch_window"]).max()
+    stochastic = (close - low_14) / (high_14 - low_14) * 100
+
+    # 5. ATR (Average True Range) - Volatility in %
+    prev_close = close.shift()
+    tr = np.fmax.reduce([
+        (high - low).to_numpy(),
+        (high - prev_close).abs().to_numpy(),
+        (low - prev_close).abs().to_numpy(),
+    ])
+    atr_value = pd.DataFrame(tr, index=close.index, columns=close.columns).rolling(window=p["atr_window"]).mean()
+    atr_percent = (atr_value / close * 100).where(close > 0, 0)
+
+    # 6. Volume Trend - Increasing/Decreasing
+    vol_tb_20 = volume.rolling(window=p["vol_slow"]).mean()
+    vol_tb_5 = volume.rolling(window=p["vol_fast"]).mean()
+    vol_trend = ((volume / vol_tb_20 - 1) * 100).where(vol_tb_20 > 0, 0)
+
+    # --- PRICE / FLOW METRICS ---
+    price_21d_ago = close.shift(p["month_bars"])
+
+    return {
+        "Price": close,
+        "Pct_Day": (close - prev_close) / prev_close * 100,
+        "Vol_vs_Avg": (volume / vol_tb_20 * 100).where(vol_tb_20 > 0, 0),
+        "Pct_1Month": (close - price_21d_ago) / price_21d_ago * 100,
+        "Money_Flow_Strength": (vol_tb_5 / vol_tb_20).where(vol_tb_20 > 0, 0),
+        "Avg_Trading_Value_B": close * vol_tb_20 / 1_000_000_000,
+        "RSI": rsi,
+        "MACD": macd_line,
+        "MACD_Signal": macd_signal,
+        "BB_Position": bb_position,
+        "Stochastic": stochastic,
+        "ATR_Percent": atr_percent,
+        "Vol_Trend": vol_trend,
+        # Inputs of the daily signal rules
+        "SMA_20": sma_20,
+        "Volume": volume,
+        "Vol_Avg_20": vol_tb_20,
+    }
+
+
+def calculate_panel_indicators(panel, params=DEFAULT_PARAMS):
+    """📊 Calculate all indicators for every ticker in the panel (one row per ticker)"""
+    frames = indicator_frames(panel['Close'], panel['High'], panel['Low'], panel['Volume'], params)
+    last = pd.DataFrame({name: frame.iloc[-1] for name, frame in frames.items()})
+    signal = evaluate_rules(last, DAILY_SIGNAL_RULES, DAILY_SIGNAL_DEFAULT)
+
+    # Breadth flags: today's bar is the high / low of the window (full window only)
+    window = params["high_low_window"]
+    high_window, low_window = panel['High'].iloc[-window:], panel['Low'].iloc[-window:]
+    full_window = high_window.count() >= window
+
+    return pd.DataFrame({
+        "Rows": panel['Rows'],
+        "Price": last['Price'],
+        "Pct_Day": last['Pct_Day'],
+        "Vol_vs_Avg": last['Vol_vs_Avg'],
+        "Pct_1Month": last['Pct_1Month'],
+        "Money_Flow_Strength": last['Money_Flow_Strength'],
+        "Signal": signal,
+        "Avg_Trading_Value_B": last['Avg_Trading_Value_B'],
+        "RSI": last['RSI'],
+        "MACD": last['MACD'],
+        "MACD_Signal": last['MACD_Signal'],
+        "BB_Position": last['BB_Position'],
+        "Stochastic": last['Stochastic'],
+        "ATR_Percent": last['ATR_Percent'],
+        "Vol_Trend": last['Vol_Trend'],
+        "Above_SMA20": last['Price'] > last['SMA_20'],
+        "New_High": full_window & (panel['High'].iloc[-1] >= high_window.max()),
+        "New_Low": full_window & (panel['Low'].iloc[-1] <= low_window.min()),
+    })
@@ -0,0 +1,545 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+import os
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+import io
+
+from indicators import RESULT_DECIMALS, build_panel, calculate_panel_indicators
+from history_store import HistoryStore
+from streaming_indicators import IndicatorBook
+from artifacts import write_sheet_artifacts
+from breadth import BREADTH_SHEET, breadth_table
+from excel_export import SheetView, write_workbook
+import schema
+from downloader import DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, DataProvider, fetch_ohlcv, get_provider
+from security_master import SecurityMaster
+from signal_rules import QUICK_ACTION_DEFAULT, QUICK_ACTION_RULES, evaluate_rules, rule_mask
+from ranking import RankIndex
+from run_profile import RunProfiler
+from screener import SCREENER_SHEET
+from snapshot_store import SnapshotStore
+from sector_rotation import SectorRotation
+from markets import MARKETS, TW_MARKET
+
+logger = logging.getLogger(__name__)
+
+# --- MARKET PIPELINE: fetch → compute → aggregate → export ---
+# One engine for every market in markets.MARKETS. Importing this module has no
+# side effects; every stage is a function that takes and returns DataFrames and
+# run() chains them for one market config. run_markets() runs several markets
+# concurrently in one process, sharing the data provider, the download thread
+# pool and the (already imported) indicator engine.
+#   python market_pipeline.py --market TW VN
+
+# arrow = columnar sheet artifacts read by the dashboards; snapshot = the day's
+# results rows appended to the multi-day history (snapshot_store.py)
+OUTPUT_FORMATS = ("xlsx", "arrow", "snapshot")
+LOG_FILE = "market_pipeline_debug.log"  # multi-market runs; single markets log to their own file
+
+
+def setup_logging(log_file=TW_MARKET["log_file"], with_threads=False):
+    """📝 Console + file logging with UTF-8 output (thread names tag concurrent markets)"""
+    # Fix encoding for Windows console
+    if hasattr(sys.stdout, 'buffer') and (sys.stdout.encoding or '').lower() != 'utf-8':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s' if with_threads else '%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def load_universe(market_config=TW_MARKET, universe=None):
+    """📇 Security master of a market: an explicit file, else market_data/securities/<market>_securities.*"""
+    suffixes = market_config["exchange_suffixes"]
+    if universe:
+        return SecurityMaster.load(universe, suffixes)
+    return SecurityMaster.for_market(market_config["market"], exchange_by_suffix=suffixes)
+
+
+def validate_favorites(securities, favorites):
+    """🎯 Log whether every favorite exists in the security master"""
+    logger.info(f"🎯 MY_FAVORITES configured: {favorites}")
+    for fav_code in favorites:
+        found_ticker = securities.resolve(fav_code)
+        if found_ticker:
+            company_info = securities.get(found_ticker)
+            logger.info(f"  ✓ {fav_code} → {found_ticker} ({company_info['Name']}, {company_info['Sector']})")
+        else:
+            logger.error(f"  ✗ {fav_code}: NOT FOUND in security master!")
+
+
+def classify_industry(sectors, rules, default):
+    """🏭 Map a Sector column to the categorical Industry column (rules run once per distinct sector)"""
+    sectors = pd.Series(sectors)
+    dtype = pd.CategoricalDtype([name for name, _ in rules] + [default])
+
+    def _match(sector):
+        if pd.isna(sector):
+            return default
+        sector = str(sector)
+        for industry, rule in rules:
+            if sector in rule.get("exact", ()) or any(k in sector for k in rule.get("keywords", ())):
+                return industry
+        return default
+
+    lookup = {sector: _match(sector) for sector in sectors.dropna().unique()}
+    return sectors.map(lookup).fillna(default).astype(dtype)
+
+
+# --- 1. FETCH (CHUNKED DOWNLOAD + LOCAL HISTORY) ---
+def fetch(securities, market_config=TW_MARKET, source=None, chunk_size=None, workers=None, profiler=None, executor=None):
+    """📥 Bring the history store up to date and return (wide OHLCV frame, failed tickers)
+
+    Only the tail since the last stored bar is downloaded; the rest comes from disk.
+    Source is 'yfinance', a local CSV/Parquet fixture for offline runs, or a DataProvider.
+    """
+    profiler = profiler or RunProfiler(market_config["market"])
+    tickers_all = securities.tickers
+    today = datetime.now()
+    start_date = today - timedelta(days=market_config["history_days"])
+    provider = source if isinstance(source, DataProvider) else get_provider(source)
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    workers = workers or DEFAULT_WORKERS
+
+    store = HistoryStore(market_config["market"])
+    fetch_plan = store.plan_fetch(tickers_all, start_date)
+    failed_tickers = []
+    adjusted_tickers = set()
+
+    def download_into_store(tickers, fetch_start):
+        """📥 Download one group of tickers (chunked + retried) and merge it into the history store"""
+        logger.info(f"📥 Downloading {len(tickers)} stocks from {fetch_start:%Y-%m-%d} via {provider.name}...")
+        new_data, failed = fetch_ohlcv(provider, tickers, fetch_start, today,
+                                       chunk_size=chunk_size, max_workers=workers, executor=executor,
+                                       on_chunk=lambda chunk, seconds: profiler.observe("download_per_ticker", seconds / len(chunk), len(chunk)))
+        failed_tickers.extend(failed)
+        return store.merge(new_data, tickers)
+
+    with profiler.stage("download", items=len(tickers_all)):
+        for fetch_start, tickers in fetch_plan.items():
+            adjusted = download_into_store(tickers, fetch_start)
+            if adjusted:
+                adjusted_tickers.update(adjusted)
+                adjusted_tickers.update(download_into_store(adjusted, start_date))
+        # Failed downloads would leave stale bars behind - skip them this run
+        failed = set(failed_tickers)
+        loaded = [t for t in tickers_all if t not in failed]
+        data = store.load(loaded, start_date)
+        logger.info(f"✅ History ready for {len(loaded)}/{len(tickers_all)} stocks ({len(data)} trading days)")
+
+    # Keep the O(1)-per-bar indicator state in step with the store (for intraday/live refresh)
+    with profiler.stage("indicator_state"):
+        try:
+            indicator_book = IndicatorBook(market_config["market"])
+            # Re-adjusted tickers (splits / dividends) restart from their re-downloaded bars:
+            # the old windows hold unadjusted prices and the new bars are not newer than the state
+            indicator_book.reset(sorted(adjusted_tickers))
+            indicator_book.advance(store.bars[store.bars['Ticker'].isin(tickers_all)])
+            indicator_book.save()
+        except Exception as e:
+            logger.warning(f"⚠️ Streaming indicator state not updated: {str(e)}")
+
+    return data, failed_tickers
+
+
+# --- 2. COMPUTE (VECTORIZED INDICATORS FOR THE WHOLE UNIVERSE) ---
+def compute(data, securities, market_config=TW_MARKET, profiler=None):
+    """📊 One row per stock with enough history: indicators, signal and QUICK_ACTION (canonical schema columns)"""
+    profiler = profiler or RunProfiler(market_config["market"])
+    tickers = securities.tickers
+    favorites = market_config["favorites"]
+
+    with profiler.stage("indicators", items=len(tickers)):
+        panel = build_panel(data, tickers)
+        panel_indicators = calculate_panel_indicators(panel)
+
+    # Validate data (fewer bars are accepted for favorites)
+    codes = pd.Index(securities.lookup(panel_indicators.index)['Code'])
+    is_fav = codes.isin(favorites)
+    rows = panel_indicators['Rows']
+    min_required = pd.Series(np.where(is_fav, market_config["min_bars_favorite"], market_config["min_bars"]), index=rows.index)
+
+    downloaded = data.columns.get_level_values(0) if isinstance(data.columns, pd.MultiIndex) else tickers
+    empty_mask = (rows == 0) & rows.index.isin(downloaded)
+    short_mask = (rows > 0) & (rows < min_required)
+    for ticker in rows.index[empty_mask]:
+        logger.warning(f"⚠️ {ticker}: Empty data returned")
+    for ticker in rows.index[short_mask]:
+        logger.warning(f"⚠️ {ticker}: Insufficient data ({rows[ticker]}/{min_required[ticker]})")
+
+    # 21-day trend needs at least 21 bars even for favorites
+    passed = rows >= min_required
+    no_month_mask = passed & (rows < market_config["month_bars"])
+    for ticker in rows.index[no_month_mask]:
+        logger.error(f"❌ Error processing {ticker}: only {rows[ticker]} bars, {market_config['month_bars']} needed for 1-month change")
+
+    ok = panel_indicators[passed & ~no_month_mask]
+
+    # Get stock info
+    info = securities.lookup(ok.index)
+    info['Name'] = info['Name'].fillna("Unknown")
+    info['Name_CN'] = info['Name_CN'].fillna(info['Name'])
+    info['Sector'] = info['Sector'].fillna("Other")
+    industry = market_config["industry"]
+
+    with profiler.stage("build_results"):
+        r = RESULT_DECIMALS
+        df_results = pd.DataFrame({
+            "Code": codes[passed & ~no_month_mask],
+            "Name": info['Name'].to_numpy(),
+            "Name_CN": info['Name_CN'].to_numpy(),
+            "Sector": info['Sector'].to_numpy(),
+            "Exchange": info['Exchange'].to_numpy(),
+            "Industry": classify_industry(info['Sector'], *industry).array if industry else info['Sector'].to_numpy(),
+            "Price": (ok['Price'] / market_config["price_divisor"]).round(r['Price']).to_numpy(),
+            "Pct_Day": ok['Pct_Day'].round(r['Pct_Day']).to_numpy(),
+            "Vol_vs_Avg": ok['Vol_vs_Avg'].round(r['Vol_vs_Avg']).to_numpy(),
+            "Pct_1Month": ok['Pct_1Month'].round(r['Pct_1Month']).to_numpy(),
+            "Money_Flow_Strength": ok['Money_Flow_Strength'].round(r['Money_Flow_Strength']).to_numpy(),
+            "Signal": ok['Signal'].to_numpy(),
+            "Avg_Trading_Value_B": ok['Avg_Trading_Value_B'].round(r['Avg_Trading_Value_B']).to_numpy(),
+            # Professional Indicators for Favorites
+            "RSI": ok['RSI'].round(r['RSI']).to_numpy(),
+            "MACD": (ok['MACD'] / market_config["price_divisor"]).round(r['MACD']).to_numpy(),
+            "BB_Position": ok['BB_Position'].round(r['BB_Position']).to_numpy(),
+            "Stochastic": ok['Stochastic'].round(r['Stochastic']).to_numpy(),
+            "ATR_Pct": ok['ATR_Percent'].round(r['ATR_Percent']).to_numpy(),
+            "Vol_Trend": ok['Vol_Trend'].round(r['Vol_Trend']).to_numpy(),
+            # Breadth flags (market / sector breadth table, snapshots)
+            "Above_SMA20": ok['Above_SMA20'].to_numpy(dtype=bool),
+            "New_High": ok['New_High'].to_numpy(dtype=bool),
+            "New_Low": ok['New_Low'].to_numpy(dtype=bool),
+        })
+        # Trading action for the whole universe (first matching rule wins)
+        df_results['QUICK_ACTION'] = evaluate_rules(df_results, QUICK_ACTION_RULES, QUICK_ACTION_DEFAULT)
+
+    logger.info(f"✅ Data collection completed: {len(df_results)} success, {len(tickers) - len(df_results)} errors")
+    return df_results
+
+
+def diagnose_favorites(df_results, securities, market_config=TW_MARKET):
+    """📍 Log which favorites made it into the results (and what is known about the missing ones)"""
+    favorites = market_config["favorites"]
+    logger.info("📍 Checking favorite stocks collection...")
+    collected_codes = set(df_results["Code"])
+    collected_favorites = [fav for fav in favorites if fav in collected_codes]
+    missing_favorites = [fav for fav in favorites if fav not in collected_codes]
+
+    logger.info(f"📊 Favorites collected in results: {len(collected_favorites)}/{len(favorites)}")
+    by_code = df_results.set_index("Code")
+    for fav in collected_favorites:
+        favorite_data = by_code.loc[fav]
+        logger.info(f"  ✓ {fav}: {favorite_data.get('Name', 'N/A')} - Price: {favorite_data.get('Price', 'N/A')} {market_config['currency']}")
+
+    # --- ENHANCED ROOT CAUSE ANALYSIS ---
+    logger.info("\n📊 ENHANCED ROOT CAUSE ANALYSIS:")
+    logger.info(f"Total in results: {len(df_results)} stocks")
+    logger.info(f"Collected Code codes: {sorted(collected_codes)}")
+    logger.info(f"MY_FAVORITES: {favorites}")
+
+    if missing_favorites:
+        logger.warning(f"\n⚠️ MISSING FROM results: {missing_favorites}")
+        for fav in missing_favorites:
+            # Find the full ticker code
+            full_ticker = securities.resolve(fav)
+            company_info = securities.get(full_ticker)
+            company_name = company_info.get("Name", "Unknown")
+            sector = company_info.get("Sector", "Unknown")
+            logger.warning(f"\n  Stock: {fav} ({full_ticker}) - {company_name} [{sector}]")
+
+            # This will be checked after df_full is created
+            logger.warning(f"    → Check Sheet 1 & 2 for presence (will verify below)")
+    else:
+        logger.info(f"✅ All {len(favorites)} favorite stocks collected successfully!")
+
+
+# --- 3. AGGREGATE (THE FOUR WORKBOOK SHEETS OF THE MARKET) ---
+def label_signals(df_results, signal_labels):
+    """🏷️ Results with workbook labels on the signal values (e.g. Vietnamese for VN), other columns not copied"""
+    if not signal_labels:
+        return df_results
+    return df_results.assign(**{label_col: df_results[label_col].replace(signal_labels)
+                                for label_col in ('Signal', 'QUICK_ACTION')})
+
+
+def aggregate(df_results, market_config=TW_MARKET, profiler=None):
+    """📑 {sheet name: SheetView} over the results (canonical columns, headers in the market's locale)"""
+    profiler = profiler or RunProfiler(market_config["market"])
+    favorites = market_config["favorites"]
+    locale = market_config["locale"]
+
+    with profiler.stage("build_dataframe"):
+        # Columns keep their canonical schema names; only the signal values get
+        # workbook labels (e.g. Vietnamese for VN), without copying the other columns
+        df_full = label_signals(df_results, market_config["signal_labels"])
+
+    # Sort by different criteria for each sheet (row orders only - sheets are views over df_full).
+    # Each metric is sorted once into a permutation; a filtered sheet keeps the passing positions
+    with profiler.stage("sort"):
+        ranks = RankIndex(df_full)
+        sheet_rows = {}
+        for spec in market_config["sheets"]:
+            if "sort" in spec:
+                positions = ranks.order(spec["sort"])
+                if spec.get("filter"):
+                    positions = positions[rule_mask(df_full, spec["filter"])[positions]]
+                sheet_rows[spec["name"]] = df_full.index[positions]
+
+    # --- ENHANCED: Check if "missing" favorites are actually in df_full ---
+    logger.info("\n" + "="*70)
+    logger.info("🔍 CHECKING IF 'MISSING' FAVORITES ARE IN df_full (SHEETS 1 & 2):")
+    logger.info("="*70)
+
+    collected_codes_full = set(df_full['Code'].values)
+    logger.info(f"\nTotal in df_full: {len(df_full)} stocks")
+    logger.info(f"Codes in df_full: {sorted(collected_codes_full)}")
+
+    truly_missing_from_df = []
+    for fav in favorites:
+        if fav in collected_codes_full:
+            fav_row = df_full[df_full['Code'] == fav].iloc[0]
+            logger.info(f"  ✅ {fav}: {fav_row['Name']} - Price: {fav_row['Price']} {market_config['currency']}")
+        else:
+            truly_missing_from_df.append(fav)
+            logger.warning(f"  ❌ {fav}: NOT in df_full (not even in Sheets 1 & 2)")
+
+    if not truly_missing_from_df:
+        logger.info(f"\n✅ ALL {len(favorites)} FAVORITES ARE IN df_full!")
+    else:
+        logger.warning(f"\n⚠️ {len(truly_missing_from_df)} truly missing from df_full:")
+        for fav in truly_missing_from_df:
+            logger.warning(f"   - {fav}")
+    logger.info("="*70 + "\n")
+
+    sheets = {}  # sheet name → SheetView; the same views are also written as columnar artifacts
+    for spec in market_config["sheets"]:
+        name = spec["name"]
+        if "build" in spec:
+            df_built = spec["build"](df_full)
+            sheets[name] = SheetView(df_built, headers=schema.labels(df_built.columns, locale))
+        elif spec.get("favorites"):
+            # Favorites sheet: only MY_FAVORITES rows, in results order
+            logger.info("\n" + "="*70)
+            logger.info(f"🎯 {name} - MY FAVORITE STOCKS FILTERING ANALYSIS:")
+            logger.info("="*70)
+
+            logger.info(f"MY_FAVORITES: {favorites}")
+            df_fav = df_full[df_full['Code'].isin(favorites)]
+            logger.info(f"\nFiltering result: {len(df_fav)} rows selected from {len(df_full)} total")
+            logger.info(f"Selected favorites: {sorted(df_fav['Code'].values)}")
+
+            if not df_fav.empty:
+                sheets[name] = SheetView(df_full, spec["columns"], df_fav.index, schema.labels(spec["columns"], locale))
+                fav_count = len(df_fav)
+                logger.info(f"\n✅ Sheet created: {name} ({fav_count}/{len(favorites)} favorites)")
+                logger.info(f"   Columns: Basic Info + 6 Professional Indicators")
+                if fav_count < len(favorites):
+                    missing = [fav for fav in favorites if fav not in df_fav['Code'].values]
+                    logger.warning(f"⚠️ Missing in {name}: {missing}")
+            else:
+                logger.warning("⚠️ No favorite stocks found in data")
+            logger.info("="*70 + "\n")
+        else:
+            sheets[name] = SheetView(df_full, spec["columns"], sheet_rows.get(name), schema.labels(spec["columns"], locale))
+    return sheets
+
+
+# --- 4. EXPORT ---
+def export(sheets, workbook_path, formats=OUTPUT_FORMATS, profiler=None, locale="en", tables=None):
+    """💾 Write the sheets as an xlsx workbook and/or Arrow artifacts beside it; returns the written paths
+
+    tables: {name: DataFrame} summary tables (e.g. market breadth) written as artifacts only.
+    """
+    profiler = profiler or RunProfiler(Path(workbook_path).stem)
+    written = []
+    if "xlsx" in formats:
+        # Stream every sheet into the workbook (write-only mode, shared column buffers)
+        with profiler.stage("excel_export"):
+            written.append(write_workbook(workbook_path, sheets, stage=profiler.stage))
+        logger.info(f"✅✅✅ SUCCESS! File saved: {workbook_path}")
+    if "arrow" in formats:
+        # Columnar copy of every sheet (Excel stays for human download)
+        with profiler.stage("artifacts"):
+            try:
+                # Schema dtypes (float32 / categorical) and the same headers as the workbook
+                artifacts = {name: schema.conform(view.frame(), locale) for name, view in sheets.items()}
+                artifacts.update({name: schema.conform(table, locale) for name, table in (tables or {}).items()})
+                written.append(write_sheet_artifacts(artifacts, workbook_path))
+            except Exception as e:
+                logger.warning(f"⚠️ Columnar artifacts not written: {str(e)}")
+    return written
+
+
+# --- 5. RUN ONE MARKET / SEVERAL MARKETS CONCURRENTLY ---
+def run(market_config=TW_MARKET, universe=None, source=None, formats=OUTPUT_FORMATS,
+        chunk_size=None, workers=None, output_dir=".", profiler=None, executor=None):
+    """🚀 fetch → compute → aggregate → export for one market; returns a summary dict
+
+    Keys: market, workbook, results (DataFrame), sheets ({name: SheetView}), breadth (DataFrame),
+    failed (tickers).
+    """
+    market = market_config["market"]
+    profiler = profiler or RunProfiler(market)
+    workbook_path = Path(output_dir) / market_config["workbook"]
+
+    securities = load_universe(market_config, universe)
+    validate_favorites(securities, market_config["favorites"])
+    logger.info(f"🚀 STARTING {market} STOCK ANALYSIS")
+    logger.info(f"📊 Total stocks to analyze: {len(securities)}")
+
+    data, failed = fetch(securities, market_config, source, chunk_size, workers, profiler, executor)
+    df_results = compute(data, securities, market_config, profiler)
+    profiler.count(stocks=len(df_results), errors=len(securities) - len(df_results), failed_downloads=len(failed))
+    diagnose_favorites(df_results, securities, market_config)
+
+    summary = {"market": market, "workbook": workbook_path, "results": df_results, "sheets": {},
+               "breadth": pd.DataFrame(), "failed": failed}
+    if df_results.empty:
+        logger.error("❌ NO DATA COLLECTED - Empty result list")
+    else:
+        logger.info(f"📊 Creating report with {len(df_results)} stocks...")
+        summary["sheets"] = aggregate(df_results, market_config, profiler)
+        # Market + per-sector breadth, once here instead of in every dashboard session
+        with profiler.stage("breadth"):
+            summary["breadth"] = breadth_table(df_results)
+        try:
+            # Every results row with all indicator columns feeds the dashboards' screener
+            export(summary["sheets"], workbook_path, formats, profiler, market_config["locale"],
+                   tables={BREADTH_SHEET: summary["breadth"],
+                           SCREENER_SHEET: label_signals(df_results, market_config["signal_labels"])})
+            logger.info(f"📈 Report contains {len(df_results)} stocks across {df_results['Sector'].nunique()} sectors")
+        except Exception as e:
+            logger.error(f"❌ FAILED to write Excel file: {str(e)}")
+            summary["error"] = str(e)
+        if "snapshot" in formats:
+            # The day's rows go into the append-only history, dated by the last bar,
+            # and the per-sector daily sums are extended by the new day(s)
+            with profiler.stage("snapshot"):
+                try:
+                    SnapshotStore(market).append(df_results, data.index.max())
+                except Exception as e:
+                    logger.warning(f"⚠️ Daily snapshot not stored: {str(e)}")
+                try:
+                    SectorRotation(market).update(SnapshotStore(market))
+                except Exception as e:
+                    # The table only grows from the snapshots: until this passes it stays at its last day
+                    logger.error(f"❌ Sector rotation not updated (stuck at its last aggregated day): {str(e)}")
+
+    # Run report (stage timings / memory) beside the workbook
+    try:
+        profiler.finish(workbook_path)
+    except Exception as e:
+        logger.warning(f"⚠️ Run report not written: {str(e)}")
+    return summary
+
+
+def run_safely(market_config, **kwargs):
+    """🛡️ run() that turns a failure (e.g. the download) into a summary with an 'error' key"""
+    try:
+        return run(market_config, **kwargs)
+    except Exception as e:
+        logger.error(f"❌ {market_config['market']} run failed: {str(e)}")
+        return {"market": market_config["market"], "workbook": Path(kwargs.get("output_dir", ".")) / market_config["workbook"],
+                "results": pd.DataFrame(), "sheets": {}, "failed": [], "error": str(e)}
+
+
+def run_markets(market_configs, source=None, formats=OUTPUT_FORMATS, chunk_size=None, workers=None, output_dir="."):
+    """🌏 Run several markets concurrently: one provider, one download pool, one warm interpreter
+
+    Each market gets its own thread (named after it, for the logs), history store,
+    indicator state, workbook and run report. Returns {market: summary}.
+    """
+    provider = source if isinstance(source, DataProvider) else get_provider(source)
+    workers = workers or DEFAULT_WORKERS
+
+    def run_market(market_config):
+        threading.current_thread().name = market_config["market"]
+        return run_safely(market_config, source=provider, formats=formats, chunk_size=chunk_size,
+                          workers=workers, output_dir=output_dir, executor=download_pool)
+
+    logger.info(f"🌏 Running {len(market_configs)} markets concurrently ({workers} download workers)")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as download_pool, \
+            ThreadPoolExecutor(max_workers=len(market_configs), thread_name_prefix="market") as market_pool:
+        futures = {config["market"]: market_pool.submit(run_market, config) for config in market_configs}
+        return {market: future.result() for market, future in futures.items()}
+
+
+# --- 6. CLI ---
+def print_summary(summary, market_config):
+    """🖨️ Console banner of one market run"""
+    print(f"\n{'='*60}")
+    if summary.get("error"):
+        print(f"❌ {summary['market']} ERROR: {summary['error']}")
+        print(f"Check '{market_config['log_file']}' for details")
+    elif summary["results"].empty:
+        print(f"❌ {summary['market']}: NO DATA COLLECTED")
+        print("Possible causes:")
+        print("  • Network connection issue")
+        print("  • Yahoo Finance API rate limit")
+        print("  • All stocks failed validation")
+        print(f"Check '{market_config['log_file']}' for details")
+    else:
+        df_results = summary["results"]
+        favorites = df_results['Code'].isin(market_config["favorites"]).sum()
+        print(f"✅✅✅ SUCCESS! Saved {len(df_results)} stocks to {summary['workbook']}")
+        print(f"📊 Sectors analyzed: {df_results['Sector'].nunique()}")
+        print(f"⭐ Favorites tracked: {favorites}")
+    print(f"{'='*60}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily market scan: fetch → compute → aggregate → export")
+    parser.add_argument("--market", nargs="+", default=["TW"], choices=sorted(MARKETS),
+                        help="one or more markets; several run concurrently in this process")
+    parser.add_argument("--universe", help="Security master file (.csv/.parquet) for a single market; "
+                                           "default market_data/securities/<market>_securities.* (or SECURITY_MASTER)")
+    parser.add_argument("--source", default=os.environ.get("STOCK_DATA_SOURCE", "yfinance"),
+                        help="'yfinance' or a local fixture file/directory of long bars")
+    parser.add_argument("--formats", nargs="+", default=list(OUTPUT_FORMATS), choices=OUTPUT_FORMATS)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("DOWNLOAD_WORKERS", DEFAULT_WORKERS)))
+    parser.add_argument("--chunk-size", type=int, default=int(os.environ.get("DOWNLOAD_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)))
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--profile", action="store_true", default=os.environ.get("STOCK_PROFILE") == "1",
+                        help="dump cProfile stats beside the workbook (single market)")
+    parser.add_argument("--trace-memory", action="store_true", default=os.environ.get("STOCK_TRACEMALLOC") == "1",
+                        help="tracemalloc heap peaks per stage (single market)")
+    args = parser.parse_args(argv)
+
+    market_configs = [MARKETS[market] for market in dict.fromkeys(args.market)]
+    if len(market_configs) > 1 and args.universe:
+        parser.error("--universe needs a single --market")
+
+    if len(market_configs) == 1:
+        # Single market in the main thread (cProfile / tracemalloc see the whole run)
+        market_config = market_configs[0]
+        setup_logging(market_config["log_file"])
+        profiler = RunProfiler(market_config["market"], trace_memory=args.trace_memory, profile=args.profile)
+        summaries = {market_config["market"]: run_safely(
+            market_config, universe=args.universe or os.environ.get("SECURITY_MASTER"), source=args.source,
+            formats=args.formats, chunk_size=args.chunk_size, workers=args.workers,
+            output_dir=args.output_dir, profiler=profiler)}
+    else:
+        setup_logging(LOG_FILE, with_threads=True)
+        if args.profile or args.trace_memory:
+            logger.warning("⚠️ --profile / --trace-memory are per-process; ignored when running several markets")
+        summaries = run_markets(market_configs, source=args.source, formats=args.formats,
+                                chunk_size=args.chunk_size, workers=args.workers, output_dir=args.output_dir)
+
+    for market, summary in summaries.items():
+        print_summary(summary, MARKETS[market])
+    return 0 if all(not s["results"].empty and not s.get("error") for s in summaries.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+from display_columns import classify
+from security_master import EXCHANGE_BY_SUFFIX
+
+# --- MARKET REGISTRY (EVERYTHING MARKET-SPECIFIC THE PIPELINE NEEDS) ---
+# market_pipeline.py is one engine; a market is a config dict: where its stock
+# list and history live, ticker suffixes, the schema locale of its workbook
+# headers, the labels of its signal values, its sector taxonomy and the layout
+# of the four sheets. Columns are canonical schema names (schema.py).
+# Sheet specs: {"name", "columns", "sort" (descending), "filter" (signal_rules
+# conditions), "favorites" (only MY_FAVORITES rows), "build" (frame → sheet)}.
+
+# --- TAIWAN ---
+# 🏭 Sector → Industry (first matching rule wins): a sector belongs to an industry
+# if it contains one of the keywords (or equals one of the exact names)
+INDUSTRY_RULES = [
+    ("AI Infrastructure & Server", {"keywords": ["AI Server", "Power Supply", "Design Service (AI)"]}),
+    ("Semiconductor Design (Upstream)", {"keywords": ["IC Design", "IP Core"]}),
+    ("Semiconductor Manufacturing (Midstream)", {"keywords": ["Foundry", "Wafer"]}),
+    ("Packaging & Memory (Downstream)", {"keywords": ["Memory", "OSAT", "Packaging"]}),
+    ("Compound Semiconductor", {"keywords": ["Compound", "LED"]}),
+    ("Transportation & Logistics", {"keywords": ["Shipping", "Airline"]}),
+    ("Financial & Banking", {"keywords": ["Financial"]}),
+    ("Equipment & Electronic Components", {"keywords": ["Equipment", "Electronic"]}),
+    ("Traditional Industry", {"exact": ["Plastics", "Steel", "Automobile", "Industrial"]}),
+]
+INDUSTRY_DEFAULT = "Others"
+
+# MY FAVORITE CONFIGURATION (ENTER YOUR PORTFOLIO CODES HERE)
+MY_FAVORITES = ["2454", "2317", "2455", "8299", "8096", "1526", "6133", "6173"]
+
+def tw_sector_sheet(df_full):
+    """🏭 Sheet 3 (TW): one row per sector, sorted by average 1-month gain"""
+    df_sector = df_full.groupby('Sector').agg({
+        'Industry': 'first',
+        'Pct_1Month': 'mean',
+        'Money_Flow_Strength': 'mean',
+        'Avg_Trading_Value_B': 'sum',
+        'Code': 'count'
+    }).reset_index()
+    df_sector.columns = ['Sector', 'Industry', 'Avg_Pct_1M', 'Avg_Money_Flow', 'Total_Trading_Value_B', 'Stock_Count']
+    return df_sector.sort_values(by='Avg_Pct_1M', ascending=False)
+
+
+TW_MARKET = {
+    "market": "TW",
+    "workbook": "Taiwan_Market_Data_Latest.xlsx",
+    "log_file": "stock_tw_debug.log",
+    "history_days": 60,        # calendar days of bars the indicators look at
+    "min_bars": 22,            # history needed for a regular stock
+    "min_bars_favorite": 10,   # favorites are kept with less history
+    "month_bars": 21,          # the 1-month change needs this many bars
+    "currency": "TWD",
+    "price_divisor": 1,
+    "exchange_suffixes": EXCHANGE_BY_SUFFIX,
+    "favorites": MY_FAVORITES,
+    "industry": (INDUSTRY_RULES, INDUSTRY_DEFAULT),
+    "locale": "en",  # workbook headers = canonical names, read by dashboard_tw as-is
+    "signal_labels": {},  # English signal / QUICK_ACTION value → workbook value
+    "sheets": [
+        # Sheet 1: Daily Signals (sorted by volume strength)
+        {"name": "1_Daily_Signals", "sort": "Vol_vs_Avg",
+         "columns": ['Code', 'Name_CN', 'Name', 'Price', 'Pct_Day', 'Vol_vs_Avg', 'Signal', 'Avg_Trading_Value_B']},
+        # Sheet 2: 21-day Trend (sorted by 1-month gain)
+        {"name": "2_21Day_Trend", "sort": "Pct_1Month",
+         "columns": ['Code', 'Name_CN', 'Name', 'Sector', 'Industry', 'Pct_1Month', 'Money_Flow_Strength', 'Avg_Trading_Value_B']},
+        # Sheet 3: Sector Analysis
+        {"name": "3_Industry_Analysis", "build": tw_sector_sheet},
+        # Sheet 4: My Favorite Stocks with Trading Signals (key indicators ranked by importance)
+        {"name": "4_My_Favorites", "favorites": True,
+         "columns": ['Code', 'Name_CN', 'Name',
+                     'Price', 'Pct_Day', 'Pct_1Month',
+                     'RSI', 'MACD', 'BB_Position', 'Stochastic',
+                     'ATR_Pct', 'Vol_Trend', 'Money_Flow_Strength',
+                     'QUICK_ACTION']},
+    ],
+}
+
+# --- VIETNAM (HOSE / HNX, yfinance symbols CODE.VN, prices in nghìn đồng) ---
+VN_FAVORITES = ["MWG", "BSR", "HAG"]
+
+VN_LABELS = {
+    "Breakout": "Bùng nổ (Breakout)",
+    "Accumulation (Up)": "Tích lũy (Tăng)",
+    "Weak": "Yếu",
+    "🚀 BUY STRONG": "🚀 MUA ĐUỔI",
+    "💰 STRONG INFLOW": "💰 TIỀN VÀO MẠNH",
+    "⚠️ TAKE PROFIT": "⚠️ CHỐT LỜI",
+    "❌ EXIT": "❌ THOÁT HÀNG",
+    "👀 WATCH": "👀 THEO DÕI",
+}
+
+# Sector score (0-100): weighted percentile ranks across sectors
+VN_SECTOR_SCORE_WEIGHTS = {'Avg_Pct_1M': 0.4, 'Avg_Money_Flow': 0.3, 'Total_Trading_Value_B': 0.3}
+VN_SECTOR_RATINGS = ((70, 55, 40), ('🔥 Rất Mạnh', '💪 Mạnh', '⚖️ Trung Bình', '🔻 Yếu'))
+
+
+def vn_sector_sheet(df_full):
+    """🏭 Sheet 3 (VN): sectors ranked by a 0-100 score of momentum, money flow and liquidity"""
+    df_sector = df_full.groupby('Sector', observed=True).agg(
+        Avg_Pct_1M=('Pct_1Month', 'mean'),
+        Avg_Money_Flow=('Money_Flow_Strength', 'mean'),
+        Total_Trading_Value_B=('Avg_Trading_Value_B', 'sum'),
+        Stock_Count=('Code', 'count'),
+    ).reset_index()
+    score = sum(df_sector[column].rank(pct=True) * weight for column, weight in VN_SECTOR_SCORE_WEIGHTS.items())
+    df_sector['Score'] = (score * 100).round(1)
+    df_sector['Rating'] = classify(df_sector['Score'], *VN_SECTOR_RATINGS)
+    df_sector = df_sector.sort_values('Score', ascending=False)
+    df_sector.insert(0, 'Rank', df_sector['Score'].rank(method='dense', ascending=False).astype(int))
+    return df_sector[['Rank', 'Sector', 'Rating', 'Score', 'Avg_Pct_1M', 'Avg_Money_Flow', 'Total_Trading_Value_B', 'Stock_Count']]
+
+
+VN_MARKET = {
+    **TW_MARKET,
+    "market": "VN",
+    "workbook": "Vietnam_Market_Data_Latest.xlsx",
+    "log_file": "stock_vn_debug.log",
+    "currency": "nghìn VND",
+    "price_divisor": 1000,  # Yahoo quotes VND; the workbook shows nghìn đồng
+    "exchange_suffixes": {"VN": "HOSE"},  # HNX names carry their exchange in the master
+    "favorites": VN_FAVORITES,
+    "industry": None,  # Ngành already is the sector
+    "locale": "vi",  # dashboard_vn reads Vietnamese labels
+    "signal_labels": VN_LABELS,
+    "sheets": [
+        {"name": "1_Tin_Hieu_Hom_Nay", "sort": "Vol_vs_Avg",
+         "columns": ['Code', 'Sector', 'Exchange', 'Price', 'Pct_Day', 'Vol_vs_Avg', 'Signal']},
+        # Quadrant 1 only: buying pressure and positive momentum
+        {"name": "2_Xu_Huong_21_Ngay", "sort": "Money_Flow_Strength",
+         "filter": [("Money_Flow_Strength", ">", 1.0), ("Pct_1Month", ">", 0)],
+         "columns": ['Code', 'Sector', 'Exchange', 'Price', 'Pct_1Month', 'Money_Flow_Strength', 'Avg_Trading_Value_B']},
+        {"name": "3_Song_Nganh", "build": vn_sector_sheet},
+        {"name": "4_My_Favorite", "favorites": True,
+         "columns": ['Code', 'Sector', 'Exchange', 'Price', 'Pct_Day', 'Pct_1Month',
+                     'RSI', 'MACD', 'BB_Position', 'Stochastic', 'ATR_Pct', 'Vol_Trend',
+                     'Money_Flow_Strength', 'Vol_vs_Avg', 'Avg_Trading_Value_B', 'QUICK_ACTION']},
+    ],
+}
+
+MARKETS = {config["market"]: config for config in (TW_MARKET, VN_MARKET)}
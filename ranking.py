@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# --- RANKING LAYER (TOP-K LEADERBOARDS WITHOUT FULL SORTS) ---
+# Leaderboards used to sort a whole sheet and keep its head: top volume surges,
+# the Quadrant 1 top 10 by money flow, the 5 worst outflows of a sector. A
+# RankIndex is built once per data version. It sorts each metric once, lazily,
+# and keeps that order as a permutation of row positions.
+# - Order = descending by default, NaN last, ties in row order: the same rows
+#   as sort_values(ascending=False, kind='stable').
+# - Group orders (per sector / industry) come from the same permutation,
+#   partitioned by group once, so a sector's top K is a slice.
+# - Named filters (e.g. Quadrant 1) are precomputed boolean masks. A top K
+#   walks the permutation in growing blocks until K rows pass, so it costs
+#   O(K / share of rows passing), not O(n log n).
+
+FIRST_BLOCK = 64  # permutation positions checked first by a filtered top K (doubles until K rows pass)
+
+
+def sorted_positions(values, ascending=False):
+    """🔢 Row positions of values in sorted order (stable, NaN last)"""
+    keys = np.asarray(values, dtype='float64')
+    return np.argsort(keys if ascending else -keys, kind='stable')
+
+
+def _first_passing(positions, mask, k):
+    """🎯 The first k positions whose mask is set, checking the permutation block by block"""
+    found, start, step = [], 0, max(FIRST_BLOCK, 2 * k)
+    count = 0
+    while start < len(positions) and count < k:
+        block = positions[start:start + step]
+        block = block[mask[block]]
+        found.append(block)
+        count += len(block)
+        start += step
+        step *= 2
+    return np.concatenate(found)[:k] if found else positions[:0]
+
+
+class RankIndex:
+    """🏅 Sorted permutations of one frame per metric (and per group), built once per data version"""
+
+    def __init__(self, frame, by=None, filters=None):
+        self.frame = frame
+        self.by = by
+        self.filters = {name: np.asarray(mask, dtype=bool) for name, mask in (filters or {}).items()}
+        if by is not None:
+            codes, uniques = pd.factorize(frame[by], sort=False)
+            self._codes = codes
+            self._group_codes = {group: code for code, group in enumerate(uniques)}
+        self._orders = {}        # (metric, ascending) → positions
+        self._group_orders = {}  # (metric, ascending) → (positions partitioned by group, group offsets)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def order(self, metric, ascending=False):
+        """📶 Every row position sorted by metric (computed on first use)"""
+        key = (metric, ascending)
+        if key not in self._orders:
+            self._orders[key] = sorted_positions(self.frame[metric], ascending)
+        return self._orders[key]
+
+    def group_order(self, metric, group, ascending=False):
+        """🏭 Row positions of one group (value of `by`) sorted by metric"""
+        key = (metric, ascending)
+        if key not in self._group_orders:
+            positions = self.order(metric, ascending)
+            # A stable sort by group code keeps the metric order inside every group
+            partitioned = positions[np.argsort(self._codes[positions], kind='stable')]
+            offsets = np.concatenate(([0], np.cumsum(np.bincount(self._codes[self._codes >= 0],
+                                                                 minlength=len(self._group_codes)))))
+            # Rows without a group (code -1) sort first: skip them
+            self._group_orders[key] = (partitioned[(self._codes < 0).sum():], offsets)
+        partitioned, offsets = self._group_orders[key]
+        code = self._group_codes.get(group)
+        if code is None:
+            return partitioned[:0]
+        return partitioned[offsets[code]:offsets[code + 1]]
+
+    def count(self, filter=None):
+        """🔢 Rows passing a named filter (all rows without one)"""
+        return int(self.filters[filter].sum()) if filter is not None else len(self.frame)
+
+    def top_positions(self, metric, k=10, ascending=False, group=None, filter=None):
+        positions = self.group_order(metric, group, ascending) if group is not None else self.order(metric, ascending)
+        if filter is None:
+            return positions[:k]
+        mask = self.filters[filter] if isinstance(filter, str) else np.asarray(filter, dtype=bool)
+        return _first_passing(positions, mask, k)
+
+    def top(self, metric, k=10, ascending=False, group=None, filter=None):
+        """🏆 The k rows ranked first by metric (descending by default), optionally in one group / a filter
+
+        filter is the name of a precomputed mask or a boolean array over the rows.
+        """
+        return self.frame.iloc[self.top_positions(metric, k, ascending, group, filter)]
@@ -0,0 +1,160 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# --- RUN PROFILER (STAGE TIMERS, MEMORY, LATENCY HISTOGRAMS, JSON REPORT) ---
+# Always-on parts are cheap: perf_counter/process_time per stage and the peak
+# RSS from getrusage. tracemalloc (Python heap snapshots) and cProfile slow the
+# run down, so they are opt-in (STOCK_TRACEMALLOC=1 / STOCK_PROFILE=1 in the
+# daily script). The report is written beside the workbook as <name>.run.json.
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+TOP_ALLOCATIONS = 10
+TOP_FUNCTIONS = 25
+
+
+def peak_rss_mb():
+    """🧠 Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def latency_summary(samples_ms, buckets=LATENCY_BUCKETS_MS):
+    """📊 Count, percentiles and a bucketed histogram of latencies in ms"""
+    values = np.asarray(samples_ms, dtype=float)
+    if values.size == 0:
+        return {"count": 0}
+    edges = np.asarray(buckets, dtype=float)
+    counts = np.bincount(np.searchsorted(edges, values, side='left'), minlength=len(edges) + 1)
+    labels = [f"<={int(b)}ms" for b in edges] + [f">{int(edges[-1])}ms"]
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+        "histogram": {label: int(n) for label, n in zip(labels, counts) if n},
+    }
+
+
+class RunProfiler:
+    """⏱️ Collects stage timings, memory and latencies for one pipeline run"""
+
+    def __init__(self, name, trace_memory=False, profile=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now()
+        self.stages = []
+        self.latencies = {}
+        self.counters = {}
+        self._open = []  # stages currently running, innermost last
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._profiler = cProfile.Profile() if profile else None
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    @contextmanager
+    def stage(self, name, items=None):
+        """⏱️ Time a block; items (e.g. tickers) adds an amortized per-item latency"""
+        record = {"stage": name, "depth": len(self._open)}
+        self.stages.append(record)
+        if self.trace_memory:
+            # reset_peak would hide the enclosing stage's peak so far - carry it up
+            self._carry_peak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._open.append(record)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            self._open.pop()
+            record["seconds"] = round(time.perf_counter() - wall, 4)
+            record["cpu_seconds"] = round(time.process_time() - cpu, 4)
+            record["peak_rss_mb"] = peak_rss_mb()
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, record.pop("_py_peak", 0))
+                self._carry_peak(peak)
+                record["py_current_mb"] = round(current / 2**20, 2)
+                record["py_peak_mb"] = round(peak / 2**20, 2)
+            if items:
+                record["items"] = int(items)
+                record["per_item_ms"] = round(record["seconds"] * 1000 / items, 4)
+
+    def _carry_peak(self, peak):
+        if self._open:
+            self._open[-1]["_py_peak"] = max(self._open[-1].get("_py_peak", 0), peak)
+
+    def observe(self, name, seconds, count=1):
+        """⏲️ Add count latency samples of seconds each to the named histogram (thread-safe)"""
+        with self._lock:
+            self.latencies.setdefault(name, []).extend([seconds * 1000] * count)
+
+    def count(self, **counters):
+        self.counters.update(counters)
+
+    def top_allocations(self, limit=TOP_ALLOCATIONS):
+        """🔝 Biggest live Python allocations by source line (tracemalloc only)"""
+        if not tracemalloc.is_tracing():
+            return []
+        stats = tracemalloc.take_snapshot().statistics('lineno')[:limit]
+        return [{"where": str(s.traceback[0]), "size_mb": round(s.size / 2**20, 3), "blocks": s.count} for s in stats]
+
+    def report(self):
+        return {
+            "run": self.name,
+            "started_at": self.started_at.isoformat(timespec='seconds'),
+            "total_seconds": round(time.perf_counter() - self._t0, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "latencies": {name: latency_summary(samples) for name, samples in self.latencies.items()},
+            "counters": self.counters,
+            "top_allocations": self.top_allocations() if self.trace_memory else [],
+        }
+
+    def finish(self, workbook_path):
+        """💾 Write <workbook>.run.json (and <workbook>.prof in profile mode); returns the report path"""
+        workbook_path = Path(workbook_path)
+        if self._profiler is not None:
+            self._profiler.disable()
+            prof_path = workbook_path.with_suffix(".prof")
+            self._profiler.dump_stats(prof_path)
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            logger.info(f"🔬 cProfile dump saved: {prof_path}\n{text.getvalue()}")
+
+        report = self.report()
+        report_path = workbook_path.with_suffix(".run.json")
+        report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str), encoding='utf-8')
+
+        slowest = sorted((s for s in self.stages if s["depth"] == 0), key=lambda s: s.get("seconds", 0), reverse=True)[:3]
+        summary = ", ".join(f"{s['stage']} {s.get('seconds', 0):.2f}s" for s in slowest)
+        logger.info(f"⏱️ Run report saved: {report_path} (total {report['total_seconds']:.2f}s; slowest: {summary})")
+        return report_path
@@ -0,0 +1,107 @@
+# --- UNIFIED COLUMN SCHEMA (CANONICAL NAMES, LOCALE LABELS, DTYPES) ---
+# Every column the pipeline produces has one canonical (English) name. Frames
+# keep canonical names end to end; a locale only changes the header labels that
+# are written (workbook headers, artifact columns), so nothing is renamed on the
+# way out and back in. dtypes are applied once at export: float32 for
+# indicators and percentages, categorical for repeated labels. Price and MACD
+# stay float64 (shown with 2-4 decimals).
+#   locale "en" = canonical names, "vi" = Vietnamese labels (dashboard_vn)
+
+LOCALES = ("en", "vi")
+
+SCHEMA = {
+    # Stock identity
+    "Code": {"vi": "Mã"},
+    "Name": {"vi": "Tên Công Ty"},
+    "Name_CN": {"vi": "Tên Công Ty (CN)"},
+    "Sector": {"dtype": "category", "vi": "Ngành"},
+    "Industry": {"dtype": "category", "vi": "Nhóm Ngành"},
+    "Exchange": {"dtype": "category", "vi": "Sàn"},
+    # Daily scan
+    "Price": {"dtype": "float64", "vi": "Giá"},
+    "Pct_Day": {"dtype": "float32", "vi": "%_Ngày"},
+    "Vol_vs_Avg": {"dtype": "float32", "vi": "%_Vol_vs_TB"},
+    "Pct_1Month": {"dtype": "float32", "vi": "%_Tăng_1_Tháng"},
+    "Money_Flow_Strength": {"dtype": "float32", "vi": "Sức_Mạnh_Dòng_Tiền"},
+    "Signal": {"dtype": "category", "vi": "Tín_Hiệu_Ngày"},
+    "Avg_Trading_Value_B": {"dtype": "float32", "vi": "GTGD_TB_Tỷ"},
+    # Professional indicators
+    "RSI": {"dtype": "float32"},
+    "MACD": {"dtype": "float64"},
+    "BB_Position": {"dtype": "float32"},
+    "Stochastic": {"dtype": "float32"},
+    "ATR_Pct": {"dtype": "float32", "vi": "ATR%"},
+    "Vol_Trend": {"dtype": "float32"},
+    "QUICK_ACTION": {"dtype": "category"},
+    # Breadth flags per stock
+    "Above_SMA20": {"dtype": "bool", "vi": "Trên SMA20"},
+    "New_High": {"dtype": "bool", "vi": "Đỉnh 20 Phiên"},
+    "New_Low": {"dtype": "bool", "vi": "Đáy 20 Phiên"},
+    # Sector sheet
+    "Rank": {"dtype": "int32", "vi": "Hạng"},
+    "Rating": {"dtype": "category", "vi": "Đánh Giá"},
+    "Score": {"dtype": "float32", "vi": "Điểm (0-100)"},
+    "Avg_Pct_1M": {"dtype": "float32", "vi": "TB % Tăng (1M)"},
+    "Avg_Money_Flow": {"dtype": "float32", "vi": "Sức Tiền (Avg)"},
+    "Total_Trading_Value_B": {"dtype": "float32", "vi": "Tổng GTGD (Tỷ)"},
+    "Stock_Count": {"dtype": "int32", "vi": "Số Mã"},
+    # Sector rotation (sector_rotation.py)
+    "Breadth": {"dtype": "float32", "vi": "Độ Rộng (%)"},
+    "Rank_Change": {"dtype": "float32", "vi": "Thay Đổi Hạng"},
+    "Momentum_Accel": {"dtype": "float32", "vi": "Gia Tốc Động Lượng"},
+    "Relative_Strength": {"dtype": "float32", "vi": "Sức Mạnh Tương Đối"},
+    "Flow_Trend": {"dtype": "float32", "vi": "Xu Hướng Dòng Tiền"},
+    # Market breadth table (breadth.py)
+    "Advancers": {"dtype": "int32", "vi": "Số Mã Tăng"},
+    "Decliners": {"dtype": "int32", "vi": "Số Mã Giảm"},
+    "Unchanged": {"dtype": "int32", "vi": "Số Mã Đứng Giá"},
+    "AD_Ratio": {"dtype": "float32", "vi": "Tỷ Lệ Tăng/Giảm"},
+    "New_Highs": {"dtype": "int32", "vi": "Số Đỉnh Mới"},
+    "New_Lows": {"dtype": "int32", "vi": "Số Đáy Mới"},
+    "Above_SMA20_Count": {"dtype": "int32", "vi": "Số Mã Trên SMA20"},
+    "Pct_Above_SMA20": {"dtype": "float32", "vi": "% Trên SMA20"},
+    "Volume_Surges": {"dtype": "int32", "vi": "Số Mã Đột Biến KL"},
+    "Quadrant_1": {"dtype": "int32", "vi": "Số Mã Phần Tư 1"},
+    "Strong_1M": {"dtype": "int32", "vi": "Số Mã Tăng Mạnh 1M"},
+    "Avg_Pct_Day": {"dtype": "float32", "vi": "TB % Ngày"},
+    "MF_P10": {"dtype": "float32", "vi": "Dòng Tiền P10"},
+    "MF_P25": {"dtype": "float32", "vi": "Dòng Tiền P25"},
+    "MF_Median": {"dtype": "float32", "vi": "Dòng Tiền Trung Vị"},
+    "MF_P75": {"dtype": "float32", "vi": "Dòng Tiền P75"},
+    "MF_P90": {"dtype": "float32", "vi": "Dòng Tiền P90"},
+}
+
+# Any known label (any locale) → canonical name
+CANONICAL = {field.get(locale, name): name for name, field in SCHEMA.items() for locale in LOCALES}
+CANONICAL.update({name: name for name in SCHEMA})
+
+
+def label(name, locale="en"):
+    """🏷️ Header label of a canonical column in a locale (unknown columns keep their name)"""
+    return SCHEMA.get(name, {}).get(locale, name) if locale != "en" else name
+
+
+def labels(names, locale="en"):
+    return [label(name, locale) for name in names]
+
+
+def relabel(columns, locale="en"):
+    """🔁 Column labels of any locale → the same columns labelled in locale"""
+    return [label(CANONICAL.get(column, column), locale) for column in columns]
+
+
+def dtypes(columns):
+    """🧬 {column: dtype} for the columns (canonical or labelled) that the schema types"""
+    types = {}
+    for column in columns:
+        dtype = SCHEMA.get(CANONICAL.get(column, column), {}).get("dtype")
+        if dtype:
+            types[column] = dtype
+    return types
+
+
+def conform(frame, locale="en"):
+    """📐 Frame with schema dtypes and headers in locale (export side: one copy, at ingestion)"""
+    frame = frame.astype(dtypes(frame.columns))
+    frame.columns = labels(frame.columns, locale)
+    return frame
@@ -0,0 +1,281 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import schema
+from ranking import RankIndex
+from signal_rules import OPERATORS
+
+# --- SCREENER (COMPOSABLE PREDICATES OVER THE DAILY RESULTS TABLE) ---
+# The pipeline writes every results row with all indicator columns as the
+# "screener" Arrow artifact. A query is a list of signal_rules conditions
+# (column, op, operand), or the same as text: "RSI < 30 and Money_Flow_Strength > 1.2".
+# Columns may be given by any schema label (e.g. Vietnamese headers).
+# - Numeric columns get a sorted column index: an argsort permutation plus the
+#   sorted values, built on first use. All bounds on one column merge into one
+#   interval, and two binary searches turn it into a slice of the permutation.
+#   The slice length is the match count, found without touching the rows.
+# - Label columns (Sector, Signal, bool flags) get one bitmap per value, from
+#   their dictionary codes.
+# - A query starts from its most selective predicate and tests the others
+#   only on the remaining candidate rows. Results are sorted through a
+#   ranking.RankIndex.
+# - Results sit in an LRU cache keyed by the normalized query, so repeated
+#   screens are dict lookups. Normalizing means canonical columns, bounds
+#   merged per column and predicates sorted. One ScreenerIndex serves one data
+#   version, so the cache never outlives its data.
+
+SCREENER_SHEET = "screener"
+SCREEN_CACHE_SIZE = 256
+LABEL_OPERATORS = ("==", "!=", "in")
+
+# Ready-made screens (canonical column names)
+SCREENER_PRESETS = {
+    "Quadrant 1 (inflow + momentum)": "Money_Flow_Strength > 1.0 and Pct_1Month > 0",
+    "Oversold with inflow": "RSI < 35 and Money_Flow_Strength > 1.0",
+    "Volume breakout": "Vol_vs_Avg >= 150 and Pct_Day > 0",
+    "Overbought, upper band": "RSI > 70 and BB_Position > 90",
+    "Quiet accumulation": "ATR_Pct < 3 and Vol_Trend > 20 and Above_SMA20 == true",
+    "New 20-day highs": "New_High == true",
+}
+
+_CONDITION = re.compile(r"^(?P<column>.+?)\s*(?P<op>>=|<=|!=|==|=|>|<|\s+in\s+)\s*(?P<value>.+)$", re.IGNORECASE)
+_SEPARATOR = re.compile(r"\s+and\s+|;", re.IGNORECASE)  # not "&": industry names contain it
+
+
+def parse_query(text):
+    """📝 Query text → [(column, op, value)]: conditions joined by 'and' / ';', e.g. 'Sector in Foundry, IC Design'"""
+    conditions = []
+    for part in _SEPARATOR.split(text or ""):
+        if not part.strip():
+            continue
+        match = _CONDITION.match(part.strip())
+        if not match:
+            raise ValueError(f"Cannot read condition '{part.strip()}' (expected: column op value)")
+        op = match["op"].strip().lower()
+        op = "==" if op == "=" else op
+        value = match["value"].strip()
+        if op == "in":
+            value = [item.strip().strip("'\"") for item in value.split(",") if item.strip()]
+        else:
+            value = value.strip("'\"")
+        conditions.append((match["column"].strip(), op, value))
+    return conditions
+
+
+def _number(value):
+    """🔢 Operand → float (ValueError for text that is not a number)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{value}' is not a number") from None
+
+
+class ScreenerIndex:
+    """🔎 Column indexes + result cache over one results table (one instance per data version)"""
+
+    def __init__(self, frame, cache_size=SCREEN_CACHE_SIZE):
+        self.frame = frame.reset_index(drop=True)
+        self.ranks = RankIndex(self.frame)
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._floats = {}   # column → float64 values in row order
+        self._sorted = {}   # column → (permutation of non-NaN rows, sorted values)
+        self._labels = {}   # column → (codes, {value: code}, bitmaps by code)
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        # Any schema label, or the column name in any case → column of the frame
+        self._columns = {}
+        for column in self.frame.columns:
+            for alias in (column, schema.CANONICAL.get(column, column), schema.label(column, "vi")):
+                self._columns.setdefault(alias.lower(), column)
+        for alias, name in schema.CANONICAL.items():
+            if name in self.frame.columns:
+                self._columns.setdefault(alias.lower(), name)
+
+    def __len__(self):
+        return len(self.frame)
+
+    # --- Columns ---
+    def column(self, name):
+        column = self._columns.get(str(name).strip().lower())
+        if column is None:
+            raise ValueError(f"Unknown column '{name}'")
+        return column
+
+    def is_numeric(self, column):
+        dtype = self.frame[column].dtype
+        return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+    def numeric_columns(self):
+        return [column for column in self.frame.columns if self.is_numeric(column)]
+
+    def label_columns(self):
+        return [column for column in self.frame.columns if not self.is_numeric(column)]
+
+    def label_values(self, column):
+        """🏷️ The distinct values of a label column (for pickers)"""
+        return list(self._label_index(column)[1])
+
+    # --- Indexes (built on first use) ---
+    def _values(self, column):
+        if column not in self._floats:
+            self._floats[column] = self.frame[column].to_numpy(dtype='float64', na_value=np.nan)
+        return self._floats[column]
+
+    def _sorted_index(self, column):
+        if column not in self._sorted:
+            values = self._values(column)
+            order = np.argsort(values, kind='stable')
+            order = order[:np.count_nonzero(~np.isnan(values))]  # NaN sorts last and never matches
+            self._sorted[column] = (order, values[order])
+        return self._sorted[column]
+
+    def _label_index(self, column):
+        if column not in self._labels:
+            codes, uniques = pd.factorize(self.frame[column], sort=True)
+            self._labels[column] = (codes, {value: code for code, value in enumerate(uniques)}, {})
+        return self._labels[column]
+
+    def _bitmap(self, column, value):
+        codes, lookup, bitmaps = self._label_index(column)
+        code = lookup.get(value)
+        if code is None:
+            return np.zeros(len(codes), dtype=bool)
+        if code not in bitmaps:
+            bitmaps[code] = codes == code
+        return bitmaps[code]
+
+    def _label(self, column, value):
+        """🏷️ Operand of a label column in the column's type (bool flags accept true/false)"""
+        if pd.api.types.is_bool_dtype(self.frame[column].dtype):
+            text = str(value).strip().lower()
+            if text not in ("true", "false", "1", "0"):
+                raise ValueError(f"'{value}' is not true / false (column {column})")
+            return text in ("true", "1")
+        return str(value)
+
+    # --- Queries ---
+    def normalize(self, query):
+        """🧹 Query (text or conditions) → hashable canonical form: sorted predicates, one interval per column
+
+        Predicates: ("range", column, low, low inclusive, high, high inclusive),
+        ("in" / "not in", column, values), ("compare", column, op, other column).
+        """
+        conditions = parse_query(query) if isinstance(query, str) else list(query)
+        bounds, allowed, excluded, compares = {}, {}, {}, set()
+        for name, op, operand in conditions:
+            column = self.column(name)
+            if self.is_numeric(column):
+                if op not in OPERATORS:
+                    raise ValueError(f"Operator '{op}' is not available for the numeric column {column}")
+                if isinstance(operand, str) and operand.strip().lower() in self._columns:
+                    compares.add(("compare", column, op, self.column(operand)))
+                    continue
+                value = _number(operand)
+                low, low_in, high, high_in = bounds.get(column, (-np.inf, True, np.inf, True))
+                if op in (">", ">=", "==") and (value > low or (value == low and op == ">")):
+                    low, low_in = value, op != ">"
+                if op in ("<", "<=", "==") and (value < high or (value == high and op == "<")):
+                    high, high_in = value, op != "<"
+                bounds[column] = (low, low_in, high, high_in)
+            else:
+                if op not in LABEL_OPERATORS:
+                    raise ValueError(f"Operator '{op}' is not available for the label column {column} (use ==, != or in)")
+                values = {self._label(column, value) for value in (operand if op == "in" else [operand])}
+                if op == "!=":
+                    excluded[column] = excluded.get(column, set()) | values
+                else:
+                    allowed[column] = allowed[column] & values if column in allowed else values
+        predicates = [("range", column, *bound) for column, bound in bounds.items()]
+        predicates += [("in", column, tuple(sorted(values, key=str))) for column, values in allowed.items()]
+        predicates += [("not in", column, tuple(sorted(values, key=str))) for column, values in excluded.items()]
+        predicates += sorted(compares)
+        return tuple(sorted(predicates, key=lambda predicate: (predicate[1], predicate[0], str(predicate[2:]))))
+
+    def _range_slice(self, predicate):
+        _, column, low, low_in, high, high_in = predicate
+        order, values = self._sorted_index(column)
+        start = np.searchsorted(values, low, side='left' if low_in else 'right')
+        stop = np.searchsorted(values, high, side='right' if high_in else 'left')
+        return order[start:max(start, stop)]
+
+    def _estimate(self, predicate):
+        """📏 Upper bound of the rows a predicate keeps (exact for ranges and label sets)"""
+        kind, column = predicate[0], predicate[1]
+        if kind == "range":
+            return len(self._range_slice(predicate))
+        if kind == "in":
+            return sum(int(self._bitmap(column, value).sum()) for value in predicate[2])
+        return len(self.frame)
+
+    def _keep(self, predicate, positions):
+        """✂️ The positions (ascending) that satisfy one predicate"""
+        kind, column = predicate[0], predicate[1]
+        if kind == "range":
+            _, _, low, low_in, high, high_in = predicate
+            values = self._values(column)[positions]
+            keep = (values >= low if low_in else values > low) & (values <= high if high_in else values < high)
+        elif kind in ("in", "not in"):
+            keep = np.zeros(len(positions), dtype=bool)
+            for value in predicate[2]:
+                keep |= self._bitmap(column, value)[positions]
+            keep = keep if kind == "in" else ~keep
+        else:
+            _, _, op, other = predicate
+            keep = np.asarray(OPERATORS[op](self._values(column)[positions], self._values(other)[positions]), dtype=bool)
+        return positions[keep]
+
+    def match(self, predicates):
+        """🎯 Row positions (ascending) matching every normalized predicate"""
+        if not predicates:
+            return np.arange(len(self.frame))
+        ordered = sorted(predicates, key=self._estimate)
+        first, rest = ordered[0], ordered[1:]
+        if first[0] == "range":
+            positions = np.sort(self._range_slice(first))
+        else:
+            positions = self._keep(first, np.arange(len(self.frame)))
+        for predicate in rest:
+            if not len(positions):
+                break
+            positions = self._keep(predicate, positions)
+        return positions
+
+    def screen(self, query, sort=None, ascending=False, limit=None):
+        """🔎 Rows matching a query (text or conditions), optionally ranked by a column and cut to limit
+
+        Returns (rows, info): info = {"matches": rows before the limit, "cached": bool, "ms": query time}.
+        """
+        started = time.perf_counter()
+        sort = self.column(sort) if sort else None
+        key = (self.normalize(query), sort, bool(ascending), limit)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+        hit = cached is not None
+        if not hit:
+            positions = self.match(key[0])
+            matches = len(positions)
+            if sort is not None:
+                mask = np.zeros(len(self.frame), dtype=bool)
+                mask[positions] = True
+                positions = self.ranks.top_positions(sort, matches if limit is None else limit, ascending, filter=mask)
+            elif limit is not None:
+                positions = positions[:limit]
+            cached = (positions, matches)
+            with self._lock:
+                self.misses += 1
+                self._results[key] = cached
+                while len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+        positions, matches = cached
+        info = {"matches": matches, "cached": hit, "ms": (time.perf_counter() - started) * 1000}
+        return self.frame.iloc[positions], info
@@ -0,0 +1,161 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from snapshot_store import SNAPSHOT_DIR
+
+logger = logging.getLogger(__name__)
+
+# --- SECTOR ROTATION (INCREMENTAL PER-SECTOR TIME SERIES) ---
+# Sheet 3 groups one day of results by sector. Here every stored trading day is
+# reduced once to additive per-sector sums: stock count, summed 1M return, money
+# flow and trading value, advancers / decliners / inflow stocks. They are kept in
+# <snapshots>/<market>/<by>_daily.parquet, beside the snapshots they come from.
+# - A run only groups the days the table does not have yet (plus the last
+#   known day, which a repeated run may have rewritten).
+# - Means, breadth and market totals are derived from the sums: market = sum
+#   over sectors, so no ticker rows are re-read.
+# - Rotation metrics only touch the last `lookback` + 1 days of the small
+#   sector × day table, so their cost does not grow with history depth.
+
+SNAPSHOT_COLUMNS = ['Pct_Day', 'Pct_1Month', 'Money_Flow_Strength', 'Avg_Trading_Value_B']
+SUM_COLUMNS = ['Stock_Count', 'Sum_Pct_1M', 'Sum_Money_Flow', 'Total_Trading_Value_B', 'Advancers', 'Decliners', 'Inflow']
+DEFAULT_LOOKBACK = 5  # trading days between the two rankings compared
+
+
+def sector_day_sums(rows, by='Sector'):
+    """🧮 Additive (Date, sector) sums of snapshot rows"""
+    flags = pd.DataFrame({
+        'Date': rows['Date'],
+        by: rows[by],
+        'Code': rows['Code'],
+        'Pct_1Month': rows['Pct_1Month'].astype('float64'),
+        'Money_Flow_Strength': rows['Money_Flow_Strength'].astype('float64'),
+        'Avg_Trading_Value_B': rows['Avg_Trading_Value_B'].astype('float64'),
+        'Advancers': (rows['Pct_Day'] > 0).astype('int32'),
+        'Decliners': (rows['Pct_Day'] < 0).astype('int32'),
+        'Inflow': (rows['Money_Flow_Strength'] > 1.0).astype('int32'),
+    })
+    sums = flags.groupby(['Date', by], observed=True).agg(
+        Stock_Count=('Code', 'count'),
+        Sum_Pct_1M=('Pct_1Month', 'sum'),
+        Sum_Money_Flow=('Money_Flow_Strength', 'sum'),
+        Total_Trading_Value_B=('Avg_Trading_Value_B', 'sum'),
+        Advancers=('Advancers', 'sum'),
+        Decliners=('Decliners', 'sum'),
+        Inflow=('Inflow', 'sum'),
+    ).reset_index()
+    sums[by] = sums[by].astype(str)
+    return sums
+
+
+def _means(sums, by):
+    """📐 Sums → per-sector means and breadth (%)"""
+    count = sums['Stock_Count']
+    return pd.DataFrame({
+        'Date': sums['Date'],
+        by: sums[by],
+        'Avg_Pct_1M': sums['Sum_Pct_1M'] / count,
+        'Avg_Money_Flow': sums['Sum_Money_Flow'] / count,
+        'Total_Trading_Value_B': sums['Total_Trading_Value_B'],
+        'Breadth': sums['Advancers'] / count * 100,
+        'Stock_Count': count,
+    })
+
+
+class SectorRotation:
+    """🔄 Per-sector daily aggregates of one market, extended day by day from the snapshot store"""
+
+    def __init__(self, market, root=SNAPSHOT_DIR, by='Sector'):
+        self.market = market.lower()
+        self.by = by
+        self.path = Path(root) / self.market / f"{by.lower()}_daily.parquet"
+        self._daily = None
+
+    @property
+    def daily(self):
+        """📅 Long (Date, sector, sums...) table, sorted by date"""
+        if self._daily is None:
+            if self.path.exists():
+                self._daily = pd.read_parquet(self.path)
+            else:
+                self._daily = pd.DataFrame(columns=['Date', self.by] + SUM_COLUMNS).astype({'Date': 'datetime64[us]'})
+        return self._daily
+
+    @property
+    def dates(self):
+        return list(pd.DatetimeIndex(self.daily['Date'].unique()).sort_values())
+
+    def update(self, store):
+        """➕ Aggregate the snapshot days the table does not have yet; returns the number of days aggregated
+
+        The last known day is aggregated again: a repeated run rewrites that day's snapshot.
+        """
+        known = self.dates
+        new_dates = [day for day in store.dates if not known or day >= known[-1]]
+        if not new_dates:
+            return 0
+
+        rows = store.history(start=new_dates[0], days=None, columns=[self.by] + SNAPSHOT_COLUMNS)
+        sums = sector_day_sums(rows, self.by)
+        kept = self.daily[~self.daily['Date'].isin(new_dates)]
+        daily = pd.concat([kept, sums], ignore_index=True) if len(kept) else sums
+        self._daily = daily.sort_values(['Date', self.by], kind='stable').reset_index(drop=True)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._daily.to_parquet(self.path, index=False)
+        logger.info(f"🔄 Sector rotation updated: {len(new_dates)} days aggregated, {self._daily[self.by].nunique()} "
+                    f"{self.by.lower()}s × {self._daily['Date'].nunique()} days → {self.path.name}")
+        return len(new_dates)
+
+    def market_series(self, days=None):
+        """🌐 Whole-market means per day (summed over sectors)"""
+        daily = self.daily
+        if days is not None:
+            daily = daily[daily['Date'].isin(self.dates[-days:])]
+        totals = daily.groupby('Date')[SUM_COLUMNS].sum()
+        totals[self.by] = "Market"
+        return _means(totals.reset_index(), self.by).set_index('Date')
+
+    def metrics(self, lookback=DEFAULT_LOOKBACK, date=None):
+        """📊 One row per sector on date (default: last day) with rotation metrics vs `lookback` days earlier
+
+        Rank: by average 1M return (1 = strongest). Rank_Change: places gained.
+        Momentum_Accel: change of the average 1M return. Relative_Strength: average
+        1M return minus the market's. Flow_Trend: mean money flow over the window.
+        """
+        dates = self.dates
+        if date is not None:
+            dates = [day for day in dates if day <= pd.Timestamp(date)]
+        if not dates:
+            return pd.DataFrame()
+        window = dates[-(lookback + 1):]
+        recent = self.daily[self.daily['Date'].isin(window)]
+        means = _means(recent, self.by)
+
+        today = means[means['Date'] == window[-1]].set_index(self.by)
+        before = means[means['Date'] == window[0]].set_index(self.by)
+        ranks = today['Avg_Pct_1M'].rank(method='min', ascending=False)
+        ranks_before = before['Avg_Pct_1M'].rank(method='min', ascending=False).reindex(today.index)
+        totals = recent[recent['Date'] == window[-1]][SUM_COLUMNS].sum()
+        market_pct_1m = totals['Sum_Pct_1M'] / totals['Stock_Count'] if totals['Stock_Count'] else np.nan
+
+        result = today.drop(columns='Date')
+        result.insert(0, 'Rank', ranks.astype('int32'))
+        result['Rank_Change'] = ranks_before - ranks if len(window) > 1 else np.nan
+        result['Momentum_Accel'] = today['Avg_Pct_1M'] - before['Avg_Pct_1M'].reindex(today.index) if len(window) > 1 else np.nan
+        result['Relative_Strength'] = today['Avg_Pct_1M'] - market_pct_1m
+        result['Flow_Trend'] = means.groupby(self.by)['Avg_Money_Flow'].mean().reindex(today.index)
+        return result.sort_values('Rank').reset_index()
+
+    def series(self, column='Avg_Pct_1M', days=None):
+        """📈 Date × sector table of a derived column (Avg_Pct_1M, Avg_Money_Flow, Breadth, Rank, ...)"""
+        daily = self.daily
+        if days is not None:
+            daily = daily[daily['Date'].isin(self.dates[-days:])]
+        means = _means(daily, self.by)
+        if column == 'Rank':
+            means['Rank'] = means.groupby('Date')['Avg_Pct_1M'].rank(method='min', ascending=False)
+        return means.pivot(index='Date', columns=self.by, values=column)
@@ -0,0 +1,92 @@
+import pandas as pd
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# --- SECURITY MASTER (LISTED NAMES LOADED FROM A LOCAL CSV/PARQUET FILE) ---
+# One row per ticker: Ticker, Code, Name, Name_CN, Sector, Exchange. Lookups by
+# bare code, full ticker and sector are dict/index based, so the universe can be
+# the whole TWSE + TPEx listing without scanning the list for every lookup.
+
+SECURITY_MASTER_DIR = Path(__file__).resolve().parent / "market_data" / "securities"
+MASTER_COLUMNS = ['Ticker', 'Code', 'Name', 'Name_CN', 'Sector', 'Exchange']
+EXCHANGE_BY_SUFFIX = {"TW": "TWSE", "TWO": "TPEx"}
+
+
+def bare_code(ticker):
+    """🔤 '2330.TW' → '2330'"""
+    return str(ticker).split(".")[0]
+
+
+class SecurityMaster:
+    """📇 Indexed table of listed securities for one market"""
+
+    def __init__(self, frame, exchange_by_suffix=EXCHANGE_BY_SUFFIX):
+        frame = frame.copy()
+        frame['Ticker'] = frame['Ticker'].astype(str)
+        if 'Code' not in frame.columns:
+            frame['Code'] = frame['Ticker'].map(bare_code)
+        frame['Code'] = frame['Code'].astype(str)
+        if 'Exchange' not in frame.columns:
+            frame['Exchange'] = frame['Ticker'].str.split(".").str[-1].map(exchange_by_suffix)
+        frame = frame.reindex(columns=MASTER_COLUMNS).drop_duplicates(subset='Ticker', keep='last')
+        self.frame = frame.set_index('Ticker', drop=False)
+
+        self._by_code = dict(zip(self.frame['Code'], self.frame['Ticker']))
+        self._by_sector = self.frame.groupby('Sector', sort=False)['Ticker'].agg(list).to_dict()
+
+    @classmethod
+    def load(cls, path, exchange_by_suffix=EXCHANGE_BY_SUFFIX):
+        """📂 Load a master file (.csv or .parquet); exchanges not in the file come from the ticker suffix"""
+        path = Path(path)
+        if path.suffix == ".parquet":
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path, dtype=str, encoding='utf-8')
+        master = cls(frame, exchange_by_suffix)
+        logger.info(f"📇 Security master loaded: {len(master)} securities from {path.name}")
+        return master
+
+    @classmethod
+    def for_market(cls, market, root=SECURITY_MASTER_DIR, exchange_by_suffix=EXCHANGE_BY_SUFFIX):
+        """📂 Default master of a market: <root>/<market>_securities.parquet or .csv"""
+        root = Path(root)
+        for suffix in (".parquet", ".csv"):
+            path = root / f"{market.lower()}_securities{suffix}"
+            if path.exists():
+                return cls.load(path, exchange_by_suffix)
+        raise FileNotFoundError(f"No security master for {market} in {root}")
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, ticker):
+        return ticker in self.frame.index
+
+    @property
+    def tickers(self):
+        return list(self.frame['Ticker'])
+
+    def resolve(self, code):
+        """🔎 Bare code (or full ticker) → full ticker, None if unknown"""
+        code = str(code)
+        if code in self.frame.index:
+            return code
+        return self._by_code.get(code)
+
+    def get(self, ticker):
+        """🔎 Row of a ticker as a dict ({} if unknown)"""
+        if ticker not in self.frame.index:
+            return {}
+        return self.frame.loc[ticker].to_dict()
+
+    def by_sector(self, sector):
+        return list(self._by_sector.get(sector, []))
+
+    def sectors(self):
+        return list(self._by_sector)
+
+    def lookup(self, tickers):
+        """📋 Master rows aligned to tickers (unknown tickers come back as NaN rows)"""
+        return self.frame.reindex(tickers)
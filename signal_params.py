@@ -0,0 +1,53 @@
+import hashlib
+import itertools
+import json
+
+# --- INDICATOR / SIGNAL PARAMETERS ---
+# Every window and threshold used by the daily run, in one plain dict. The
+# defaults reproduce the published numbers; sweeps pass modified copies.
+
+DEFAULT_PARAMS = {
+    # Indicator windows (bars)
+    "rsi_window": 14,
+    "ema_fast": 12,
+    "ema_slow": 26,
+    "ema_signal": 9,
+    "bb_window": 20,  # also the SMA of the daily signal
+    "bb_std": 2.0,
+    "stoch_window": 14,
+    "atr_window": 14,
+    "vol_fast": 5,
+    "vol_slow": 20,
+    "month_bars": 20,  # Pct_1Month compares with the close this many bars back
+    "high_low_window": 20,  # a new high / low is the highest / lowest bar of this window
+    # QUICK_ACTION thresholds
+    "buy_strong_pct_day": 1.8,
+    "buy_strong_vol_pct": 150,
+    "inflow_money_flow": 2.0,
+    "take_profit_pct_1m": 20,
+    "take_profit_pct_day": -1.5,
+    "exit_pct_day": -3,
+    "exit_vol_pct": 130,
+}
+
+
+def make_params(**overrides):
+    """⚙️ DEFAULT_PARAMS with overrides (unknown names are an error)"""
+    unknown = set(overrides) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise KeyError(f"Unknown parameters: {sorted(unknown)}")
+    return {**DEFAULT_PARAMS, **overrides}
+
+
+def params_hash(params, *extra):
+    """🔑 Stable short hash of a parameter set (plus any extra key parts)"""
+    payload = json.dumps([make_params(**params), list(extra)], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def param_grid(base=None, **axes):
+    """🧪 Cartesian product of axes, e.g. param_grid(rsi_window=[9, 14], exit_pct_day=[-3, -4])"""
+    base = make_params(**(base or {}))
+    names = list(axes)
+    return [make_params(**{**base, **dict(zip(names, values))})
+            for values in itertools.product(*(axes[n] for n in names))]
@@ -0,0 +1,59 @@
+import operator
+
+import numpy as np
+import pandas as pd
+
+from signal_params import DEFAULT_PARAMS
+
+# --- DECLARATIVE SIGNAL RULES (EVALUATED AS COLUMN MASKS WITH np.select) ---
+# A rule set is an ordered list of (label, conditions); the first rule whose
+# conditions all hold wins, otherwise the default label. A condition is
+# (column, op, operand) where operand is a number or another column name.
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+}
+
+
+def quick_action_rules(params):
+    """🤖 Trading action rules per stock (column names as in the results frame)"""
+    p = params
+    return [
+        ("🚀 BUY STRONG", [("Pct_Day", ">", p["buy_strong_pct_day"]), ("Vol_vs_Avg", ">", p["buy_strong_vol_pct"])]),
+        ("💰 STRONG INFLOW", [("Money_Flow_Strength", ">", p["inflow_money_flow"])]),
+        ("⚠️ TAKE PROFIT", [("Pct_1Month", ">", p["take_profit_pct_1m"]), ("Pct_Day", "<", p["take_profit_pct_day"])]),
+        ("❌ EXIT", [("Pct_Day", "<", p["exit_pct_day"]), ("Vol_vs_Avg", ">", p["exit_vol_pct"])]),
+    ]
+
+
+QUICK_ACTION_RULES = quick_action_rules(DEFAULT_PARAMS)
+QUICK_ACTION_DEFAULT = "👀 WATCH"
+
+# 📈 Daily signal from price vs SMA20 and volume vs its 20-day average
+DAILY_SIGNAL_RULES = [
+    ("Breakout", [("Price", ">", "SMA_20"), ("Volume", ">", "Vol_Avg_20")]),
+    ("Accumulation (Up)", [("Price", ">", "SMA_20")]),
+]
+DAILY_SIGNAL_DEFAULT = "Weak"
+
+
+def rule_mask(frame, conditions):
+    """✅ Boolean array: rows where every condition holds (NaN compares False)"""
+    mask = np.ones(len(frame), dtype=bool)
+    for column, op, operand in conditions:
+        right = frame[operand] if isinstance(operand, str) else operand
+        mask &= np.asarray(OPERATORS[op](frame[column], right), dtype=bool)
+    return mask
+
+
+def evaluate_rules(frame, rules, default):
+    """🏷️ Label every row of frame with the first matching rule (vectorized)"""
+    if not rules:
+        return pd.Series(default, index=frame.index)
+    masks = [rule_mask(frame, conditions) for _, conditions in rules]
+    labels = [label for label, _ in rules]
+    return pd.Series(np.select(masks, labels, default=default), index=frame.index)
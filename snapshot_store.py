@@ -0,0 +1,201 @@
+import bisect
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+import schema
+
+logger = logging.getLogger(__name__)
+
+# --- DAILY SNAPSHOT STORE (APPEND-ONLY, DATE-PARTITIONED PARQUET) ---
+# The workbook is a point-in-time view that the next run overwrites. Every run
+# also appends its per-ticker results rows here, so the dashboards can show how
+# money flow and signals evolved over N days.
+# Layout under market_data/snapshots/<market>/:
+#   days/<YYYY-MM-DD>.parquet   one partition per trading day of the open month
+#   months/<YYYY-MM>.parquet    closed months, compacted into one file each
+#   index.json                  trading dates of every compacted month
+# - Stored rows never change. The only rewrite is the current day when a run is
+#   repeated. When a new month starts, the previous month's days are merged
+#   into its month file, so a year of history is about 13 files.
+# - Codes, sectors and signal labels are dictionary-encoded with int32 indices
+#   (pandas would pick int8 or int16 by the day's value count, and Arrow cannot
+#   scan partitions of mixed widths together). Numbers use the schema dtypes (float32). Files are zstd-compressed and sorted by Code, so the
+#   row-group statistics let a scan for a few tickers skip most of each file.
+# - The sorted trading dates are the range-scan index: a window of N days is
+#   found by binary search and only the partitions it overlaps are opened.
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "market_data" / "snapshots"
+INDEX_NAME = "index.json"
+SNAPSHOT_DROP = ['Name', 'Name_CN']  # names live in the security master
+DICTIONARY_COLUMNS = ['Code', 'Sector', 'Industry', 'Exchange', 'Signal', 'QUICK_ACTION']
+MONTH_ROW_GROUP_SIZE = 64 * 1024  # rows per row group of a month file
+
+
+class SnapshotStore:
+    """🗄️ Daily results snapshots of one market, queried by date range, ticker or sector"""
+
+    def __init__(self, market, root=SNAPSHOT_DIR):
+        self.market = market.lower()
+        self.folder = Path(root) / self.market
+        self._months = None
+
+    # --- Index ---
+    @property
+    def months(self):
+        """🗂️ {'YYYY-MM': [trading dates]} of the compacted months"""
+        if self._months is None:
+            index_path = self.folder / INDEX_NAME
+            self._months = {}
+            if index_path.exists():
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    self._months = {month: [pd.Timestamp(day) for day in days] for month, days in json.load(f).items()}
+        return self._months
+
+    def day_dates(self):
+        folder = self.folder / "days"
+        return sorted(pd.Timestamp(path.stem) for path in folder.glob("*.parquet")) if folder.exists() else []
+
+    @property
+    def dates(self):
+        """📅 Every stored trading date, sorted"""
+        return sorted([day for days in self.months.values() for day in days] + self.day_dates())
+
+    def day_path(self, date):
+        return self.folder / "days" / f"{pd.Timestamp(date):%Y-%m-%d}.parquet"
+
+    def month_path(self, month):
+        return self.folder / "months" / f"{month}.parquet"
+
+    def _save_index(self):
+        with open(self.folder / INDEX_NAME, 'w', encoding='utf-8') as f:
+            json.dump({month: [f"{day:%Y-%m-%d}" for day in days] for month, days in sorted(self.months.items())}, f, indent=1)
+
+    # --- Write ---
+    def append(self, df_results, date):
+        """➕ Store the results rows of one trading day; returns the partition path (None if refused)"""
+        import pyarrow as pa
+
+        date = pd.Timestamp(date).normalize()
+        dates = self.dates
+        if dates and date < dates[-1]:
+            logger.warning(f"⚠️ Snapshot {date:%Y-%m-%d} is older than the last stored day "
+                           f"{dates[-1]:%Y-%m-%d} - not written (append-only)")
+            return None
+
+        frame = schema.conform(df_results.drop(columns=SNAPSHOT_DROP, errors='ignore'))
+        frame = frame.astype({column: 'category' for column in DICTIONARY_COLUMNS if column in frame.columns})
+        frame = frame.sort_values('Code').reset_index(drop=True)
+        frame.insert(0, 'Date', date)
+
+        path = self.day_path(date)
+        _write(pa.Table.from_pandas(frame, preserve_index=False), path)
+        logger.info(f"🗄️ Snapshot saved: {len(frame)} rows → {self.market}/days/{path.name}")
+        self.compact(before=date)
+        return path
+
+    def compact(self, before):
+        """🗜️ Merge the day partitions of every month before `before`'s month into month files"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        current = f"{pd.Timestamp(before):%Y-%m}"
+        closed = {}
+        for day in self.day_dates():
+            if f"{day:%Y-%m}" < current:
+                closed.setdefault(f"{day:%Y-%m}", []).append(day)
+        for month, days in closed.items():
+            tables = [pq.read_table(self.day_path(day)) for day in days]
+            if month in self.months:  # a late partition of an already compacted month
+                tables.insert(0, pq.read_table(self.month_path(month)))
+            table = pa.concat_tables(tables, promote_options="permissive").unify_dictionaries()
+            # Arrow cannot sort dictionary columns: order by the decoded codes, then take
+            order = pc.sort_indices(pa.table({'Code': table['Code'].cast(pa.string()), 'Date': table['Date']}),
+                                    sort_keys=[('Code', 'ascending'), ('Date', 'ascending')])
+            table = table.take(order).combine_chunks()
+            _write(table, self.month_path(month), row_group_size=MONTH_ROW_GROUP_SIZE)
+            self.months[month] = sorted(set(self.months.get(month, [])) | set(days))
+            self._save_index()
+            for day in days:
+                self.day_path(day).unlink()
+            logger.info(f"🗜️ Snapshots compacted: {len(days)} days → {self.market}/months/{month}.parquet ({table.num_rows} rows)")
+
+    # --- Read ---
+    def window(self, days=None, start=None, end=None):
+        """🔎 Trading dates of a range: the last `days` stored days up to end, or start..end"""
+        dates = self.dates
+        hi = bisect.bisect_right(dates, pd.Timestamp(end).normalize()) if end is not None else len(dates)
+        lo = bisect.bisect_left(dates, pd.Timestamp(start).normalize()) if start is not None else 0
+        if days is not None:
+            lo = max(lo, hi - days)
+        return dates[lo:hi]
+
+    def history(self, codes=None, sectors=None, days=21, start=None, end=None, columns=None):
+        """📈 Long frame (Date, Code, ...) of the snapshot rows in a range, sorted by Code then Date
+
+        codes / sectors restrict the rows (a pushed-down filter), columns the fields read.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        dates = self.window(days, start, end)
+        if not dates:
+            return pd.DataFrame(columns=['Date', 'Code'] + list(columns or []))
+
+        first, last = dates[0], dates[-1]
+        wanted = set(dates)
+        paths = [self.month_path(month) for month, month_days in sorted(self.months.items())
+                 if any(day in wanted for day in month_days)]
+        paths += [self.day_path(day) for day in self.day_dates() if day in wanted]
+
+        condition = (ds.field('Date') >= first) & (ds.field('Date') <= last)
+        if codes is not None:
+            condition &= ds.field('Code').isin([str(code) for code in codes])
+        if sectors is not None:
+            condition &= ds.field('Sector').isin(list(sectors))
+        read = None if columns is None else list(dict.fromkeys(['Date', 'Code', *columns]))
+
+        # One schema for every partition: older files may hold int8 / int16 dictionary indices
+        files = [str(path) for path in paths]
+        unified = pa.unify_schemas([pq.read_schema(path) for path in files], promote_options="permissive")
+        table = ds.dataset(files, schema=_dictionary_schema(unified), format="parquet").to_table(columns=read, filter=condition)
+        frame = table.to_pandas()
+        return frame.sort_values(['Code', 'Date'], kind='stable').reset_index(drop=True)
+
+    def sector_history(self, days=21, start=None, end=None, column='Money_Flow_Strength', sectors=None, by='Sector'):
+        """🏭 Date × sector table of the average of column across each sector's stocks (by='Industry' for TW groups)"""
+        frame = self.history(sectors=sectors, days=days, start=start, end=end, columns=['Sector', by, column])
+        if frame.empty:
+            return pd.DataFrame()
+        return frame.pivot_table(index='Date', columns=by, values=column, aggfunc='mean', observed=True)
+
+    def ticker_history(self, codes, days=21, start=None, end=None, column='Money_Flow_Strength'):
+        """📉 Date × Code table of one column (e.g. each ticker's money flow or daily Signal)"""
+        frame = self.history(codes=codes, days=days, start=start, end=end, columns=[column])
+        if frame.empty:
+            return pd.DataFrame()
+        return frame.pivot(index='Date', columns='Code', values=column)
+
+
+def _dictionary_schema(arrow_schema):
+    """🔤 The schema with every dictionary column indexed by int32"""
+    import pyarrow as pa
+
+    return pa.schema([field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+                      if pa.types.is_dictionary(field.type) else field for field in arrow_schema],
+                     metadata=arrow_schema.metadata)
+
+
+def _write(table, path, row_group_size=None):
+    """💾 Write a Parquet file atomically (readers never see a half-written partition)"""
+    import pyarrow.parquet as pq
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".parquet.tmp")
+    pq.write_table(table.cast(_dictionary_schema(table.schema)), partial, compression='zstd', row_group_size=row_group_size)
+    os.replace(partial, path)
@@ -0,0 +1,10 @@
+import sys
+
+from market_pipeline import main
+
+# --- VIETNAM DAILY SCAN ---
+# Builds Vietnam_Market_Data_Latest.xlsx for dashboard_vn.py; the engine and the
+# market config live in market_pipeline.py / markets.py (same CLI flags).
+
+if __name__ == "__main__":
+    raise SystemExit(main(["--market", "VN", *sys.argv[1:]]))
@@ -0,0 +1,299 @@
+import json
+import logging
+import math
+from collections import deque
+from pathlib import Path
+
+import pandas as pd
+
+from signal_params import DEFAULT_PARAMS
+
+logger = logging.getLogger(__name__)
+
+# --- STREAMING INDICATOR STATE (O(1) PER NEW BAR) ---
+# Same formulas as indicators.calculate_panel_indicators, but each ticker keeps
+# small fixed-size windows so a new daily (or intraday provisional) bar updates
+# the signal set without replaying history. EMAs are seeded at the first bar the
+# state ever saw, so MACD only equals the panel value when both start together.
+# Windows come from a signal_params set (DEFAULT_PARAMS unless tuned), stored with
+# each state; a book drops states kept with other parameters and rebuilds them.
+
+STATE_DIR = Path(__file__).resolve().parent / "market_data" / "state"
+RESUM_EVERY = 500  # re-add window sums periodically to cancel float drift
+NAN = float('nan')
+
+
+class RollingWindow:
+    """📏 Fixed-size window with running sum and sum of squares"""
+    __slots__ = ('size', 'values', 'total', 'total_sq', 'anchor', '_updates')
+
+    def __init__(self, size, values=()):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.anchor = None  # sums are kept around the first value for stability
+        self._updates = 0
+        for value in values:
+            self.push(value)
+
+    def push(self, value):
+        if self.anchor is None:
+            self.anchor = value
+        if len(self.values) == self.size:
+            old = self.values[0] - self.anchor
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        shifted = value - self.anchor
+        self.total += shifted
+        self.total_sq += shifted * shifted
+        self._updates += 1
+        if self._updates % RESUM_EVERY == 0:
+            self.total = sum(v - self.anchor for v in self.values)
+            self.total_sq = sum((v - self.anchor) ** 2 for v in self.values)
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def mean(self):
+        return self.anchor + self.total / self.size if self.full else NAN
+
+    def std(self):
+        """Sample standard deviation (ddof=1, like pandas rolling std)"""
+        if not self.full:
+            return NAN
+        var = (self.total_sq - self.total * self.total / self.size) / (self.size - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class RollingExtreme:
+    """📐 Rolling max (or min) via a monotonic deque"""
+    __slots__ = ('size', 'is_max', 'count', 'window')
+
+    def __init__(self, size, is_max, values=()):
+        self.size = size
+        self.is_max = is_max
+        self.count = 0
+        self.window = deque()
+        for value in values:
+            self.push(value)
+
+    def push(self, value):
+        self.count += 1
+        while self.window and (self.window[-1][1] <= value if self.is_max else self.window[-1][1] >= value):
+            self.window.pop()
+        self.window.append((self.count, value))
+        while self.window[0][0] <= self.count - self.size:
+            self.window.popleft()
+
+    def value(self):
+        return self.window[0][1] if self.count >= self.size else NAN
+
+
+def _ema_step(previous, value, span):
+    alpha = 2 / (span + 1)
+    return value if previous is None else alpha * value + (1 - alpha) * previous
+
+
+class IndicatorState:
+    """📡 Per-ticker indicator state fed one valid daily bar at a time"""
+
+    def __init__(self, params=DEFAULT_PARAMS):
+        p = self.params = params
+        self.bars = 0
+        self.last_date = None
+        self.ema_fast = None
+        self.ema_slow = None
+        self.ema_signal = None
+        # Pct_1Month needs the close month_bars back; the close windows are rebuilt from it on load
+        self.close_hist = deque(maxlen=max(p["month_bars"] + 1, p["bb_window"], p["stoch_window"]))
+        self.closes = RollingWindow(p["bb_window"])      # SMA / Bollinger
+        self.gains = RollingWindow(p["rsi_window"])      # RSI
+        self.losses = RollingWindow(p["rsi_window"])
+        self.high_close = RollingExtreme(p["stoch_window"], is_max=True)   # Stochastic (on close)
+        self.low_close = RollingExtreme(p["stoch_window"], is_max=False)
+        self.true_range = RollingWindow(p["atr_window"])  # ATR
+        self.vol_slow = RollingWindow(p["vol_slow"])
+        self.vol_fast = RollingWindow(p["vol_fast"])
+        self.last_volume = NAN
+        self.highs = deque(maxlen=p["high_low_window"])  # breadth: new high / low of the window
+        self.lows = deque(maxlen=p["high_low_window"])
+
+    def update(self, high, low, close, volume, date=None):
+        """➕ Advance the state by one bar"""
+        prev_close = self.close_hist[-1] if self.close_hist else None
+
+        delta = close - prev_close if prev_close is not None else NAN
+        # Same as delta.where(delta > 0, 0): the first bar counts as a 0 gain/loss
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+
+        if prev_close is None:
+            self.true_range.push(high - low)
+        else:
+            self.true_range.push(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+
+        self.ema_fast = _ema_step(self.ema_fast, close, self.params["ema_fast"])
+        self.ema_slow = _ema_step(self.ema_slow, close, self.params["ema_slow"])
+        self.ema_signal = _ema_step(self.ema_signal, self.ema_fast - self.ema_slow, self.params["ema_signal"])
+
+        self.close_hist.append(close)
+        self.closes.push(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.high_close.push(close)
+        self.low_close.push(close)
+        self.vol_slow.push(volume)
+        self.vol_fast.push(volume)
+        self.last_volume = volume
+        self.bars += 1
+        if date is not None:
+            self.last_date = pd.Timestamp(date).normalize()
+
+    def preview(self, high, low, close, volume):
+        """👀 Snapshot with a provisional (intraday) bar without committing it"""
+        trial = IndicatorState.from_dict(self.to_dict())
+        trial.update(high, low, close, volume)
+        return trial.snapshot()
+
+    def snapshot(self):
+        """📊 Current indicator values (same keys as calculate_panel_indicators)"""
+        price = self.close_hist[-1] if self.close_hist else NAN
+        prev_price = self.close_hist[-2] if len(self.close_hist) > 1 else NAN
+        month_bars = self.params["month_bars"]
+        price_21d_ago = self.close_hist[-month_bars - 1] if len(self.close_hist) > month_bars else NAN
+
+        gain, loss = self.gains.mean(), self.losses.mean()
+        if math.isnan(gain) or math.isnan(loss) or (gain == 0 and loss == 0):
+            rsi = NAN
+        else:
+            rsi = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+        sma_20, std_20 = self.closes.mean(), self.closes.std()
+        bb_std = self.params["bb_std"]
+        bb_range = 2 * bb_std * std_20
+        bb_position = (price - (sma_20 - bb_std * std_20)) / bb_range * 100 if bb_range > 0 else 50
+
+        high_14, low_14 = self.high_close.value(), self.low_close.value()
+        stochastic = (price - low_14) / (high_14 - low_14) * 100 if high_14 != low_14 else NAN
+
+        atr = self.true_range.mean()
+        vol_tb_20, vol_tb_5 = self.vol_slow.mean(), self.vol_fast.mean()
+        current_vol = self.last_volume
+
+        signal = "Weak"
+        if price > sma_20:
+            signal = "Breakout" if current_vol > vol_tb_20 else "Accumulation (Up)"
+
+        macd = self.ema_fast - self.ema_slow if self.bars else NAN
+        return {
+            "Rows": self.bars,
+            "Price": price,
+            "Pct_Day": (price - prev_price) / prev_price * 100,
+            "Vol_vs_Avg": current_vol / vol_tb_20 * 100 if vol_tb_20 > 0 else 0,
+            "Pct_1Month": (price - price_21d_ago) / price_21d_ago * 100,
+            "Money_Flow_Strength": vol_tb_5 / vol_tb_20 if vol_tb_20 > 0 else 0,
+            "Signal": signal,
+            "Avg_Trading_Value_B": price * vol_tb_20 / 1_000_000_000,
+            "RSI": rsi,
+            "MACD": macd,
+            "MACD_Signal": self.ema_signal if self.bars else NAN,
+            "BB_Position": bb_position,
+            "Stochastic": stochastic,
+            "ATR_Percent": atr / price * 100 if price > 0 else 0,
+            "Vol_Trend": (current_vol / vol_tb_20 - 1) * 100 if vol_tb_20 > 0 else 0,
+            "Above_SMA20": price > sma_20,
+            "New_High": len(self.highs) == self.highs.maxlen and self.highs[-1] >= max(self.highs),
+            "New_Low": len(self.lows) == self.lows.maxlen and self.lows[-1] <= min(self.lows),
+        }
+
+    def to_dict(self):
+        """💾 Compact JSON-ready state (windows are rebuilt on load)"""
+        return {
+            "params": self.params,
+            "bars": self.bars,
+            "last_date": self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None,
+            "ema": [self.ema_fast, self.ema_slow, self.ema_signal],
+            "close_hist": list(self.close_hist),
+            "gains": list(self.gains.values),
+            "losses": list(self.losses.values),
+            "true_range": list(self.true_range.values),
+            "volumes": list(max(self.vol_slow.values, self.vol_fast.values, key=len)),  # the longer window
+            "highs": list(self.highs),
+            "lows": list(self.lows),
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        state = cls(payload.get("params", DEFAULT_PARAMS))  # files without params were kept with the defaults
+        p = state.params
+        state.bars = payload["bars"]
+        state.last_date = pd.Timestamp(payload["last_date"]) if payload.get("last_date") else None
+        state.ema_fast, state.ema_slow, state.ema_signal = payload["ema"]
+        closes = payload["close_hist"]
+        state.close_hist.extend(closes)
+        state.closes = RollingWindow(p["bb_window"], closes[-p["bb_window"]:])
+        state.high_close = RollingExtreme(p["stoch_window"], True, closes[-p["stoch_window"]:])
+        state.low_close = RollingExtreme(p["stoch_window"], False, closes[-p["stoch_window"]:])
+        state.gains = RollingWindow(p["rsi_window"], payload["gains"])
+        state.losses = RollingWindow(p["rsi_window"], payload["losses"])
+        state.true_range = RollingWindow(p["atr_window"], payload["true_range"])
+        volumes = payload["volumes"]
+        state.vol_slow = RollingWindow(p["vol_slow"], volumes[-p["vol_slow"]:])
+        state.vol_fast = RollingWindow(p["vol_fast"], volumes[-p["vol_fast"]:])
+        state.last_volume = volumes[-1] if volumes else NAN
+        state.highs.extend(payload.get("highs", []))  # absent in state files written before breadth
+        state.lows.extend(payload.get("lows", []))
+        return state
+
+
+class IndicatorBook:
+    """📚 Indicator states for a whole market, persisted as one JSON file"""
+
+    def __init__(self, market, root=STATE_DIR, params=DEFAULT_PARAMS):
+        self.path = Path(root) / f"{market.lower()}_indicator_state.json"
+        self.params = dict(params)
+        self.states = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.states = {t: IndicatorState.from_dict(p) for t, p in json.load(f).items()}
+            logger.info(f"📡 Indicator state loaded for {len(self.states)} tickers")
+            # States kept with other windows are rebuilt from the stored bars by the next advance
+            stale = [t for t, state in self.states.items() if state.params != self.params]
+            if stale:
+                logger.info(f"🔁 Indicator state of {len(stale)} tickers was kept with other parameters - rebuilding")
+                for ticker in stale:
+                    del self.states[ticker]
+
+    def reset(self, tickers):
+        """🔁 Forget the states of tickers whose stored history was re-adjusted (the next advance rebuilds them)"""
+        dropped = [ticker for ticker in tickers if self.states.pop(ticker, None) is not None]
+        if dropped:
+            logger.info(f"🔁 Indicator state reset for {len(dropped)} re-adjusted tickers: {dropped}")
+        return dropped
+
+    def advance(self, bars):
+        """➕ Feed long-format bars (Date, Ticker, High, Low, Close, Volume) newer than each state"""
+        bars = bars.dropna(subset=['Open', 'High', 'Low', 'Close', 'Volume'])
+        # Keep only the bars after each ticker's last state date (vectorized), then step through those
+        last_dates = pd.Series({ticker: state.last_date for ticker, state in self.states.items()
+                                if state.last_date is not None}, dtype='datetime64[ns]')
+        known = pd.Series(last_dates.reindex(bars['Ticker']).to_numpy(), index=bars.index)
+        bars = bars.loc[known.isna() | (bars['Date'] > known), ['Date', 'Ticker', 'High', 'Low', 'Close', 'Volume']]
+        bars = bars.sort_values(['Ticker', 'Date'])
+        for row in bars.itertuples(index=False):
+            self.states.setdefault(row.Ticker, IndicatorState(self.params)).update(row.High, row.Low, row.Close, row.Volume, row.Date)
+        logger.info(f"📡 Indicator state advanced by {len(bars)} bars")
+        return len(bars)
+
+    def snapshot(self):
+        """📊 One row per ticker with the current indicator values"""
+        return pd.DataFrame.from_dict({t: s.snapshot() for t, s in self.states.items()}, orient='index')
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({t: s.to_dict() for t, s in self.states.items()}, f)
+        logger.info(f"📡 Indicator state saved: {len(self.states)} tickers → {self.path.name}")
@@ -0,0 +1,199 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from backtest import DEFAULT_HORIZONS, prepare_frames, price_frames, rule_sets_for, run_rule_set
+from downloader import FixtureProvider
+from history_store import HistoryStore
+from security_master import SecurityMaster
+from signal_params import DEFAULT_PARAMS, param_grid, params_hash
+
+logger = logging.getLogger(__name__)
+
+# --- PARAMETER SWEEP (PROCESS POOL + SHARED-MEMORY PRICE PANEL) ---
+# The OHLCV panel is copied once into a shared-memory block; every worker maps
+# it as read-only DataFrames, recomputes the indicators for its parameter set
+# and replays the rules through the backtester. Results are cached on disk per
+# hash of (parameters, horizons, data fingerprint), so re-running a grid only
+# computes the new configurations.
+
+SWEEP_DIR = Path(__file__).resolve().parent / "market_data" / "sweeps"
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+GROUP_KEYS = ('Signal', 'Sector')
+
+
+# --- SHARED PANEL ---
+class SharedPanel:
+    """🧠 OHLCV frames in one shared-memory block (fields × dates × tickers, float64)"""
+
+    def __init__(self, frames):
+        close = frames['Close']
+        shape = (len(PANEL_FIELDS),) + close.shape
+        self.shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        block = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf)
+        for i, field in enumerate(PANEL_FIELDS):
+            block[i] = frames[field].reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+        self.spec = (self.shm.name, shape, close.index, close.columns)
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def attach_frames(spec):
+    """🔗 Map a SharedPanel spec back to {field: DataFrame} without copying"""
+    name, shape, index, columns = spec
+    shm = SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    frames = {field: pd.DataFrame(block[i], index=index, columns=columns, copy=False)
+              for i, field in enumerate(PANEL_FIELDS)}
+    return shm, frames
+
+
+def data_fingerprint(frames):
+    """🔑 Cheap identity of a price panel (first/last date, shape, close checksum)"""
+    close = frames['Close']
+    if close.empty:
+        return ["empty"]
+    return [str(close.index[0]), str(close.index[-1]), list(close.shape), round(float(np.nansum(close.to_numpy())), 6)]
+
+
+# --- RESULT CACHE (ONE PARQUET PER CONFIGURATION HASH) ---
+def cache_path(cache_dir, key):
+    return Path(cache_dir) / f"{key}.parquet"
+
+
+def save_result(path, results):
+    frames = [frame.assign(Rule_Set=name, Grouping=grouping)
+              for name, summaries in results.items() for grouping, frame in summaries.items()]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.concat(frames, ignore_index=True).to_parquet(path, index=False)
+
+
+def load_result(path):
+    stored = pd.read_parquet(path)
+    results = {}
+    for (name, grouping), frame in stored.groupby(['Rule_Set', 'Grouping'], sort=False):
+        frame = frame.drop(columns=['Rule_Set', 'Grouping']).dropna(axis=1, how='all').reset_index(drop=True)
+        keys = [c for c in GROUP_KEYS if c in frame.columns]  # concat moved Sector to the end
+        frame = frame[keys + [c for c in frame.columns if c not in keys]]
+        results.setdefault(name, {})[grouping] = frame
+    return results
+
+
+# --- WORKERS ---
+_WORKER = {}
+
+
+def _init_worker(spec, sectors, horizons):
+    shm, frames = attach_frames(spec)
+    _WORKER.update(shm=shm, frames=frames, sectors=sectors, horizons=horizons)
+
+
+def evaluate_config(frames, sectors, horizons, params):
+    """🔁 Backtest every default rule set under one parameter set"""
+    prepared = prepare_frames(frames, sectors, horizons, params)
+    return {name: run_rule_set(prepared, rules, default)
+            for name, (rules, default) in rule_sets_for(params).items()}
+
+
+def _run_config(job):
+    key, params = job
+    return key, evaluate_config(_WORKER['frames'], _WORKER['sectors'], _WORKER['horizons'], params)
+
+
+# --- SWEEP ---
+def sweep(bars, sectors, grid, market="TW", horizons=DEFAULT_HORIZONS, processes=None, cache_dir=SWEEP_DIR):
+    """🧪 Evaluate a list of parameter sets: {config hash: (params, results)}"""
+    frames = price_frames(bars)
+    fingerprint = data_fingerprint(frames)
+    cache_dir = Path(cache_dir) / market.lower()
+
+    configs = {params_hash(params, list(horizons), fingerprint): params for params in grid}
+    done = {key: load_result(cache_path(cache_dir, key)) for key in configs if cache_path(cache_dir, key).exists()}
+    pending = [(key, params) for key, params in configs.items() if key not in done]
+    logger.info(f"🧪 Sweep {market}: {len(configs)} configurations, {len(done)} cached, {len(pending)} to run")
+
+    processes = processes or os.cpu_count() or 1
+    if processes > 1 and len(pending) > 1:
+        with SharedPanel(frames) as panel:
+            with ProcessPoolExecutor(max_workers=min(processes, len(pending)), initializer=_init_worker,
+                                     initargs=(panel.spec, sectors, horizons)) as pool:
+                computed = dict(pool.map(_run_config, pending))
+    else:
+        computed = {key: evaluate_config(frames, sectors, horizons, params) for key, params in pending}
+
+    for key, results in computed.items():
+        save_result(cache_path(cache_dir, key), results)
+    done.update(computed)
+    return {key: (params, done[key]) for key, params in configs.items()}
+
+
+def sweep_table(swept, rule_set="QUICK_ACTION", grouping="by_signal"):
+    """📊 One row per configuration × group, with the varied parameters as columns"""
+    varied = [name for name in DEFAULT_PARAMS if len({params[name] for params, _ in swept.values()}) > 1]
+    rows = []
+    for key, (params, results) in swept.items():
+        frame = results[rule_set][grouping].copy()
+        for name in reversed(varied):
+            frame.insert(0, name, params[name])
+        frame.insert(0, 'Config', key)
+        rows.append(frame)
+    return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+
+
+# --- CLI ---
+def parse_axes(items):
+    """'rsi_window=9,14' → {'rsi_window': [9, 14]}"""
+    axes = {}
+    for item in items:
+        name, values = item.split("=", 1)
+        if name not in DEFAULT_PARAMS:
+            raise KeyError(f"Unknown parameter: {name}")
+        axes[name] = [float(v) if "." in v else int(v) for v in values.split(",")]
+    return axes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep indicator windows and signal thresholds over stored history")
+    parser.add_argument("axes", nargs="+", help="name=v1,v2,... (see signal_params.DEFAULT_PARAMS)")
+    parser.add_argument("--market", default="TW")
+    parser.add_argument("--source", help="Fixture file/directory of long bars (default: the market's history store)")
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS))
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    bars = FixtureProvider(args.source).bars if args.source else HistoryStore(args.market).bars
+    if bars.empty:
+        logger.error(f"❌ No bars to sweep for {args.market}")
+        return 1
+
+    sectors = SecurityMaster.for_market(args.market).lookup(bars['Ticker'].unique())['Sector']
+    swept = sweep(bars, sectors, param_grid(**parse_axes(args.axes)), market=args.market,
+                  horizons=args.horizons, processes=args.processes)
+    output = Path(args.output or SWEEP_DIR / f"{args.market.lower()}_sweep.xlsx")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        sweep_table(swept).to_excel(writer, sheet_name="QUICK_ACTION", index=False)
+        sweep_table(swept, rule_set="Signal").to_excel(writer, sheet_name="Signal", index=False)
+    logger.info(f"💾 Sweep report saved: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+import argparse
+import logging
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from history_store import STORE_COLUMNS
+from security_master import SECURITY_MASTER_DIR, SecurityMaster
+
+logger = logging.getLogger(__name__)
+
+# --- SYNTHETIC MARKET (REPRODUCIBLE OHLCV + SECURITY MASTER FOR OFFLINE RUNS) ---
+# N tickers × D business days of random-walk bars with the awkward parts of real
+# data: single missing bars, multi-day trading halts, late listings (too little
+# history) and volume spikes with matching price jumps. Same seed, same market.
+# Bars are in the fixture format (STOCK_DATA_SOURCE), the master in the
+# security-master format (SECURITY_MASTER).
+
+DEFAULT_DAYS = 60
+DEFAULT_SEED = 42
+SYNTHETIC_PROFILE = {
+    "gap_rate": 0.01,         # share of single bars missing
+    "halt_rate": 0.02,        # share of tickers with one multi-day halt
+    "halt_days": (3, 10),
+    "late_listing_rate": 0.03,  # share of tickers listed inside the window
+    "spike_rate": 0.02,       # share of bars with a volume spike
+    "spike_volume": (3, 10),  # spike volume multiplier range
+    "tpex_share": 0.35,       # share of .TWO tickers
+}
+
+
+def synthetic_tickers(n_tickers, seed=DEFAULT_SEED, tpex_share=SYNTHETIC_PROFILE["tpex_share"]):
+    """🔤 Four/five digit codes with .TW / .TWO suffixes"""
+    rng = np.random.default_rng(seed)
+    codes = np.arange(1101, 1101 + n_tickers).astype(str)
+    suffix = np.where(rng.random(n_tickers) < tpex_share, ".TWO", ".TW")
+    return [c + s for c, s in zip(codes, suffix)]
+
+
+def generate_bars(n_tickers, n_days=DEFAULT_DAYS, seed=DEFAULT_SEED, end=None, profile=None):
+    """📈 Long OHLCV bars (Date, Ticker, Open, High, Low, Close, Volume) ending at end (default: today)"""
+    p = {**SYNTHETIC_PROFILE, **(profile or {})}
+    rng = np.random.default_rng(seed)
+    tickers = synthetic_tickers(n_tickers, seed, p["tpex_share"])
+    end = pd.Timestamp(end or datetime.now()).normalize()
+    dates = pd.bdate_range(end=end, periods=n_days)
+
+    # Price: geometric random walk with per-ticker drift/volatility
+    drift = rng.normal(0.0003, 0.001, n_tickers)
+    vol = rng.uniform(0.008, 0.04, n_tickers)
+    returns = rng.normal(drift, vol, (n_days, n_tickers))
+
+    # Volume: per-ticker base level, daily noise, spikes that move the price too
+    base_volume = rng.lognormal(13, 1.2, n_tickers)
+    volume = base_volume * rng.lognormal(0, 0.35, (n_days, n_tickers))
+    spikes = rng.random((n_days, n_tickers)) < p["spike_rate"]
+    volume[spikes] *= rng.uniform(*p["spike_volume"], spikes.sum())
+    returns[spikes] += rng.choice([-1, 1], spikes.sum()) * rng.uniform(0.02, 0.07, spikes.sum())
+
+    start_price = rng.lognormal(np.log(60), 1.0, n_tickers)
+    close = start_price * np.exp(np.cumsum(returns, axis=0))
+    open_ = np.vstack([start_price, close[:-1]]) * (1 + rng.normal(0, 0.003, (n_days, n_tickers)))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, (n_days, n_tickers))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, (n_days, n_tickers))))
+
+    # Missing bars: single gaps, one halt per halted ticker, late listings
+    present = rng.random((n_days, n_tickers)) >= p["gap_rate"]
+    halted = np.flatnonzero(rng.random(n_tickers) < p["halt_rate"])
+    lengths = rng.integers(p["halt_days"][0], p["halt_days"][1] + 1, halted.size)
+    starts = rng.integers(0, max(1, n_days - 1), halted.size)
+    for col, first, length in zip(halted, starts, lengths):
+        present[first:first + length, col] = False
+    late = np.flatnonzero(rng.random(n_tickers) < p["late_listing_rate"])
+    listed_on = rng.integers(n_days // 2, n_days, late.size)
+    for col, first in zip(late, listed_on):
+        present[:first, col] = False
+
+    rows, cols = np.nonzero(present)
+    bars = pd.DataFrame({
+        "Date": dates[rows],
+        "Ticker": np.asarray(tickers)[cols],
+        "Open": open_[rows, cols].round(2),
+        "High": high[rows, cols].round(2),
+        "Low": low[rows, cols].round(2),
+        "Close": close[rows, cols].round(2),
+        "Volume": volume[rows, cols].round(0),
+    })
+    return bars[STORE_COLUMNS]
+
+
+def generate_master(tickers, seed=DEFAULT_SEED):
+    """📇 Security master rows for synthetic tickers (sectors drawn from the real TW master)"""
+    rng = np.random.default_rng(seed)
+    try:
+        sectors = SecurityMaster.for_market("TW", SECURITY_MASTER_DIR).sectors()
+    except FileNotFoundError:
+        sectors = [f"Sector {i:02d}" for i in range(30)]
+    codes = [t.split(".")[0] for t in tickers]
+    return pd.DataFrame({
+        "Ticker": tickers,
+        "Code": codes,
+        "Name": [f"Synthetic {c}" for c in codes],
+        "Name_CN": [f"合成{c}" for c in codes],
+        "Sector": np.asarray(sectors)[rng.integers(0, len(sectors), len(tickers))],
+    })
+
+
+def write_market(root, n_tickers, n_days=DEFAULT_DAYS, seed=DEFAULT_SEED, end=None):
+    """💾 Write <root>/bars.parquet and <root>/securities.csv; returns (bars path, master path)"""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    bars = generate_bars(n_tickers, n_days, seed, end)
+    master = generate_master(synthetic_tickers(n_tickers, seed), seed)
+    bars_path, master_path = root / "bars.parquet", root / "securities.csv"
+    bars.to_parquet(bars_path, index=False)
+    master.to_csv(master_path, index=False, encoding='utf-8')
+    logger.info(f"🧪 Synthetic market: {n_tickers} tickers × {n_days} days, {len(bars)} bars → {root}")
+    return bars_path, master_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic TW market")
+    parser.add_argument("root")
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    write_market(args.root, args.tickers, args.days, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())